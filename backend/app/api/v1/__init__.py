@@ -9,6 +9,7 @@
 from fastapi import APIRouter, Depends
 from app.api.v1.config_definition import router as config_definition_router
 from app.api.v1.config import router as config_router
+from app.api.v1.changes import router as changes_router
 from app.utils.auth.middlewares import check_api_key
 
 api_router = APIRouter()
@@ -25,3 +26,9 @@ api_router.include_router(
     tags=["Config"],
     dependencies=[Depends(check_api_key)],
 )
+api_router.include_router(
+    changes_router,
+    prefix="/changes",
+    tags=["Changes"],
+    dependencies=[Depends(check_api_key)],
+)
@@ -0,0 +1,48 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from fastapi import APIRouter, status
+
+from app.utils.changes.utils import l_changes
+from app.utils.responses.utils import FastJSONResponse, r_util_shape
+
+from app.models.change import ListChangesResponse
+
+router = APIRouter()
+
+
+@router.get(
+    "/",
+    status_code=status.HTTP_200_OK,
+    response_model=ListChangesResponse,
+    response_model_exclude_none=True,
+    responses={410: {"description": "The changes after `since` have been pruned."}},
+)
+async def list_changes(since: int = 0, limit: int = 100):
+    """
+    List the changes of every configuration after a sequence number.
+
+    -- Parameters
+    since: int, optional
+        The `last_seq` of the previous call, or 0 to read the log from the start.
+    limit: int, optional
+        The maximum number of changes to return.
+
+    -- Returns
+    ListChangesResponse
+        The response for the list changes request.
+    """
+    changes = await l_changes(since, limit)
+
+    return FastJSONResponse(
+        r_util_shape(
+            ListChangesResponse,
+            {"message": "Changes retrieved successfully.", "data": changes},
+            exclude_none=True,
+        )
+    )
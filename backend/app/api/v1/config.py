@@ -6,13 +6,28 @@
 
 """
 
-from fastapi import APIRouter, Request, status
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Body, Header, Request, status
 
-from app.utils.configs.utils import c_config, r_config, d_config, l_config, u_config
+from app.utils.configs.utils import (
+    b_config,
+    b_util_json,
+    b_util_ndjson,
+    c_config,
+    r_config,
+    d_config,
+    l_config,
+    p_config,
+    u_config,
+)
+from app.utils.etags.utils import not_modified, parse_etags, quote_etag
+from app.utils.responses.utils import RawJSONResponse
 
+from app.models.common import Status
 from app.models.config import (
     Config,
     ConfigEditable,
+    BulkConfigResponse,
     CreateConfigResponse,
     ReadConfigResponse,
     UpdateConfigResponse,
@@ -29,7 +44,7 @@ router = APIRouter()
     response_model=CreateConfigResponse,
     response_model_exclude_none=True,
 )
-def create_config(config_definition_key: str, config: Config):
+async def create_config(config_definition_key: str, config: Config):
     """
     Create a new configuration.
 
@@ -43,7 +58,7 @@ def create_config(config_definition_key: str, config: Config):
     CreateConfigResponse
         The response for the create configuration request.
     """
-    c_config(
+    await c_config(
         config_definition_key,
         config.config_key,
         config.data,
@@ -55,35 +70,113 @@ def create_config(config_definition_key: str, config: Config):
     }
 
 
+BULK_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {"config_key": {"type": "string"}, "data": {"type": "object"}},
+    "required": ["config_key", "data"],
+}
+
+
+@router.post(
+    "/bulk",
+    status_code=status.HTTP_200_OK,
+    response_model=BulkConfigResponse,
+    response_model_exclude_none=True,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": BULK_ITEM_SCHEMA}
+                },
+                "application/x-ndjson": {"schema": BULK_ITEM_SCHEMA},
+            },
+        }
+    },
+)
+async def bulk_configs(
+    request: Request, config_definition_key: str, mode: str = "insert"
+):
+    """
+    Create or update many configurations at once.
+
+    -- Parameters
+    request: Request
+        The request object, with a JSON array or an NDJSON stream of configurations.
+    config_definition_key: str
+        The key for the configuration definition.
+    mode: str
+        How existing configurations are handled: "insert", "upsert" or
+        "skip-existing".
+
+    -- Returns
+    BulkConfigResponse
+        The response for the bulk configuration request.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("application/x-ndjson"):
+        configs = b_util_ndjson(request.stream())
+    else:
+        configs = b_util_json(await request.body())
+
+    summary = await b_config(config_definition_key, configs, mode)
+
+    return {
+        "message": "Configurations written successfully.",
+        "data": summary,
+    }
+
+
 @router.get(
     "/{config_key}",
     status_code=status.HTTP_200_OK,
     response_model=ReadConfigResponse,
     response_model_exclude_none=True,
+    responses={304: {"description": "The configuration has not been modified."}},
 )
-def get_config(config_definition_key: str, config_key: str):
+async def get_config(
+    config_definition_key: str,
+    config_key: str,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get a configuration.
 
+    The configuration data is spliced into the response as the JSON text the
+    database holds, without being decoded and encoded again.
+
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
     config_key: str
         The key for the configuration
+    if_none_match: str, optional
+        The entity tags the client already has. A match returns an empty
+        `304 Not Modified`.
 
     -- Returns
     ReadConfigResponse
         The response for the get configuration request.
     """
-    config = r_config(
+    config = await r_config(
         config_definition_key,
         config_key,
+        parse_etags(if_none_match),
+        raw=True,
     )
 
-    return {
-        "message": "Configuration retrieved successfully.",
-        "data": config,
-    }
+    etag = config.pop("etag")
+    if config["data"] is None:
+        return not_modified(etag)
+
+    return RawJSONResponse(
+        content={
+            "status": Status.success,
+            "message": "Configuration retrieved successfully.",
+            "data": config,
+        },
+        headers={"ETag": quote_etag(etag)},
+    )
 
 
 @router.put(
@@ -91,8 +184,15 @@ def get_config(config_definition_key: str, config_key: str):
     status_code=status.HTTP_200_OK,
     response_model=UpdateConfigResponse,
     response_model_exclude_none=True,
+    responses={412: {"description": "The configuration has been modified."}},
 )
-def update_config(config_definition_key: str, config_key: str, config: ConfigEditable):
+async def update_config(
+    config_definition_key: str,
+    config_key: str,
+    config: ConfigEditable,
+    expected_version: Optional[int] = None,
+    if_match: Optional[str] = Header(None),
+):
     """
     Update an existing configuration.
 
@@ -103,15 +203,21 @@ def update_config(config_definition_key: str, config_key: str, config: ConfigEdi
         The key for the configuration to be updated.
     config: UpdateConfig
         The updated data for the configuration.
+    expected_version: int, optional
+        Only update the configuration if it is at this version.
+    if_match: str, optional
+        Only update the configuration if its `ETag` is one of these.
 
     -- Returns
     UpdateConfigResponse
         The response for the update configuration request.
     """
-    u_config(
+    await u_config(
         config_definition_key,
         config_key,
         config.data,
+        expected_version,
+        parse_etags(if_match, weak=False) if if_match else None,
     )
 
     return {
@@ -120,13 +226,64 @@ def update_config(config_definition_key: str, config_key: str, config: ConfigEdi
     }
 
 
+@router.patch(
+    "/{config_key}",
+    status_code=status.HTTP_200_OK,
+    response_model=UpdateConfigResponse,
+    response_model_exclude_none=True,
+    responses={
+        409: {"description": "The configuration kept being modified concurrently."},
+        412: {"description": "The configuration has been modified."},
+    },
+)
+async def patch_config(
+    config_definition_key: str,
+    config_key: str,
+    patch: Dict[str, Any] = Body(..., media_type="application/merge-patch+json"),
+    expected_version: Optional[int] = None,
+    if_match: Optional[str] = Header(None),
+):
+    """
+    Patch an existing configuration with a JSON Merge Patch (RFC 7396).
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration to be patched.
+    patch: Dict[str, Any]
+        The merge patch for the configuration data. Keys set to null are
+        removed, objects are merged and anything else is replaced.
+    expected_version: int, optional
+        Only patch the configuration if it is at this version.
+    if_match: str, optional
+        Only patch the configuration if its `ETag` is one of these.
+
+    -- Returns
+    UpdateConfigResponse
+        The response for the patch configuration request, with the patch.
+    """
+    await p_config(
+        config_definition_key,
+        config_key,
+        patch,
+        expected_version,
+        parse_etags(if_match, weak=False) if if_match else None,
+    )
+
+    return {
+        "message": "Configuration patched successfully.",
+        "data": patch,
+    }
+
+
 @router.delete(
     "/{config_key}",
     status_code=status.HTTP_200_OK,
     response_model=DeleteConfigResponse,
     response_model_exclude_none=True,
 )
-def delete_config(config_definition_key: str, config_key: str):
+async def delete_config(config_definition_key: str, config_key: str):
     """
     Delete a configuration.
 
@@ -140,7 +297,7 @@ def delete_config(config_definition_key: str, config_key: str):
     DeleteConfigResponse
         The response for the delete configuration request.
     """
-    d_config(
+    await d_config(
         config_definition_key,
         config_key,
     )
@@ -160,7 +317,7 @@ def delete_config(config_definition_key: str, config_key: str):
     response_model=ListConfigResponse,
     response_model_exclude_none=True,
 )
-def list_configs(
+async def list_configs(
     request: Request,
     config_definition_key: str,
     page: int = 1,
@@ -168,10 +325,15 @@ def list_configs(
     sort_by: str = "modified_at",
     sort_order: str = "desc",
     search: str = None,
+    cursor: str = None,
+    count: str = "exact",
 ):
     """
     List all configurations for a configuration definition.
 
+    The configuration data is spliced into the response as the JSON text the
+    database holds, without being decoded and encoded again.
+
     -- Parameters
     request: Request
         The request object.
@@ -187,12 +349,17 @@ def list_configs(
         The order to sort by.
     search: str
         The search term.
+    cursor: str
+        The `next_cursor` of the previous page, to page by keyset instead of
+        offset.
+    count: str
+        How the total is counted: "exact", "estimated" or "none".
 
     -- Returns
     ListConfigResponse
         The response for the list configurations request.
     """
-    configs, count = l_config(
+    configs, meta = await l_config(
         config_definition_key,
         page,
         limit,
@@ -200,12 +367,18 @@ def list_configs(
         sort_order,
         search,
         request,
+        cursor,
+        count,
+        raw=True,
     )
 
-    return {
-        "message": "Configurations listed successfully.",
-        "data": {
-            "results": configs,
-            "meta": {"page": page, "limit": limit, "total": count},
-        },
-    }
+    return RawJSONResponse(
+        content={
+            "status": Status.success,
+            "message": "Configurations listed successfully.",
+            "data": {
+                "results": configs,
+                "meta": {"page": page, "limit": limit, **meta},
+            },
+        }
+    )
@@ -6,7 +6,9 @@
 
 """
 
-from fastapi import APIRouter, status
+from typing import Optional
+from fastapi import APIRouter, Header, Request, status
+from fastapi.responses import StreamingResponse
 
 from app.utils.config_definitions.utils import (
     c_config_definition,
@@ -15,6 +17,12 @@ from app.utils.config_definitions.utils import (
     d_config_definition,
     l_config_definition,
 )
+from app.utils.configs.utils import e_config
+from app.utils.changes.utils import w_config, w_config_stream
+from app.utils.changes.validations import validate_last_event_id
+from app.utils.etags.utils import match_etag, not_modified, parse_etags, quote_etag
+from app.utils.responses.utils import FastJSONResponse, r_util_shape
+from app.utils.settings.config import settings
 
 from app.models.config_definition import (
     ConfigDefinition,
@@ -25,6 +33,7 @@ from app.models.config_definition import (
     DeleteConfigDefinitionResponse,
     ListConfigDefinitionResponse,
 )
+from app.models.change import WatchConfigResponse
 
 router = APIRouter()
 
@@ -35,7 +44,7 @@ router = APIRouter()
     response_model=CreateConfigDefinitionResponse,
     response_model_exclude_none=True,
 )
-def create_config_definition(config_definition: ConfigDefinition):
+async def create_config_definition(config_definition: ConfigDefinition):
     """
     Create a new configuration definition.
 
@@ -47,7 +56,7 @@ def create_config_definition(config_definition: ConfigDefinition):
     CreateConfigDefinitionResponse
         The response for the create configuration definition request.
     """
-    c_config_definition(
+    await c_config_definition(
         config_definition.config_definition_key,
         config_definition.json_schema,
         config_definition.indexes,
@@ -64,25 +73,139 @@ def create_config_definition(config_definition: ConfigDefinition):
     status_code=status.HTTP_200_OK,
     response_model=ReadConfigDefinitionResponse,
     response_model_exclude_none=True,
+    responses={
+        304: {"description": "The configuration definition has not been modified."}
+    },
 )
-def get_config_definition(config_definition_key: str):
+async def get_config_definition(
+    config_definition_key: str,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Get a configuration definition.
 
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
+    if_none_match: str, optional
+        The entity tags the client already has. A match returns an empty
+        `304 Not Modified`.
 
     -- Returns
     ReadConfigDefinitionResponse
         The response for the get configuration definition request.
     """
-    config_definition = r_config_definition(config_definition_key)
+    config_definition = await r_config_definition(config_definition_key)
 
-    return {
-        "message": "Configuration definition retrieved successfully.",
-        "data": config_definition,
-    }
+    etag = config_definition["etag"]
+    if match_etag(etag, parse_etags(if_none_match)):
+        return not_modified(etag)
+
+    return FastJSONResponse(
+        r_util_shape(
+            ReadConfigDefinitionResponse,
+            {
+                "message": "Configuration definition retrieved successfully.",
+                "data": config_definition,
+            },
+            exclude_none=True,
+        ),
+        headers={"ETag": quote_etag(etag)},
+    )
+
+
+@router.get(
+    "/{config_definition_key}/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}}}},
+)
+async def export_config_definition(config_definition_key: str):
+    """
+    Export every configuration of a configuration definition.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+
+    -- Returns
+    StreamingResponse
+        The configurations as NDJSON, one per line, ordered by key.
+    """
+    configs = await e_config(config_definition_key)
+
+    return StreamingResponse(configs, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{config_definition_key}/watch",
+    status_code=status.HTTP_200_OK,
+    response_model=WatchConfigResponse,
+    response_model_exclude_none=True,
+    responses={
+        200: {"content": {"text/event-stream": {}}},
+        410: {"description": "The changes after `since` have been pruned."},
+    },
+)
+async def watch_config_definition(
+    request: Request,
+    config_definition_key: str,
+    config_key: Optional[str] = None,
+    since: Optional[int] = None,
+    timeout: float = settings.WATCH_TIMEOUT,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Watch the changes of a configuration definition, or of one of its
+    configurations.
+
+    Requests accepting `text/event-stream` get a stream of Server-Sent Events,
+    resumed from `Last-Event-ID` on reconnect. Others are long-polled: they
+    return as soon as there are changes, or empty after `timeout` seconds.
+
+    -- Parameters
+    request: Request
+        The request object.
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow.
+    since: int, optional
+        The sequence number of the last change already seen. Without it, only
+        changes made from now on are returned.
+    timeout: float, optional
+        How long a long-poll waits for a change, in seconds.
+    last_event_id: str, optional
+        The ID of the last event received, sent by reconnecting event streams.
+
+    -- Returns
+    WatchConfigResponse
+        The response for the watch configurations request.
+    """
+    if "text/event-stream" in request.headers.get("accept", ""):
+        if last_event_id is not None:
+            since = validate_last_event_id(last_event_id)
+
+        events = await w_config_stream(config_definition_key, config_key, since)
+
+        return StreamingResponse(
+            events,
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    changes = await w_config(config_definition_key, config_key, since, timeout)
+
+    return FastJSONResponse(
+        r_util_shape(
+            WatchConfigResponse,
+            {
+                "message": "Configuration changes retrieved successfully.",
+                "data": changes,
+            },
+            exclude_none=True,
+        )
+    )
 
 
 @router.put(
@@ -91,7 +214,7 @@ def get_config_definition(config_definition_key: str):
     response_model=UpdateConfigDefinitionResponse,
     response_model_exclude_none=True,
 )
-def update_config_definition(
+async def update_config_definition(
     config_definition_key: str, config_definition: ConfigDefinitionEditable
 ):
     """
@@ -107,7 +230,7 @@ def update_config_definition(
     UpdateConfigDefinitionResponse
         The response for the update configuration definition request.
     """
-    u_config_definition(config_definition_key, config_definition.indexes)
+    await u_config_definition(config_definition_key, config_definition.indexes)
 
     return {
         "message": "Configuration definition updated successfully.",
@@ -121,7 +244,7 @@ def update_config_definition(
     response_model=DeleteConfigDefinitionResponse,
     response_model_exclude_none=True,
 )
-def delete_config_definition(config_definition_key: str):
+async def delete_config_definition(config_definition_key: str):
     """
     Delete a configuration definition.
 
@@ -133,7 +256,7 @@ def delete_config_definition(config_definition_key: str):
     DeleteConfigDefinitionResponse
         The response for the delete configuration definition request.
     """
-    d_config_definition(config_definition_key)
+    await d_config_definition(config_definition_key)
 
     return {
         "message": "Configuration definition deleted successfully.",
@@ -147,12 +270,13 @@ def delete_config_definition(config_definition_key: str):
     response_model=ListConfigDefinitionResponse,
     response_model_exclude_none=True,
 )
-def list_config_definition(
+async def list_config_definition(
     page: int = 1,
     limit: int = 10,
     sort_by: str = "modified_at",
     sort_order: str = "desc",
     search: str = None,
+    count: str = "exact",
 ):
     """
     List all configuration definitions.
@@ -168,19 +292,27 @@ def list_config_definition(
         The order to sort by.
     search: str
         The search term.
+    count: str
+        How the total is counted: "exact", "estimated" or "none".
 
     -- Returns
     ListConfigDefinitionResponse
         The response for the list configuration definition request.
     """
-    config_definitions, count = l_config_definition(
-        page, limit, sort_by, sort_order, search
+    config_definitions, meta = await l_config_definition(
+        page, limit, sort_by, sort_order, search, count
     )
 
-    return {
-        "message": "Configuration definitions listed successfully.",
-        "data": {
-            "results": config_definitions,
-            "meta": {"page": page, "limit": limit, "total": count},
-        },
-    }
+    return FastJSONResponse(
+        r_util_shape(
+            ListConfigDefinitionResponse,
+            {
+                "message": "Configuration definitions listed successfully.",
+                "data": {
+                    "results": config_definitions,
+                    "meta": {"page": page, "limit": limit, **meta},
+                },
+            },
+            exclude_none=True,
+        )
+    )
@@ -0,0 +1,63 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
+from datetime import datetime
+
+from app.models.common import ReadResponse
+
+
+class ConfigChange(BaseModel):
+    """
+    Represents a change to a configuration.
+    """
+
+    seq: int = Field(..., description="The position of the change in the change log.")
+    config_definition_key: Optional[str] = Field(
+        None, description="The unique identifier for the config definition."
+    )
+    config_key: Optional[str] = Field(
+        None,
+        description="The unique identifier for the config, unless the whole "
+        "definition was dropped.",
+    )
+    operation: str = Field(
+        ..., description="What changed: 'create', 'update', 'delete' or 'drop'."
+    )
+    data: Optional[Dict[str, Any]] = Field(
+        None, description="The data of the configuration after the change."
+    )
+    changed_at: datetime = Field(..., description="The time the change was made.")
+
+
+class WatchResult(BaseModel):
+    """
+    Represents the changes returned by a watch.
+    """
+
+    changes: List[ConfigChange] = Field(..., description="The changes, in order.")
+    last_seq: int = Field(
+        ..., description="The sequence number to pass as `since` to resume."
+    )
+
+
+class WatchConfigResponse(ReadResponse[WatchResult]):
+    """
+    Represents the response for watching configurations.
+    """
+
+    pass
+
+
+class ListChangesResponse(ReadResponse[WatchResult]):
+    """
+    Represents the response for listing the changes of every configuration.
+    """
+
+    pass
@@ -29,7 +29,16 @@ class MetaData(BaseModel):
 
     page: int = Field(..., description="The current page number.")
     limit: int = Field(..., description="The limit for the number of items to return.")
-    total: int = Field(..., description="The total number of items.")
+    total: Optional[int] = Field(
+        None, description="The total number of items, unless not counted."
+    )
+    count: Optional[str] = Field(
+        None,
+        description="How the total was counted: 'exact', 'estimated' or 'none'.",
+    )
+    next_cursor: Optional[str] = Field(
+        None, description="The cursor for the next page, if there is one."
+    )
 
 
 class ListData(BaseModel, Generic[T]):
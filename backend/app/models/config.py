@@ -7,7 +7,7 @@
 """
 
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 from app.models.common import (
@@ -74,6 +74,10 @@ class ConfigRetrievable(Config):
     Represents the configuration with the key.
     """
 
+    version: int = Field(
+        ...,
+        description="The version of the configuration, incremented on every update.",
+    )
     created_at: datetime = Field(
         ..., description="The time the configuration was created."
     )
@@ -82,6 +86,33 @@ class ConfigRetrievable(Config):
     )
 
 
+class BulkConfigError(BaseModel):
+    """
+    Represents a configuration rejected by a bulk write.
+    """
+
+    index: int = Field(..., description="The position of the item in the request.")
+    config_key: Optional[str] = Field(
+        None, description="The unique identifier for the config, if given."
+    )
+    msg: str = Field(..., description="Why the configuration was rejected.")
+
+
+class BulkConfigResult(BaseModel):
+    """
+    Represents the outcome of a bulk write.
+    """
+
+    created: int = Field(..., description="The number of configurations created.")
+    updated: int = Field(..., description="The number of configurations updated.")
+    skipped: int = Field(
+        ..., description="The number of existing configurations left untouched."
+    )
+    errors: List[BulkConfigError] = Field(
+        ..., description="The configurations that were rejected."
+    )
+
+
 class CreateConfigResponse(CreateResponse[Dict[str, Any]]):
     """
     Represents the response for creating a configuration.
@@ -90,6 +121,14 @@ class CreateConfigResponse(CreateResponse[Dict[str, Any]]):
     pass
 
 
+class BulkConfigResponse(CreateResponse[BulkConfigResult]):
+    """
+    Represents the response for writing configurations in bulk.
+    """
+
+    pass
+
+
 class ReadConfigResponse(ReadResponse[ConfigRetrievable]):
     """
     Represents the response for getting a configuration.
@@ -26,7 +26,8 @@ class ConfigDefinitionEditable(BaseModel):
 
     indexes: List[str] = Field(
         default_factory=list,
-        description="List of field names to be indexed. Each must exist in the schema properties.",
+        description="List of field names to be indexed, optionally suffixed with "
+        "':btree' (default), ':hash' or ':gin'. Each must exist in the schema properties.",
     )
 
     model_config = ConfigDict(
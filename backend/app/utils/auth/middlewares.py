@@ -12,13 +12,14 @@ from fastapi import Security, HTTPException, status
 
 from app.utils.settings.config import settings
 from app.utils.exceptions.errors import unauthorized_error
+from app.utils.timing.utils import measure
 
 from fastapi.security import APIKeyHeader
 
 request_api_key = APIKeyHeader(name="Authorization", scheme_name="Bearer")
 
 
-def check_api_key(api_key=Security(request_api_key)):
+async def check_api_key(api_key=Security(request_api_key)):
     """
     Check if the API key is valid
 
@@ -31,6 +32,7 @@ def check_api_key(api_key=Security(request_api_key)):
         If the API key is incorrect
     """
 
-    correct_api_key = secrets.compare_digest(api_key, settings.API_KEY)
-    if not correct_api_key:
-        raise unauthorized_error()
+    with measure("auth"):
+        correct_api_key = secrets.compare_digest(api_key, settings.API_KEY)
+        if not correct_api_key:
+            raise unauthorized_error()
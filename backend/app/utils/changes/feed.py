@@ -0,0 +1,61 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import asyncio
+from typing import Optional
+
+from app.utils.settings.config import settings
+from app.utils.data.data_source import data_store
+
+
+class ChangeFeed:
+    """
+    Process-local wake-up signals for watchers of configuration definitions.
+
+    Watchers read the change log themselves; the feed only tells them when a
+    definition may have new changes, so none of them has to poll.
+    """
+
+    def __init__(self):
+        self._events = {}
+
+    def waiter(self, config_definition_key: str) -> asyncio.Event:
+        """
+        Return the event set on the next change of a configuration definition.
+
+        Take the event before reading the change log, so a change committed
+        while reading is not missed.
+
+        -- Parameters
+        config_definition_key: str
+            The key for the configuration definition.
+        """
+        return self._events.setdefault(config_definition_key, asyncio.Event())
+
+    def wake(self, config_definition_key: Optional[str] = None) -> None:
+        """
+        Wake up the watchers of a configuration definition, or every watcher
+        when none is given.
+
+        -- Parameters
+        config_definition_key: str, optional
+            The key for the configuration definition. Defaults to None.
+        """
+        if config_definition_key is None:
+            events, self._events = list(self._events.values()), {}
+        else:
+            event = self._events.pop(config_definition_key, None)
+            events = [event] if event else []
+
+        for event in events:
+            event.set()
+
+
+change_feed = ChangeFeed()
+
+data_store.subscribe(settings.CHANGE_CHANNEL, change_feed.wake)
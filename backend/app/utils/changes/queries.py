@@ -0,0 +1,235 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from typing import Optional
+
+from app.utils.settings.config import settings
+
+CHANGE_SEQ_BITS = 20
+
+CHANGE_SEQ = f"(pg_current_xact_id()::TEXT::BIGINT << {CHANGE_SEQ_BITS})"
+CHANGE_WATERMARK = (
+    f"(pg_snapshot_xmin(pg_current_snapshot())::TEXT::BIGINT << {CHANGE_SEQ_BITS})"
+)
+
+
+def w_change_query(
+    config_definition_key: str,
+    write_query: str,
+    operation: str,
+    returning: str = "config_key",
+) -> tuple:
+    """
+    Wraps a write to a configuration table so that every configuration it
+    writes is appended to the change log in the same statement.
+
+    Sequence numbers are the ID of the writing transaction, shifted left by
+    `CHANGE_SEQ_BITS`, plus the position of the change in the write. No lock
+    is shared between writers. Readers stop at the oldest transaction still
+    in progress, so a change that commits late is never skipped. A write
+    logs fewer than `2 ** CHANGE_SEQ_BITS` changes.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    write_query: str
+        The write, returning the `config_key` and `data` of every configuration
+        it writes, without a trailing semicolon.
+    operation: str
+        The SQL expression for the operation of each change, over `written`.
+    returning: str, optional
+        The columns of `written` returned by the query. Defaults to "config_key".
+
+    -- Returns
+    tuple
+        The SQL query, and the parameters to append after those of the write.
+    """
+
+    query = f"""
+    WITH written AS ({write_query}
+    ),
+    logged AS (
+        INSERT INTO {settings.CHANGE_LOG_TABLE}
+        (seq, config_definition_key, config_key, operation, data)
+        SELECT
+        {CHANGE_SEQ} + ROW_NUMBER() OVER (ORDER BY written.config_key),
+        %s,
+        written.config_key,
+        {operation},
+        written.data
+        FROM written
+        RETURNING pg_notify(%s, config_definition_key)
+    )
+    SELECT {returning} FROM written;
+    """
+
+    return query, (config_definition_key, settings.CHANGE_CHANNEL)
+
+
+def l_change_query(
+    config_definition_key: str,
+    since: int,
+    config_key: Optional[str] = None,
+    limit: int = 100,
+) -> tuple:
+    """
+    Retrieve the changes of a configuration definition after a sequence number.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    since: int
+        The sequence number of the last change already seen.
+    config_key: str, optional
+        The key for a single configuration to follow, along with the drop of
+        the definition. Defaults to None.
+    limit: int, optional
+        The maximum number of changes to return. Defaults to 100.
+
+    -- Returns
+    tuple
+        The SQL query to retrieve the changes in sequence order, and its
+        parameters.
+    """
+
+    clause_query = "WHERE config_definition_key = %s"
+    clause_params = [config_definition_key]
+
+    if config_key:
+        clause_query += " AND (config_key = %s OR config_key IS NULL)"
+        clause_params.append(config_key)
+
+    query = f"""
+    SELECT
+    seq,
+    config_key,
+    operation,
+    data,
+    changed_at
+
+    FROM {settings.CHANGE_LOG_TABLE}
+    {clause_query} AND seq > %s AND seq < {CHANGE_WATERMARK}
+    ORDER BY seq
+    LIMIT %s;
+    """
+
+    return query, (*clause_params, since, limit)
+
+
+def l_changes_query(since: int, limit: int) -> tuple:
+    """
+    Retrieve the changes of every configuration definition after a sequence
+    number.
+
+    -- Parameters
+    since: int
+        The sequence number of the last change already seen.
+    limit: int
+        The maximum number of changes to return.
+
+    -- Returns
+    tuple
+        The SQL query to retrieve the changes in sequence order, and its
+        parameters.
+    """
+
+    query = f"""
+    SELECT
+    seq,
+    config_definition_key,
+    config_key,
+    operation,
+    data,
+    changed_at
+
+    FROM {settings.CHANGE_LOG_TABLE}
+    WHERE seq > %s AND seq < {CHANGE_WATERMARK}
+    ORDER BY seq
+    LIMIT %s;
+    """
+
+    return query, (since, limit)
+
+
+def r_change_seq_query() -> tuple:
+    """
+    Retrieve the sequence number every readable change is at or before. Any
+    change committed later has a greater sequence number.
+
+    -- Returns
+    tuple
+        The SQL query to retrieve the sequence number, and its parameters.
+    """
+
+    query = f"""
+    SELECT {CHANGE_WATERMARK} - 1 AS seq;
+    """
+
+    return query, ()
+
+
+def r_change_horizon_query() -> tuple:
+    """
+    Retrieve the sequence number of the latest pruned change.
+
+    -- Returns
+    tuple
+        The SQL query to retrieve the sequence number, and its parameters.
+    """
+
+    query = f"""
+    SELECT seq FROM {settings.CHANGE_LOG_TABLE}_horizon;
+    """
+
+    return query, ()
+
+
+def d_change_query(retention: float, limit: int) -> tuple:
+    """
+    Prune the oldest changes past their retention, in one replica at a time.
+
+    The sequence number of the latest pruned change is recorded as the horizon
+    in the same statement, so a reader resuming before it can be told that
+    changes are missing.
+
+    -- Parameters
+    retention: float
+        How long changes are kept, in seconds.
+    limit: int
+        The most changes pruned by the query.
+
+    -- Returns
+    tuple
+        The SQL query to prune the changes, returning how many it pruned, and
+        its parameters.
+    """
+
+    query = f"""
+    WITH lock AS (
+        SELECT pg_try_advisory_xact_lock(hashtext(%s)) AS locked
+    ),
+    pruned AS (
+        DELETE FROM {settings.CHANGE_LOG_TABLE}
+        WHERE seq IN (
+            SELECT seq FROM {settings.CHANGE_LOG_TABLE}
+            WHERE changed_at < LOCALTIMESTAMP - make_interval(secs => %s)
+            AND (SELECT locked FROM lock)
+            ORDER BY changed_at
+            LIMIT %s
+        )
+        RETURNING seq
+    ),
+    horizon AS (
+        UPDATE {settings.CHANGE_LOG_TABLE}_horizon
+        SET seq = GREATEST(seq, (SELECT MAX(seq) FROM pruned))
+        WHERE EXISTS (SELECT 1 FROM pruned)
+    )
+    SELECT COUNT(*) AS pruned FROM pruned;
+    """
+
+    return query, (settings.CHANGE_LOG_TABLE, retention, limit)
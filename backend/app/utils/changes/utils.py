@@ -0,0 +1,317 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import json
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from app.utils.changes.queries import (
+    d_change_query,
+    l_change_query,
+    l_changes_query,
+    r_change_seq_query,
+)
+from app.utils.changes.validations import (
+    validate_changes_list,
+    validate_since_retained,
+    validate_watch,
+)
+from app.utils.changes.feed import change_feed
+from app.utils.configs.utils import e_util_default
+from app.utils.data.data_source import data_store
+from app.utils.settings.config import settings
+
+logger = logging.getLogger("api-logger")
+
+PRUNE_BATCH_SIZE = 10000
+
+pruner: Optional[asyncio.Task] = None
+
+
+async def r_change_seq() -> int:
+    """
+    Retrieve the sequence number of the latest change.
+
+    -- Returns
+    int
+        The sequence number, or 0 if nothing has changed yet.
+    """
+    query, params = r_change_seq_query()
+    result = (
+        await data_store.execute_query(
+            query, params, mode="retrieve", kind="r_change_seq"
+        )
+    )["response"]
+
+    return result[0]["seq"] if result else 0
+
+
+async def l_changes(since: int = 0, limit: int = 100) -> dict:
+    """
+    List the changes of every configuration after a sequence number, for
+    consumers syncing incrementally.
+
+    -- Parameters
+    since: int, optional
+        The sequence number of the last change already seen. Defaults to 0.
+    limit: int, optional
+        The maximum number of changes to return. Defaults to 100.
+
+    -- Returns
+    dict
+        The changes in sequence order, and the sequence number to resume from.
+    """
+    validate_changes_list(since, limit)
+    await validate_since_retained(since)
+
+    query, params = l_changes_query(since, limit)
+    changes = (
+        await data_store.execute_query(query, params, mode="retrieve", kind="l_changes")
+    )["response"]
+
+    return {
+        "changes": changes,
+        "last_seq": changes[-1]["seq"] if changes else since,
+    }
+
+
+async def w_util_wait(
+    config_definition_key: str,
+    config_key: Optional[str],
+    since: int,
+    timeout: float,
+) -> list:
+    """
+    Waits until a configuration definition has changes after a sequence number.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow.
+    since: int
+        The sequence number of the last change already seen.
+    timeout: float
+        How long to wait for a change, in seconds.
+
+    -- Returns
+    list
+        The changes in sequence order, or an empty list on timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    while True:
+        event = change_feed.waiter(config_definition_key)
+
+        query, params = l_change_query(config_definition_key, since, config_key)
+        changes = (
+            await data_store.execute_query(
+                query, params, mode="retrieve", kind="w_config"
+            )
+        )["response"]
+
+        remaining = deadline - loop.time()
+        if changes or remaining <= 0:
+            return changes
+
+        try:
+            await asyncio.wait_for(event.wait(), remaining)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def w_config(
+    config_definition_key: str,
+    config_key: Optional[str] = None,
+    since: Optional[int] = None,
+    timeout: float = settings.WATCH_TIMEOUT,
+) -> dict:
+    """
+    Long-polls the changes of a configuration definition, or of one of its
+    configurations.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow. Defaults to None.
+    since: int, optional
+        The sequence number of the last change already seen. Defaults to None,
+        which only waits for changes made from now on.
+    timeout: float, optional
+        How long to wait for a change, in seconds. Defaults to `WATCH_TIMEOUT`.
+
+    -- Returns
+    dict
+        The changes, and the sequence number to resume from.
+    """
+    await validate_watch(config_definition_key, config_key, since, timeout)
+
+    if since is None:
+        since = await r_change_seq()
+    else:
+        await validate_since_retained(since)
+
+    changes = await w_util_wait(config_definition_key, config_key, since, timeout)
+
+    return {
+        "changes": changes,
+        "last_seq": changes[-1]["seq"] if changes else since,
+    }
+
+
+async def w_config_stream(
+    config_definition_key: str,
+    config_key: Optional[str] = None,
+    since: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams the changes of a configuration definition, or of one of its
+    configurations, as Server-Sent Events.
+
+    The watch is validated up front, so errors are raised before the response
+    starts.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow. Defaults to None.
+    since: int, optional
+        The sequence number of the last change already seen. Defaults to None,
+        which only streams changes made from now on.
+
+    -- Returns
+    AsyncIterator[bytes]
+        The event stream.
+    """
+    await validate_watch(config_definition_key, config_key, since, 0)
+
+    if since is None:
+        since = await r_change_seq()
+    else:
+        await validate_since_retained(since)
+
+    return w_util_sse(config_definition_key, config_key, since)
+
+
+async def w_util_sse(
+    config_definition_key: str, config_key: Optional[str], since: int
+) -> AsyncIterator[bytes]:
+    """
+    Encodes the changes of a configuration definition as Server-Sent Events,
+    with a keep-alive comment whenever it stays idle for `WATCH_HEARTBEAT`.
+
+    The event ID is the sequence number, so a client reconnecting with
+    `Last-Event-ID` resumes exactly where it left off. An ID-only event is sent
+    first, so this holds even before the first change. The stream ends after
+    the drop of the definition, which has nothing left to watch.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow.
+    since: int
+        The sequence number of the last change already seen.
+
+    -- Returns
+    AsyncIterator[bytes]
+        The encoded events.
+    """
+    yield f"id: {since}\n\n".encode()
+
+    while True:
+        changes = await w_util_wait(
+            config_definition_key, config_key, since, settings.WATCH_HEARTBEAT
+        )
+        if not changes:
+            yield b": keep-alive\n\n"
+            continue
+
+        events = []
+        for change in changes:
+            data = json.dumps(change, default=e_util_default)
+            events.append(f"id: {change['seq']}\nevent: {change['operation']}\n")
+            events.append(f"data: {data}\n\n")
+            since = change["seq"]
+
+            if change["operation"] == "drop":
+                break
+
+        yield "".join(events).encode()
+
+        if change["operation"] == "drop":
+            return
+
+
+async def d_changes() -> int:
+    """
+    Prune the changes older than `CHANGE_LOG_RETENTION`, in batches.
+
+    -- Returns
+    int
+        The number of changes pruned.
+    """
+    query, params = d_change_query(settings.CHANGE_LOG_RETENTION, PRUNE_BATCH_SIZE)
+
+    total = 0
+    while True:
+        result = (
+            await data_store.execute_query(
+                query, params, mode="retrieve", kind="d_changes"
+            )
+        )["response"]
+        total += result[0]["pruned"]
+        if result[0]["pruned"] < PRUNE_BATCH_SIZE:
+            return total
+
+
+async def d_util_prune() -> None:
+    """
+    Prunes the change log every `CHANGE_LOG_PRUNE_INTERVAL`, until cancelled.
+    """
+    while True:
+        try:
+            pruned = await d_changes()
+            if pruned:
+                logger.info(f"Pruned {pruned} changes from the change log.")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Change log pruning failed: {e}")
+
+        await asyncio.sleep(settings.CHANGE_LOG_PRUNE_INTERVAL)
+
+
+def start_pruning() -> None:
+    """
+    Start pruning the change log in the background, if changes are retained
+    for a limited time.
+    """
+    global pruner
+
+    if settings.CHANGE_LOG_RETENTION and pruner is None:
+        pruner = asyncio.create_task(d_util_prune())
+
+
+async def stop_pruning() -> None:
+    """
+    Stop pruning the change log.
+    """
+    global pruner
+
+    if pruner is not None:
+        pruner.cancel()
+        try:
+            await pruner
+        except asyncio.CancelledError:
+            pass
+        pruner = None
@@ -0,0 +1,140 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import re
+from typing import Optional
+
+from app.utils.changes.queries import r_change_horizon_query
+from app.utils.config_definitions.validations import validate_config_definition_key
+from app.utils.config_definitions.utils import r_config_definition
+from app.utils.configs.validations import validate_config_key
+from app.utils.data.data_source import data_store
+from app.utils.exceptions.errors import gone_error, validation_error
+from app.utils.settings.config import settings
+
+
+def validate_since(since: Optional[int]) -> None:
+    """
+    Validates the sequence number changes are read after.
+
+    -- Parameters
+    since: int, optional
+        The sequence number of the last change already seen.
+    """
+    if since is not None and since < 0:
+        raise validation_error(
+            field="since", extra_info="Since must be a non-negative integer."
+        )
+
+    return None
+
+
+async def validate_since_retained(since: int) -> None:
+    """
+    Validates that no change after a sequence number has been pruned.
+
+    -- Parameters
+    since: int
+        The sequence number of the last change already seen, or 0 to read the
+        log from the oldest change it still holds.
+
+    -- Raises
+    APIError
+        If changes after `since` have been pruned, so the consumer must resync.
+    """
+    if not since:
+        return None
+
+    query, params = r_change_horizon_query()
+    result = (
+        await data_store.execute_query(
+            query, params, mode="retrieve", kind="r_change_horizon"
+        )
+    )["response"]
+
+    if result and since < result[0]["seq"]:
+        raise gone_error("changes", since)
+
+    return None
+
+
+def validate_changes_list(since: int, limit: int) -> None:
+    """
+    Validates the parameters for listing the changes of every configuration.
+
+    -- Parameters
+    since: int
+        The sequence number of the last change already seen.
+    limit: int
+        The maximum number of changes to return.
+    """
+    validate_since(since)
+
+    if not 1 <= limit <= 1000:
+        raise validation_error(
+            field="limit", extra_info="Limit must be between 1 and 1000."
+        )
+
+    return None
+
+
+def validate_last_event_id(last_event_id: str) -> int:
+    """
+    Validates the ID of the last event a reconnecting event stream received.
+
+    -- Parameters
+    last_event_id: str
+        The value of the `Last-Event-ID` header.
+
+    -- Returns
+    int
+        The sequence number to resume after.
+    """
+    if not re.fullmatch(r"[0-9]+", last_event_id):
+        raise validation_error(
+            field="since", extra_info="Last-Event-ID must be a non-negative integer."
+        )
+
+    return int(last_event_id)
+
+
+async def validate_watch(
+    config_definition_key: str,
+    config_key: Optional[str],
+    since: Optional[int],
+    timeout: float,
+) -> None:
+    """
+    Validates a watch on the changes of a configuration definition.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str, optional
+        The key for a single configuration to follow.
+    since: int, optional
+        The sequence number of the last change already seen.
+    timeout: float
+        How long to wait for a change, in seconds.
+    """
+    validate_config_definition_key(config_definition_key)
+
+    if config_key is not None:
+        validate_config_key(config_key)
+
+    validate_since(since)
+
+    if not 0 <= timeout <= settings.WATCH_TIMEOUT:
+        raise validation_error(
+            field="timeout",
+            extra_info=f"Timeout must be between 0 and {settings.WATCH_TIMEOUT:g} seconds.",
+        )
+
+    await r_config_definition(config_definition_key)
+
+    return None
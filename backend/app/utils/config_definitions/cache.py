@@ -0,0 +1,392 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import json
+import time
+import hashlib
+import logging
+import jsonschema
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.utils.settings.config import settings
+from app.utils.data.data_source import data_store
+from app.utils.metrics.utils import (
+    DEFINITION_CACHE_HITS,
+    DEFINITION_CACHE_MISSES,
+    VALIDATION_DURATION,
+    VALIDATOR_CACHE_HITS,
+    VALIDATOR_CACHE_MISSES,
+)
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+logger = logging.getLogger("api-logger")
+
+
+class DefinitionCache:
+    """
+    Process-local, size-bounded LRU cache of configuration definitions with a TTL.
+
+    -- Parameters
+    ttl: float
+        Seconds an entry is served before it has to be read again.
+    max_size: int
+        The maximum number of entries; the least recently used is evicted first.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+
+        -- Parameters
+        key: str
+            The key for the configuration definition.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            DEFINITION_CACHE_MISSES.inc()
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            DEFINITION_CACHE_MISSES.inc()
+            return None
+
+        self._entries.move_to_end(key)
+        DEFINITION_CACHE_HITS.inc()
+        return value
+
+    def set(self, key: str, value: Any, generation: int) -> None:
+        """
+        Cache a value read from the database.
+
+        -- Parameters
+        key: str
+            The key for the configuration definition.
+        value: Any
+            The configuration definition.
+        generation: int
+            The cache generation observed before the value was read. The value
+            is dropped if an invalidation happened in the meantime.
+        """
+        if self.ttl <= 0 or self.max_size <= 0 or generation != self.generation:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Drop a key from the cache, or every key when none is given.
+
+        -- Parameters
+        key: str, optional
+            The key for the configuration definition. Defaults to None.
+        """
+        self.generation += 1
+
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+PATCH_KEYWORDS = {
+    "$schema",
+    "$id",
+    "$comment",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "type",
+    "properties",
+    "required",
+    "additionalProperties",
+}
+
+
+class SchemaValidator:
+    """
+    A JSON Schema compiled once and reused for every config of a definition.
+
+    -- Parameters
+    json_schema: Dict[str, Any]
+        The JSON Schema of the configuration definition.
+    fast_threshold: int
+        The number of validations after which a code-generated validator is
+        built, or 0 to never build one.
+    """
+
+    def __init__(self, json_schema: Dict[str, Any], fast_threshold: int = 0):
+        cls = jsonschema.validators.validator_for(json_schema)
+        cls.check_schema(json_schema)
+
+        self.json_schema = json_schema
+        self.fast_threshold = fast_threshold if fastjsonschema else 0
+        self._validator = cls(json_schema)
+        self._fast_validator = None
+        self._calls = 0
+
+        encoded = json.dumps(json_schema)
+        self._patchable = not any(
+            ref in encoded for ref in ('"$ref"', '"$dynamicRef"', '"$recursiveRef"')
+        )
+        self._subvalidators = {}
+
+    def _compile_fast(self) -> None:
+        """
+        Build the code-generated validator, giving up for good if the schema is
+        not supported by it.
+        """
+        try:
+            self._fast_validator = fastjsonschema.compile(
+                self.json_schema, use_default=False, use_formats=False
+            )
+        except Exception as e:
+            logger.warning(f"Fast schema validator unavailable: {e}")
+            self.fast_threshold = 0
+
+    def validate(self, data: Dict[str, Any]) -> None:
+        """
+        Validate data against the schema, like `jsonschema.validate`.
+
+        Valid data is accepted by the code-generated validator when there is
+        one; anything it rejects is re-validated by jsonschema, which stays the
+        source of truth for errors.
+
+        -- Parameters
+        data: Dict[str, Any]
+            The data to validate.
+
+        -- Raises
+        jsonschema.ValidationError
+            If the data does not match the schema.
+        """
+        with VALIDATION_DURATION.time():
+            self._validate(data)
+
+    def _validate(self, data: Dict[str, Any]) -> None:
+        """
+        Validate data with the code-generated validator first, if any.
+        """
+        if self._fast_validator is None and self.fast_threshold:
+            self._calls += 1
+            if self._calls >= self.fast_threshold:
+                self._compile_fast()
+
+        if self._fast_validator is not None:
+            try:
+                self._fast_validator(data)
+                return
+            except fastjsonschema.JsonSchemaException:
+                pass
+
+        error = jsonschema.exceptions.best_match(self._validator.iter_errors(data))
+        if error is not None:
+            raise error
+
+    def validate_patch(self, patch: Dict[str, Any]) -> bool:
+        """
+        Validate a JSON Merge Patch against only the parts of the schema it
+        touches, without the document it applies to.
+
+        This is possible when every object the patch reaches is described by
+        `properties`, `additionalProperties` and `required` alone: a removed
+        key must not be required, and a replaced value is validated against
+        its own subschema.
+
+        -- Parameters
+        patch: Dict[str, Any]
+            The merge patch.
+
+        -- Returns
+        bool
+            True if the patch was validated, False if the schema needs the
+            whole patched document instead.
+
+        -- Raises
+        jsonschema.ValidationError
+            If the patched document would not match the schema.
+        """
+        if not self._patchable:
+            return False
+
+        return self._validate_patch(self.json_schema, patch, ())
+
+    def _validate_patch(self, schema: Any, patch: Dict[str, Any], path: tuple) -> bool:
+        """
+        Validate a merge patch against the subschema of the object it merges
+        into.
+        """
+        if schema is True:
+            return True
+        if not isinstance(schema, dict) or schema.keys() - PATCH_KEYWORDS:
+            return False
+        if schema.get("type", "object") != "object":
+            return False
+
+        properties = schema.get("properties", {})
+        required = schema.get("required", [])
+
+        for key, value in patch.items():
+            subschema = properties.get(key, schema.get("additionalProperties", True))
+
+            if value is None:
+                if key in required:
+                    raise jsonschema.ValidationError(f"'{key}' is a required property")
+                continue
+
+            if subschema is False:
+                raise jsonschema.ValidationError(
+                    f"Additional properties are not allowed ('{key}' was unexpected)"
+                )
+
+            if isinstance(value, dict):
+                sub_required = (
+                    subschema.get("required", []) if isinstance(subschema, dict) else []
+                )
+                if any(value.get(name) is None for name in sub_required):
+                    return False
+                if not self._validate_patch(subschema, value, (*path, key)):
+                    return False
+                continue
+
+            validator = self._subvalidators.get((*path, key))
+            if validator is None:
+                validator = self._validator.evolve(schema=subschema)
+                self._subvalidators[(*path, key)] = validator
+
+            error = jsonschema.exceptions.best_match(validator.iter_errors(value))
+            if error is not None:
+                raise error
+
+        return True
+
+
+class SchemaValidatorCache:
+    """
+    Size-bounded LRU cache of compiled schema validators, keyed by configuration
+    definition and schema hash.
+
+    -- Parameters
+    max_size: int
+        The maximum number of compiled validators kept.
+    fast_threshold: int
+        Passed to every `SchemaValidator`.
+    """
+
+    def __init__(self, max_size: int, fast_threshold: int = 0):
+        self.max_size = max_size
+        self.fast_threshold = fast_threshold
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _hash(json_schema: Dict[str, Any]) -> str:
+        """
+        Hash a JSON Schema independently of its key order.
+        """
+        encoded = json.dumps(json_schema, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    def get(self, key: str, json_schema: Dict[str, Any]) -> SchemaValidator:
+        """
+        Return the compiled validator for a definition's schema, compiling it
+        on first use or when the schema changed.
+
+        -- Parameters
+        key: str
+            The key for the configuration definition.
+        json_schema: Dict[str, Any]
+            The JSON Schema of the configuration definition.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] is json_schema:
+            self._entries.move_to_end(key)
+            VALIDATOR_CACHE_HITS.inc()
+            return entry[2]
+
+        schema_hash = self._hash(json_schema)
+        if entry is not None and entry[1] == schema_hash:
+            validator = entry[2]
+            VALIDATOR_CACHE_HITS.inc()
+        else:
+            validator = SchemaValidator(json_schema, self.fast_threshold)
+            VALIDATOR_CACHE_MISSES.inc()
+
+        self._entries[key] = (json_schema, schema_hash, validator)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+        return validator
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Drop the validator of a key, or every validator when none is given.
+
+        -- Parameters
+        key: str, optional
+            The key for the configuration definition. Defaults to None.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+definition_cache = DefinitionCache(
+    ttl=settings.DEFINITION_CACHE_TTL,
+    max_size=settings.DEFINITION_CACHE_MAX_SIZE,
+)
+validator_cache = SchemaValidatorCache(
+    max_size=settings.DEFINITION_CACHE_MAX_SIZE,
+    fast_threshold=settings.SCHEMA_FAST_VALIDATION_THRESHOLD,
+)
+
+
+def evict_definition(config_definition_key: Optional[str] = None) -> None:
+    """
+    Evict a configuration definition and its compiled validator from this process.
+
+    -- Parameters
+    config_definition_key: str, optional
+        The key for the configuration definition, or None to evict everything.
+    """
+    definition_cache.invalidate(config_definition_key)
+    validator_cache.invalidate(config_definition_key)
+
+
+data_store.subscribe(settings.DEFINITION_CACHE_CHANNEL, evict_definition)
+
+
+async def invalidate_definition(config_definition_key: str) -> None:
+    """
+    Invalidate a configuration definition in this process and every other replica.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    """
+    evict_definition(config_definition_key)
+    await data_store.notify(settings.DEFINITION_CACHE_CHANNEL, config_definition_key)
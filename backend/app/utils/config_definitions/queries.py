@@ -7,7 +7,17 @@
 """
 
 from app.utils.settings.config import settings
+from app.utils.changes.queries import CHANGE_SEQ
+from app.utils.configs.queries import l_c_json_path
+from app.utils.config_definitions.validations import split_index
+from typing import Optional
+import hashlib
 import json
+import re
+
+INDEX_NAME_MAX_LENGTH = 63
+INDEX_NAME_DIGEST_LENGTH = 8
+FIXED_INDEXES = ("created_at", "modified_at")
 
 
 def internal_c_definition_query(
@@ -87,44 +97,160 @@ def internal_d_definition_query(config_definition_key: str) -> tuple:
     return delete_query, (config_definition_key,)
 
 
-def c_index_query(config_definition_key: str, index: str) -> tuple:
+def index_name(config_definition_key: str, index: str, fixed: bool = False) -> str:
+    """
+    Name an index of a configuration definition.
+
+    Postgres folds unquoted names to lower case and truncates them to 63
+    bytes, so names are lower case, and their readable part is cut short
+    to leave room for a hash of the definition key and the index. The name
+    always fits and is unique to its index, however long the key or path.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    index: str
+        The secondary index, or the column of a fixed index.
+    fixed: bool, optional
+        Whether the index is one of the fixed indexes on `created_at` and
+        `modified_at`. Defaults to False.
+
+    -- Returns
+    str
+        The name of the index.
+    """
+    if not fixed:
+        index = ":".join(split_index(index))
+
+    identity = f"{config_definition_key}_{index}".lower()
+    digest = hashlib.sha1(identity.encode()).hexdigest()[:INDEX_NAME_DIGEST_LENGTH]
+    readable = re.sub(r"[^a-z0-9_]", "_", f"idx_{identity}")
+
+    return f"{readable[:INDEX_NAME_MAX_LENGTH - INDEX_NAME_DIGEST_LENGTH - 1]}_{digest}"
+
+
+def index_prefix(config_definition_key: str) -> str:
+    """
+    Give the prefix shared by the names of every index Tartarus builds on a
+    configuration table, hashed or not.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+
+    -- Returns
+    str
+        The prefix of the index names.
+    """
+    prefix = f"idx_{config_definition_key}".lower()
+    return prefix[: INDEX_NAME_MAX_LENGTH - INDEX_NAME_DIGEST_LENGTH - 1]
+
+
+def legacy_index_name(
+    config_definition_key: str, index: str, fixed: bool = False
+) -> Optional[str]:
+    """
+    Name an index as it was named before names were hashed, if that name was
+    kept whole by Postgres.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    index: str
+        The secondary index, or the column of a fixed index.
+    fixed: bool, optional
+        Whether the index is one of the fixed indexes. Defaults to False.
+
+    -- Returns
+    Optional[str]
+        The former name of the index, or None if it was truncated.
+    """
+    if not fixed:
+        field, method = split_index(index)
+        index = f"{field.replace('.', '_')}_{method}"
+
+    name = f"idx_{config_definition_key}_{index}".lower()
+    return name if len(name) <= INDEX_NAME_MAX_LENGTH else None
+
+
+def c_index_query(config_definition_key: str, index: str, fixed: bool = False) -> tuple:
     """
     Create an index on a configuration definition.
 
+    B-tree and hash indexes are built on the exact expression the list filters
+    and sorts use. B-tree indexes also include `config_key`, which breaks ties
+    in sorted and cursor-paginated listings. GIN indexes cover the JSONB value
+    at the path, for containment queries. The fixed indexes serve the default
+    sorts on `created_at` and `modified_at`.
+
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
     index: str
-        The index to create.
+        The secondary index, or the column of a fixed index.
+    fixed: bool, optional
+        Whether the index is one of the fixed indexes. Defaults to False.
 
     -- Returns
     tuple
         The SQL query to create the index and the parameters.
     """
+    if fixed:
+        method, expression = "btree", f"{index}, config_key"
+    else:
+        field, method = split_index(index)
+        keys = field.split(".")
+
+        if method == "btree":
+            expression = f"({l_c_json_path(keys)}), config_key"
+        elif method == "hash":
+            expression = f"({l_c_json_path(keys)})"
+        else:
+            expression = "(data->" + "->".join(f"'{key}'" for key in keys) + ")"
+
     index_query = f"""
-    CREATE INDEX IF NOT EXISTS idx_{config_definition_key}_{index.replace('.', '_')}
-    ON {config_definition_key} USING gin ((data->%s));
+    CREATE INDEX IF NOT EXISTS {index_name(config_definition_key, index, fixed)}
+    ON {config_definition_key} USING {method} ({expression});
     """
 
-    return index_query, (index,)
+    return index_query, ()
 
 
-def d_index_query(config_definition_key: str, index: str) -> tuple:
+def u_index_query(index_name: str, new_index_name: str) -> tuple:
+    """
+    Rename an index on a configuration definition.
+
+    -- Parameters
+    index_name: str
+        The name of the index to rename.
+    new_index_name: str
+        The new name of the index.
+
+    -- Returns
+    tuple
+        The SQL query to rename the index and the parameters.
+    """
+    index_query = f"""
+    ALTER INDEX IF EXISTS {index_name} RENAME TO {new_index_name};
+    """
+
+    return index_query, ()
+
+
+def d_index_query(index_name: str) -> tuple:
     """
     Remove an index on a configuration definition.
 
     -- Parameters
-    config_definition_key: str
-        The key for the configuration definition.
-    index: str
-        The index to remove.
+    index_name: str
+        The name of the index to remove.
 
     -- Returns
     tuple
         The SQL query to remove the index and the parameters.
     """
     index_query = f"""
-    DROP INDEX IF EXISTS idx_{config_definition_key}_{index.replace('.', '_')};
+    DROP INDEX IF EXISTS {index_name};
     """
 
     return index_query, ()
@@ -143,9 +269,9 @@ def l_index_query(config_definition_key: str) -> tuple:
         The SQL query to list all indexes and the parameters.
     """
     list_query = """
-    SELECT indexname
+    SELECT indexname, indexdef
     FROM pg_indexes
-    WHERE tablename = %s;
+    WHERE schemaname = current_schema() AND tablename = lower(%s);
     """
 
     return list_query, (config_definition_key,)
@@ -167,10 +293,14 @@ def c_config_definition_query(config_definition_key: str) -> tuple:
     CREATE TABLE IF NOT EXISTS {config_definition_key} (
         config_key VARCHAR(255) PRIMARY KEY NOT NULL,
         data JSONB NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1,
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
         modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
-    """
+    """ + "".join(
+        c_index_query(config_definition_key, index, fixed=True)[0]
+        for index in FIXED_INDEXES
+    )
 
     return creation_query, ()
 
@@ -185,10 +315,12 @@ def r_config_definition_query(config_definition_key: str) -> tuple:
 
     -- Returns
     tuple
-        The SQL query to get the configuration definition and the parameters.
+        The SQL query to get the configuration definition, with a hash of its
+        whole row as its entity tag, and the parameters.
     """
     get_query = f"""
-    SELECT * FROM {settings.INTERNAL_TABLE}
+    SELECT *, md5({settings.INTERNAL_TABLE}::TEXT) AS etag
+    FROM {settings.INTERNAL_TABLE}
     WHERE config_definition_key = %s
     LIMIT 1;
     """
@@ -206,12 +338,40 @@ def d_config_definition_query(config_definition_key: str) -> tuple:
     -- Returns
     tuple
         The SQL query to delete the configuration table and the parameters.
+        A "drop" change is appended to the change log, after the changes of
+        the definition, which are kept.
     """
     delete_query = f"""
     DROP TABLE IF EXISTS {config_definition_key};
+
+    INSERT INTO {settings.CHANGE_LOG_TABLE} (seq, config_definition_key, operation)
+    VALUES ({CHANGE_SEQ} + 1, %s, 'drop');
+
+    SELECT pg_notify(%s, %s);
+    """
+
+    return delete_query, (
+        config_definition_key,
+        settings.CHANGE_CHANNEL,
+        config_definition_key,
+    )
+
+
+def l_config_definition_clause_query(search: str = None) -> tuple:
     """
+    Build the WHERE clause and parameters for listing configuration definitions.
+
+    -- Parameters
+    search: str, optional
+        The search term. Defaults to None.
 
-    return delete_query, ()
+    -- Returns
+    tuple
+        The WHERE clause and its parameters.
+    """
+    where_clause = f"{'WHERE config_definition_key ILIKE %s' if search else ''}".strip()
+    params = (f"%{search}%",) if search else ()
+    return where_clause, params
 
 
 def l_config_definition_query(
@@ -240,7 +400,7 @@ def l_config_definition_query(
     tuple
         The SQL query to list all configuration definitions and the parameters.
     """
-    where_clause = f"{'WHERE config_definition_key ILIKE %s' if search else ''}".strip()
+    where_clause, where_params = l_config_definition_clause_query(search)
 
     list_query = f"""
     SELECT * FROM {settings.INTERNAL_TABLE}
@@ -250,8 +410,23 @@ def l_config_definition_query(
     """
 
     offset = limit * (page - 1)
-    params = (f"%{search}%", limit, offset) if search else (limit, offset)
-    return list_query, params
+    return list_query, (*where_params, limit, offset)
+
+
+def l_config_definition_indexes_query() -> tuple:
+    """
+    List the secondary indexes of every configuration definition.
+
+    -- Returns
+    tuple
+        The SQL query to list the keys and indexes of all configuration
+        definitions and the parameters.
+    """
+    list_query = f"""
+    SELECT config_definition_key, indexes FROM {settings.INTERNAL_TABLE};
+    """
+
+    return list_query, ()
 
 
 def l_config_definition_count_query(search: str = None) -> tuple:
@@ -266,11 +441,10 @@ def l_config_definition_count_query(search: str = None) -> tuple:
     tuple
         The SQL query to get the total number of configuration definitions and the parameters.
     """
-    where_clause = f"{'WHERE config_definition_key ILIKE %s' if search else ''}".strip()
+    where_clause, params = l_config_definition_clause_query(search)
 
     count_query = f"""
     SELECT COUNT(*) FROM {settings.INTERNAL_TABLE} {where_clause};
     """
 
-    params = (f"%{search}%",) if search else ()
     return count_query, params
@@ -10,7 +10,12 @@ from app.utils.config_definitions.queries import (
     internal_c_definition_query,
     internal_u_definition_query,
     internal_d_definition_query,
+    FIXED_INDEXES,
+    index_name,
+    index_prefix,
+    legacy_index_name,
     c_index_query,
+    u_index_query,
     d_index_query,
     l_index_query,
     c_config_definition_query,
@@ -18,9 +23,12 @@ from app.utils.config_definitions.queries import (
     d_config_definition_query,
     l_config_definition_query,
     l_config_definition_count_query,
+    l_config_definition_clause_query,
+    l_config_definition_indexes_query,
 )
 
 from app.utils.config_definitions.validations import (
+    split_index,
     validate_config_creation,
     validate_config_read,
     validate_config_update,
@@ -32,12 +40,22 @@ from app.utils.exceptions.errors import (
     not_found_error,
 )
 
-from app.utils.data.data_source import DataStore
+from app.utils.config_definitions.cache import (
+    definition_cache,
+    invalidate_definition,
+)
+
+from app.utils.data.data_source import data_store
+from app.utils.settings.config import settings
+from app.utils.tracing.utils import traced
+import logging
 
-data_store = DataStore()
+logger = logging.getLogger("api-logger")
 
 
-def c_config_definition(config_definition_key: str, json_schema: dict, indexes: list):
+async def c_config_definition(
+    config_definition_key: str, json_schema: dict, indexes: list
+):
     """
     Create a new configuration definition in the internal table.
 
@@ -51,26 +69,32 @@ def c_config_definition(config_definition_key: str, json_schema: dict, indexes:
 
     """
 
-    validate_config_creation(config_definition_key, json_schema, indexes)
+    await validate_config_creation(config_definition_key, json_schema, indexes)
 
     internal_query, internal_params = internal_c_definition_query(
         config_definition_key, json_schema, indexes
     )
-    data_store.execute_query(internal_query, internal_params)
+    await data_store.execute_query(
+        internal_query, internal_params, kind="c_config_definition"
+    )
 
     creation_query, creation_params = c_config_definition_query(config_definition_key)
-    data_store.execute_query(creation_query, creation_params)
+    await data_store.execute_query(creation_query, creation_params, kind="ddl")
 
     for index in indexes:
         index_query, index_params = c_index_query(config_definition_key, index)
-        data_store.execute_query(index_query, index_params)
+        await data_store.execute_query(index_query, index_params, kind="ddl")
+
+    await invalidate_definition(config_definition_key)
 
     return None
 
 
-def r_config_definition(config_definition_key: str):
+@traced
+async def r_config_definition(config_definition_key: str):
     """
-    Get a configuration definition from the internal table.
+    Get a configuration definition, from the process cache when possible or
+    from the internal table otherwise.
 
     -- Parameters
     config_definition_key: str
@@ -78,19 +102,31 @@ def r_config_definition(config_definition_key: str):
 
     -- Returns
     dict
-        The configuration definition.
+        The configuration definition. It is shared with the cache and must not
+        be mutated.
     """
     validate_config_read(config_definition_key)
+
+    cached = definition_cache.get(config_definition_key)
+    if cached is not None:
+        return cached
+
+    generation = definition_cache.generation
     query, params = r_config_definition_query(config_definition_key)
-    result = data_store.execute_query(query, params=params, mode="retrieve")["response"]
+    result = (
+        await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="r_config_definition"
+        )
+    )["response"]
 
     if len(result) == 0 or result is None:
         raise not_found_error("definition", config_definition_key)
 
+    definition_cache.set(config_definition_key, result[0], generation)
     return result[0]
 
 
-def u_config_definition(config_definition_key: str, indexes: list):
+async def u_config_definition(config_definition_key: str, indexes: list):
     """
     Update a configuration definition in the internal table.
 
@@ -102,7 +138,7 @@ def u_config_definition(config_definition_key: str, indexes: list):
 
     """
 
-    config_definition = r_config_definition(config_definition_key)
+    config_definition = await r_config_definition(config_definition_key)
     json_schema = config_definition["json_schema"]
 
     validate_config_update(json_schema, indexes)
@@ -110,29 +146,111 @@ def u_config_definition(config_definition_key: str, indexes: list):
     internal_query, internal_params = internal_u_definition_query(
         config_definition_key, indexes
     )
-    data_store.execute_query(internal_query, internal_params)
+    await data_store.execute_query(
+        internal_query, internal_params, kind="u_config_definition"
+    )
+
+    await u_config_definition_indexes(config_definition_key, indexes)
+
+    await invalidate_definition(config_definition_key)
+
+    return None
+
+
+async def u_config_definition_indexes(config_definition_key: str, indexes: list):
+    """
+    Bring the indexes on a configuration table in line with its definition.
+
+    Missing indexes are created, or renamed from the name they had before
+    index names were hashed, and indexes that are no longer declared are
+    dropped. Indexes are matched by name, which `index_name` keeps within
+    the length Postgres stores.
 
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    indexes: list
+        The indexes for the configuration definition.
+
+    """
     list_query, list_params = l_index_query(config_definition_key)
+    result = (
+        await data_store.execute_query(
+            list_query,
+            params=list_params,
+            mode="retrieve",
+            kind="u_config_definition_indexes",
+        )
+    )["response"]
+    existing_indexes = {index["indexname"]: index["indexdef"] for index in result}
+
+    wanted_indexes = {
+        **{
+            index_name(config_definition_key, index, fixed=True): (index, True)
+            for index in FIXED_INDEXES
+        },
+        **{
+            index_name(config_definition_key, index): (index, False)
+            for index in indexes
+        },
+    }
+
+    for name, (index, fixed) in wanted_indexes.items():
+        if name in existing_indexes:
+            continue
+
+        legacy_name = legacy_index_name(config_definition_key, index, fixed)
+        method = "btree" if fixed else split_index(index)[1]
+        if legacy_name in existing_indexes and (
+            f" USING {method} " in existing_indexes[legacy_name]
+        ):
+            index_query, index_params = u_index_query(legacy_name, name)
+            existing_indexes[name] = existing_indexes.pop(legacy_name)
+        else:
+            index_query, index_params = c_index_query(
+                config_definition_key, index, fixed
+            )
+        await data_store.execute_query(index_query, index_params, kind="ddl")
+
+    for name in existing_indexes.keys() - wanted_indexes.keys():
+        if name.startswith(index_prefix(config_definition_key)):
+            index_query, index_params = d_index_query(name)
+            await data_store.execute_query(index_query, index_params, kind="ddl")
 
-    result = data_store.execute_query(list_query, params=list_params, mode="retrieve")[
-        "response"
-    ]
-    existing_indexes = [index["indexname"] for index in result]
+    return None
 
-    for index in indexes:
-        if index not in existing_indexes:
-            index_query, index_params = c_index_query(config_definition_key, index)
-            data_store.execute_query(index_query, index_params)
 
-    for index in existing_indexes:
-        if index not in indexes:
-            index_query, index_params = d_index_query(config_definition_key, index)
-            data_store.execute_query(index_query, index_params)
+async def u_config_definition_migrate():
+    """
+    Migrate the indexes of every configuration table to the current index
+    names and expressions, once on startup.
+
+    Tables created before index names were hashed keep their indexes under
+    their new names, GIN indexes of the first releases are rebuilt on the
+    expressions listings use, and the fixed `created_at` and `modified_at`
+    indexes are added where they are missing. A definition that fails to
+    migrate is logged and left as it was.
+    """
+    query, params = l_config_definition_indexes_query()
+    result = (
+        await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="u_config_definition_migrate"
+        )
+    )["response"]
+
+    for definition in result:
+        config_definition_key = definition["config_definition_key"]
+        try:
+            await u_config_definition_indexes(
+                config_definition_key, definition["indexes"] or []
+            )
+        except Exception as e:
+            logger.warning(f"Index migration of {config_definition_key} failed: {e}")
 
     return None
 
 
-def d_config_definition(config_definition_key: str):
+async def d_config_definition(config_definition_key: str):
     """
     Delete a configuration definition from the internal table.
 
@@ -147,25 +265,30 @@ def d_config_definition(config_definition_key: str):
     validate_config_delete(config_definition_key)
 
     internal_query, internal_params = internal_d_definition_query(config_definition_key)
-    rows_affected = data_store.execute_query(internal_query, internal_params)[
-        "rows_affected"
-    ]
+    rows_affected = (
+        await data_store.execute_query(
+            internal_query, internal_params, kind="d_config_definition"
+        )
+    )["rows_affected"]
 
     if rows_affected == 0:
         raise not_found_error("definition", config_definition_key)
 
     delete_query, delete_params = d_config_definition_query(config_definition_key)
-    data_store.execute_query(delete_query, delete_params)
+    await data_store.execute_query(delete_query, delete_params, kind="ddl")
+
+    await invalidate_definition(config_definition_key)
 
     return None
 
 
-def l_config_definition(
+async def l_config_definition(
     page: int = 1,
     limit: int = 10,
     sort_by: str = "modified_at",
     sort_order: str = "desc",
     search: str = None,
+    count: str = "exact",
 ):
     """
     List configuration definitions from the internal table.
@@ -181,22 +304,42 @@ def l_config_definition(
         The sort order. Defaults to "desc".
     search: str, optional
         The search term. Defaults to None.
+    count: str, optional
+        How the total is counted: "exact", "estimated" or "none". Defaults to
+        "exact".
 
     -- Returns
     tuple
-        The configuration definitions and the count of configuration
-        definitions.
+        The configuration definitions and the list metadata: the total and how
+        it was counted.
     """
     sortable_fields = {"config_definition_key", "created_at", "modified_at"}
-    validate_list_params(sortable_fields, page, limit, sort_by, sort_order, search)
+    validate_list_params(
+        sortable_fields, page, limit, sort_by, sort_order, search, count
+    )
 
     query, params = l_config_definition_query(page, limit, sort_by, sort_order, search)
-    result = data_store.execute_query(query, params=params, mode="retrieve")["response"]
-
-    count_query, count_params = l_config_definition_count_query(search)
-    count_result = data_store.execute_query(
-        count_query, params=count_params, mode="retrieve"
+    result = (
+        await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="l_config_definition"
+        )
     )["response"]
-    count_result = count_result[0]["count"]
 
-    return result, count_result
+    total = None
+    if count == "exact":
+        count_query, count_params = l_config_definition_count_query(search)
+        count_result = (
+            await data_store.execute_query(
+                count_query, params=count_params, mode="retrieve", kind="count"
+            )
+        )["response"]
+        total = count_result[0]["count"]
+
+    elif count == "estimated":
+        clause_query, clause_params = l_config_definition_clause_query(search)
+        total, exact = await data_store.estimate_count(
+            settings.INTERNAL_TABLE, clause_query, clause_params
+        )
+        count = "exact" if exact else count
+
+    return result, {"total": total, "count": count}
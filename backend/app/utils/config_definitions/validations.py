@@ -8,9 +8,11 @@
 
 import jsonschema
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from app.utils.exceptions.errors import APIError, conflict_error, validation_error
+from app.utils.tracing.utils import traced
+from app.utils.timing.utils import timed
 
 
 def validate_config_definition_key(config_definition_key: str) -> None:
@@ -35,7 +37,8 @@ def validate_config_definition_key(config_definition_key: str) -> None:
         )
 
 
-def validate_unique_key(config_definition_key: str) -> None:
+@traced
+async def validate_unique_key(config_definition_key: str) -> None:
     """
     Validates that a configuration definition key is unique.
 
@@ -47,13 +50,14 @@ def validate_unique_key(config_definition_key: str) -> None:
     from app.utils.config_definitions.utils import r_config_definition
 
     try:
-        r_config_definition(config_definition_key)
+        await r_config_definition(config_definition_key)
     except APIError:
         return
     else:
         raise conflict_error("definition", config_definition_key)
 
 
+@traced
 def validate_schema_structure(json_schema: Dict[str, Any]) -> None:
     """
     Validates the structure of the provided JSON Schema, ensuring it is correct and well-formed.
@@ -71,6 +75,7 @@ def validate_schema_structure(json_schema: Dict[str, Any]) -> None:
         raise validation_error("json_schema", e.message.split("\n", 1)[0])
 
 
+@traced
 def validate_schema_index(json_schema: Dict[str, Any], indexes: List[str]) -> None:
     """
     Ensures that each secondary index field exists in the schema properties.
@@ -86,13 +91,34 @@ def validate_schema_index(json_schema: Dict[str, Any], indexes: List[str]) -> No
         return
 
     for index in indexes:
-        if not validate_schema_property(index, json_schema):
+        field, _ = split_index(index)
+        if not validate_schema_property(field, json_schema):
             raise validation_error(
                 field="indexes",
-                extra_info=f"Secondary index '{index}' does not exist in the schema properties.",
+                extra_info=f"Secondary index '{field}' does not exist in the schema properties.",
             )
 
 
+INDEX_METHODS = ("btree", "hash", "gin")
+
+
+def split_index(index: str) -> Tuple[str, str]:
+    """
+    Splits a secondary index into its field path and index method.
+
+    -- Parameters
+    index: str
+        The secondary index, as a dotted field path optionally followed by
+        ':btree', ':hash' or ':gin'. Defaults to a B-tree.
+
+    -- Returns
+    Tuple[str, str]
+        The field path and the index method.
+    """
+    field, _, method = index.partition(":")
+    return field, method or "btree"
+
+
 def validate_index(indexes: List[str]) -> None:
     """
     Validates the secondary index fields.
@@ -102,7 +128,23 @@ def validate_index(indexes: List[str]) -> None:
         The secondary index fields to validate.
 
     """
-    if len(indexes) != len(set(indexes)):
+    fields = []
+    for index in indexes:
+        field, method = split_index(index)
+        if not re.match(r"^[a-zA-Z0-9_]+(\.[a-zA-Z0-9_]+)*$", field):
+            raise validation_error(
+                field="indexes",
+                extra_info=f"Secondary index '{field}' must be a dotted path of "
+                "alphanumeric characters and underscores.",
+            )
+        if method not in INDEX_METHODS:
+            raise validation_error(
+                field="indexes",
+                extra_info=f"Index method must be one of {list(INDEX_METHODS)}.",
+            )
+        fields.append(field)
+
+    if len(fields) != len(set(fields)):
         raise validation_error(
             field="indexes", extra_info="Secondary indexes must be unique."
         )
@@ -135,7 +177,9 @@ def validate_schema_property(field_path: str, json_schema: Dict[str, Any]) -> bo
     return True
 
 
-def validate_config_creation(
+@traced
+@timed("validate")
+async def validate_config_creation(
     config_definition_key: str, json_schema: Dict[str, Any], indexes: List[str]
 ) -> None:
     """
@@ -151,7 +195,7 @@ def validate_config_creation(
 
     """
     validate_config_definition_key(config_definition_key)
-    validate_unique_key(config_definition_key)
+    await validate_unique_key(config_definition_key)
     validate_index(indexes)
 
     validate_schema_structure(json_schema)
@@ -171,6 +215,8 @@ def validate_config_read(config_definition_key: str) -> None:
     validate_config_definition_key(config_definition_key)
 
 
+@traced
+@timed("validate")
 def validate_config_update(json_schema: Dict[str, Any], indexes: List[str]) -> None:
     """
     Validates the update of an existing configuration definition.
@@ -207,6 +253,7 @@ def validate_list_params(
     sort_by: str,
     sort_order: str,
     search: str,
+    count: str = "exact",
 ) -> None:
     """
     Validates the parameters for listing configuration definitions.
@@ -224,6 +271,8 @@ def validate_list_params(
         The order to sort by.
     search: str
         The search term to validate.
+    count: str, optional
+        How the total is counted. Defaults to "exact".
 
     """
 
@@ -253,3 +302,9 @@ def validate_list_params(
             extra_info="Search term must be at least 3 characters long and "
             "contain only alphanumeric characters and underscores.",
         )
+
+    if count not in ["exact", "estimated", "none"]:
+        raise validation_error(
+            field="count",
+            extra_info="Count must be one of 'exact', 'estimated', 'none'.",
+        )
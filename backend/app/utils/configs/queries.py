@@ -7,7 +7,29 @@
 """
 
 import json
-import datetime
+from typing import Optional
+
+from app.utils.changes.queries import w_change_query
+from app.utils.data.queries import MERGE_PATCH_FUNCTION
+from app.utils.etags.utils import parse_versions
+
+
+def l_c_json_path(keys: list[str]) -> str:
+    """
+    Constructs a JSON path for a given list of keys.
+
+    -- Parameters
+    keys: list[str]
+        The list of keys representing the path in a JSON object.
+
+    -- Returns
+    str
+        The JSON path string. Indexes declared on a configuration definition
+        are built on this exact expression, so filters and sorts can use them.
+    """
+    if len(keys) == 1:
+        return f"data->>'{keys[0]}'"
+    return "data->" + "->".join([f"'{key}'" for key in keys[:-1]]) + f"->>'{keys[-1]}'"
 
 
 def c_config_query(config_definition_key: str, config_key: str, data: dict) -> tuple:
@@ -24,45 +46,113 @@ def c_config_query(config_definition_key: str, config_key: str, data: dict) -> t
 
     -- Returns
     str
-        The SQL query to insert the configuration.
+        The SQL query to insert the configuration and log the change, returning
+        its key unless a configuration with the same key already exists.
     """
 
     data_str = json.dumps(data)
-    created_at = datetime.datetime.now()
-    modified_at = datetime.datetime.now()
 
-    query = f"""
+    write_query = f"""
     INSERT INTO {config_definition_key} (config_key, data, created_at, modified_at)
-    VALUES (%s, %s, %s, %s);
-    """
+    VALUES (%s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+    ON CONFLICT (config_key) DO NOTHING
+    RETURNING config_key, data"""
+
+    query, change_params = w_change_query(
+        config_definition_key, write_query, "'create'"
+    )
 
     return query, (
         config_key,
         data_str,
-        created_at,
-        modified_at,
+        *change_params,
     )
 
 
-def r_config_query(config_definition_key: str, config_key: str) -> tuple:
+def b_config_query(config_definition_key: str, configs: list, mode: str) -> tuple:
+    """
+    Insert many configurations in the configuration table in one statement.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    configs: list
+        The configurations, as dictionaries with a `config_key` and `data`.
+    mode: str
+        "upsert" to overwrite existing configurations, anything else to leave
+        them untouched.
+
+    -- Returns
+    tuple
+        The SQL query to insert the configurations and log the changes,
+        returning the key of every configuration written and whether it was
+        inserted rather than updated.
+    """
+
+    configs_str = json.dumps(configs)
+
+    on_conflict = "DO NOTHING"
+    if mode == "upsert":
+        on_conflict = f"""DO UPDATE
+    SET data = EXCLUDED.data, modified_at = EXCLUDED.modified_at,
+    version = {config_definition_key}.version + 1"""
+
+    write_query = f"""
+    INSERT INTO {config_definition_key} (config_key, data, created_at, modified_at)
+    SELECT config_key, data, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+    FROM jsonb_to_recordset(%s::jsonb) AS bulk(config_key VARCHAR(255), data JSONB)
+    ON CONFLICT (config_key) {on_conflict}
+    RETURNING config_key, data, (xmax = 0) AS inserted"""
+
+    query, change_params = w_change_query(
+        config_definition_key,
+        write_query,
+        "CASE WHEN written.inserted THEN 'create' ELSE 'update' END",
+        returning="config_key, inserted",
+    )
+
+    return query, (
+        configs_str,
+        *change_params,
+    )
+
+
+def r_config_query(
+    config_definition_key: str,
+    config_key: str,
+    etags: Optional[list] = None,
+    raw: bool = False,
+) -> tuple:
     """
     Retrieve a configuration from the configuration table.
 
+    The entity tag is derived from the version, which every write bumps.
+    When it matches one of `etags`, the data is left out, so a client that
+    already has the configuration never makes the data be sent or decoded.
+
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
     config_key: str
         The key for the configuration.
+    etags: list, optional
+        The entity tags the client already has. Defaults to None.
+    raw: bool, optional
+        Whether the data is selected as JSON text instead of being decoded.
+        Defaults to False.
 
     -- Returns
     str
         The SQL query to retrieve the configuration.
     """
+    etags = list(etags or [])
+    data_column = "data::TEXT" if raw else "data"
 
     query = f"""
     SELECT
     config_key,
-    data,
+    CASE WHEN %s OR version = ANY(%s::INTEGER[]) THEN NULL ELSE {data_column} END AS data,
+    version,
     created_at,
     modified_at
 
@@ -71,12 +161,86 @@ def r_config_query(config_definition_key: str, config_key: str) -> tuple:
     LIMIT 1;
     """
 
-    return query, (config_key,)
+    return query, ("*" in etags, parse_versions(config_key, etags), config_key)
 
 
-def u_config_query(config_definition_key: str, config_key: str, data: dict) -> tuple:
+def e_config_query(config_definition_key: str) -> tuple:
     """
-    Update an existing configuration in the configuration table.
+    Retrieve every configuration from the configuration table.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+
+    -- Returns
+    str
+        The SQL query to retrieve the configurations, ordered by key.
+    """
+
+    query = f"""
+    SELECT
+    config_key,
+    data,
+    version,
+    created_at,
+    modified_at
+
+    FROM {config_definition_key}
+    ORDER BY config_key
+    """
+
+    return query, ()
+
+
+def u_clause_query(
+    config_definition_key: str,
+    config_key: str,
+    expected_version: Optional[int] = None,
+    etags: Optional[list] = None,
+) -> tuple:
+    """
+    Build the WHERE clause matching a configuration to update, if it still
+    meets the preconditions of the update.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration to be updated.
+    expected_version: int, optional
+        Only match the configuration if it is at this version. Defaults to None.
+    etags: list, optional
+        Only match the configuration if its entity tag is one of these.
+        Defaults to None.
+
+    -- Returns
+    tuple
+        The WHERE clause and its parameters.
+    """
+    clause_query = "WHERE config_key = %s"
+    clause_params = [config_key]
+
+    if expected_version is not None:
+        clause_query += " AND version = %s"
+        clause_params.append(expected_version)
+
+    if etags is not None and "*" not in etags:
+        clause_query += " AND version = ANY(%s::INTEGER[])"
+        clause_params.append(parse_versions(config_key, etags))
+
+    return clause_query, clause_params
+
+
+def u_config_query(
+    config_definition_key: str,
+    config_key: str,
+    data: dict,
+    expected_version: Optional[int] = None,
+    etags: Optional[list] = None,
+) -> tuple:
+    """
+    Update an existing configuration in the configuration table, bumping its
+    version.
 
     -- Parameters
     config_definition_key: str
@@ -85,25 +249,93 @@ def u_config_query(config_definition_key: str, config_key: str, data: dict) -> t
         The key for the configuration to be updated.
     data: dict
         The updated data for the configuration.
+    expected_version: int, optional
+        Only update the configuration if it is at this version. Defaults to None.
+    etags: list, optional
+        Only update the configuration if its entity tag is one of these.
+        Defaults to None.
 
     -- Returns
     tuple
-        The SQL query and its parameters to update the configuration.
+        The SQL query and its parameters to update the configuration and log
+        the change.
     """
 
     data_str = json.dumps(data)
-    modified_at = datetime.datetime.now()
+    clause_query, clause_params = u_clause_query(
+        config_definition_key, config_key, expected_version, etags
+    )
 
-    query = f"""
+    write_query = f"""
     UPDATE {config_definition_key}
-    SET data = %s, modified_at = %s
-    WHERE config_key = %s;
-    """
+    SET data = %s, modified_at = CURRENT_TIMESTAMP, version = version + 1
+    {clause_query}
+    RETURNING config_key, data"""
+
+    query, change_params = w_change_query(
+        config_definition_key, write_query, "'update'"
+    )
 
     return query, (
         data_str,
-        modified_at,
-        config_key,
+        *clause_params,
+        *change_params,
+    )
+
+
+def p_config_query(
+    config_definition_key: str,
+    config_key: str,
+    patch: dict,
+    expected_version: Optional[int] = None,
+    etags: Optional[list] = None,
+) -> tuple:
+    """
+    Apply a JSON Merge Patch to an existing configuration in the configuration
+    table, bumping its version. The patch is merged by the database, so the
+    document is never read back. A patch that would leave the document empty
+    matches no configuration.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration to be patched.
+    patch: dict
+        The merge patch for the configuration data.
+    expected_version: int, optional
+        Only patch the configuration if it is at this version. Defaults to None.
+    etags: list, optional
+        Only patch the configuration if its entity tag is one of these.
+        Defaults to None.
+
+    -- Returns
+    tuple
+        The SQL query and its parameters to patch the configuration and log
+        the change.
+    """
+
+    patch_str = json.dumps(patch)
+    clause_query, clause_params = u_clause_query(
+        config_definition_key, config_key, expected_version, etags
+    )
+
+    write_query = f"""
+    UPDATE {config_definition_key}
+    SET data = {MERGE_PATCH_FUNCTION}(data, %s::JSONB),
+    modified_at = CURRENT_TIMESTAMP, version = version + 1
+    {clause_query} AND {MERGE_PATCH_FUNCTION}(data, %s::JSONB) <> '{{}}'::JSONB
+    RETURNING config_key, data"""
+
+    query, change_params = w_change_query(
+        config_definition_key, write_query, "'update'"
+    )
+
+    return query, (
+        patch_str,
+        *clause_params,
+        patch_str,
+        *change_params,
     )
 
 
@@ -119,15 +351,19 @@ def d_config_query(config_definition_key: str, config_key: str) -> tuple:
 
     -- Returns
     str
-        The SQL query to delete the configuration.
+        The SQL query to delete the configuration and log the change.
     """
 
-    query = f"""
+    write_query = f"""
     DELETE FROM {config_definition_key}
-    WHERE config_key = %s;
-    """
+    WHERE config_key = %s
+    RETURNING config_key, NULL::JSONB AS data"""
+
+    query, change_params = w_change_query(
+        config_definition_key, write_query, "'delete'"
+    )
 
-    return query, (config_key,)
+    return query, (config_key, *change_params)
 
 
 def l_clause_query(filters: dict, search: str = None) -> tuple:
@@ -157,6 +393,52 @@ def l_clause_query(filters: dict, search: str = None) -> tuple:
     return where_clause, params
 
 
+def l_cursor_query(
+    sort_by: str,
+    sort_order: str,
+    sort_value,
+    config_key: str,
+    nullable: bool = False,
+) -> tuple:
+    """
+    Build the keyset condition selecting the rows after a cursor.
+
+    -- Parameters
+    sort_by: str
+        The field to sort by.
+    sort_order: str
+        The sort order.
+    sort_value: Any
+        The sort value of the last row of the previous page.
+    config_key: str
+        The configuration key of the last row of the previous page.
+    nullable: bool, optional
+        Whether the sort field can be NULL. Defaults to False.
+
+    -- Returns
+    tuple
+        The condition to AND into the WHERE clause and its parameters.
+    """
+    op = ">" if sort_order == "asc" else "<"
+
+    if not nullable:
+        return f"AND ({sort_by}, config_key) {op} (%s, %s)", (sort_value, config_key)
+
+    # NULLs sort last in ascending and first in descending order.
+    if sort_value is None and sort_order == "asc":
+        return f"AND ({sort_by} IS NULL AND config_key > %s)", (config_key,)
+    if sort_value is None:
+        return f"AND ({sort_by} IS NOT NULL OR config_key < %s)", (config_key,)
+
+    nulls_after = f"OR {sort_by} IS NULL" if sort_order == "asc" else ""
+    clause = f"""AND (
+        {sort_by} {op} %s
+        OR ({sort_by} = %s AND config_key {op} %s)
+        {nulls_after}
+    )"""
+    return clause, (sort_value, sort_value, config_key)
+
+
 def l_config_query(
     config_definition_key: str,
     page: int = 1,
@@ -165,10 +447,15 @@ def l_config_query(
     sort_order: str = "desc",
     clause_query: str = "",
     clause_params: tuple = (),
+    raw: bool = False,
 ) -> tuple:
     """
     List all configurations for a configuration definition.
 
+    One row more than `limit` is fetched to tell whether there is a next page.
+    Rows are ordered by `config_key` within equal sort values, so pages are
+    stable and can be continued with a keyset cursor.
+
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
@@ -184,26 +471,32 @@ def l_config_query(
         The WHERE clause for the query. Defaults to "".
     clause_params: tuple, optional
         The parameters for the WHERE clause. Defaults to ().
+    raw: bool, optional
+        Whether the data is selected as JSON text instead of being decoded.
+        Defaults to False.
 
     -- Returns
     tuple
         The SQL query to list the configurations and the parameters.
     """
     offset = limit * (page - 1)
+    data_column = "data::TEXT AS data" if raw else "data"
 
     query = f"""
     SELECT 
         config_key,
-        data,
+        {data_column},
+        version,
         created_at,
-        modified_at
+        modified_at,
+        {sort_by} AS sort_value
     FROM {config_definition_key}
     {clause_query}
-    ORDER BY {sort_by} {sort_order}
+    ORDER BY {sort_by} {sort_order}, config_key {sort_order}
     LIMIT %s OFFSET %s;
     """
 
-    return query, (*clause_params, limit, offset)
+    return query, (*clause_params, limit + 1, offset)
 
 
 def l_config_count_query(
@@ -6,34 +6,63 @@
 
 """
 
+import json
+import base64
+import binascii
+import datetime
+import logging
+from typing import Any, AsyncIterable, AsyncIterator, Optional
 from fastapi import Request
+from psycopg import DataError, IntegrityError
 
 from app.utils.configs.queries import (
+    b_config_query,
     c_config_query,
     r_config_query,
     d_config_query,
+    e_config_query,
+    l_c_json_path,
     l_clause_query,
+    l_cursor_query,
     l_config_query,
     l_config_count_query,
+    p_config_query,
     u_config_query,
 )
 
 from app.utils.configs.validations import (
+    validate_bulk_item,
+    validate_config_bulk,
     validate_config_creation,
     validate_config_read,
     validate_config_deletion,
+    validate_config_export,
+    validate_config_data,
     validate_config_list,
+    validate_config_patch,
     validate_config_update,
 )
 
-from app.utils.exceptions.errors import not_found_error
+from app.utils.exceptions.errors import (
+    APIError,
+    conflict_error,
+    contention_error,
+    not_found_error,
+    precondition_failed_error,
+    validation_error,
+)
 
-from app.utils.data.data_source import DataStore
+from app.utils.config_definitions.utils import r_config_definition
+from app.utils.config_definitions.cache import validator_cache
+from app.utils.data.data_source import data_store
+from app.utils.etags.utils import version_etag
+from app.utils.responses.utils import RawJSON
+from app.utils.settings.config import settings
 
-data_store = DataStore()
+logger = logging.getLogger("api-logger")
 
 
-def c_config(config_definition_key: str, config_key: str, data: dict):
+async def c_config(config_definition_key: str, config_key: str, data: dict):
     """
     Create a new configuration for the configuration definition.
 
@@ -46,17 +75,229 @@ def c_config(config_definition_key: str, config_key: str, data: dict):
         The data for the configuration.
     """
 
-    validate_config_creation(config_definition_key, config_key, data)
+    await validate_config_creation(config_definition_key, config_key, data)
 
     creation_query, creation_params = c_config_query(
         config_definition_key, config_key, data
     )
-    data_store.execute_query(creation_query, creation_params)
+    result = (
+        await data_store.execute_query(
+            creation_query, creation_params, mode="retrieve", kind="c_config"
+        )
+    )["response"]
+
+    if not result:
+        raise conflict_error("config", config_key)
 
     return None
 
 
-def r_config(config_definition_key: str, config_key: str):
+async def b_util_json(body: bytes) -> AsyncIterator[Any]:
+    """
+    Parses a JSON array of configurations.
+
+    -- Parameters
+    body: bytes
+        The request body.
+
+    -- Returns
+    AsyncIterator[Any]
+        The items of the array.
+    """
+    try:
+        items = json.loads(body)
+    except ValueError:
+        items = None
+
+    if not isinstance(items, list):
+        raise validation_error(
+            field="body", extra_info="Body must be a JSON array or NDJSON stream."
+        )
+
+    for item in items:
+        yield item
+
+
+async def b_util_ndjson(stream: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Parses a stream of newline-delimited JSON configurations as it arrives.
+
+    -- Parameters
+    stream: AsyncIterable[bytes]
+        The request body stream.
+
+    -- Returns
+    AsyncIterator[Any]
+        The parsed lines, or None for lines that are not valid JSON.
+    """
+    buffer = b""
+    async for chunk in stream:
+        *lines, buffer = (buffer + chunk).split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield b_util_parse_line(line)
+
+    if buffer.strip():
+        yield b_util_parse_line(buffer)
+
+
+def b_util_parse_line(line: bytes) -> Any:
+    """
+    Parses a single NDJSON line.
+
+    -- Parameters
+    line: bytes
+        The line to parse.
+
+    -- Returns
+    Any
+        The parsed value, or None if the line is not valid JSON.
+    """
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+async def b_util_write(
+    config_definition_key: str, batch: list, mode: str, summary: dict
+) -> None:
+    """
+    Writes a batch of validated configurations and records the outcome.
+
+    If the database rejects the data of the batch, it is split in halves
+    that are written in turn, until the offending configurations are
+    isolated and reported. Any other failure, such as a lost connection or
+    an exhausted pool, fails the whole request.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    batch: list
+        The configurations, as (index, config) pairs.
+    mode: str
+        How existing configurations are handled.
+    summary: dict
+        The counts and errors of the bulk write, updated in place.
+    """
+    configs = [config for _, config in batch]
+    query, params = b_config_query(config_definition_key, configs, mode)
+
+    try:
+        result = (
+            await data_store.execute_query(
+                query, params, mode="retrieve", kind="b_config"
+            )
+        )["response"]
+    except (DataError, IntegrityError) as e:
+        logger.warning(f"Bulk write batch rejected: {e}")
+        if len(batch) == 1:
+            index, config = batch[0]
+            error = validation_error("data", str(e).split("\n", 1)[0])
+            summary["errors"].append(
+                {
+                    "index": index,
+                    "config_key": config["config_key"],
+                    "msg": error.detail[0]["msg"],
+                }
+            )
+            return
+
+        middle = len(batch) // 2
+        await b_util_write(config_definition_key, batch[:middle], mode, summary)
+        await b_util_write(config_definition_key, batch[middle:], mode, summary)
+        return
+
+    written = {row["config_key"]: row["inserted"] for row in result}
+    for index, config in batch:
+        config_key = config["config_key"]
+        if config_key not in written:
+            if mode == "skip-existing":
+                summary["skipped"] += 1
+            else:
+                error = conflict_error("config", config_key).detail[0]["msg"]
+                summary["errors"].append(
+                    {"index": index, "config_key": config_key, "msg": error}
+                )
+        elif written[config_key]:
+            summary["created"] += 1
+        else:
+            summary["updated"] += 1
+
+
+async def b_config(
+    config_definition_key: str, configs: AsyncIterable[Any], mode: str = "insert"
+) -> dict:
+    """
+    Create or update many configurations of a configuration definition.
+
+    Every configuration is validated against the definition's compiled schema
+    and written in multi-row batches. Invalid configurations are reported and
+    skipped; the others are written.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    configs: AsyncIterable[Any]
+        The configurations, as dictionaries with a `config_key` and `data`.
+    mode: str, optional
+        "insert" to report existing configurations as conflicts, "upsert" to
+        overwrite them, or "skip-existing" to leave them untouched. Defaults
+        to "insert".
+
+    -- Returns
+    dict
+        The number of configurations created, updated and skipped, and the
+        errors by position in the request.
+    """
+    await validate_config_bulk(config_definition_key, mode)
+
+    config_definition = await r_config_definition(config_definition_key)
+    json_schema = config_definition.get("json_schema")
+    validator = (
+        validator_cache.get(config_definition_key, json_schema) if json_schema else None
+    )
+
+    summary = {"created": 0, "updated": 0, "skipped": 0, "errors": []}
+    seen, batch = set(), []
+
+    index = -1
+    async for item in configs:
+        index += 1
+        try:
+            validate_bulk_item(item, validator)
+            if item["config_key"] in seen:
+                raise validation_error(
+                    field="config_key",
+                    extra_info="Configuration key is repeated in the request.",
+                )
+        except APIError as e:
+            config_key = item.get("config_key") if isinstance(item, dict) else None
+            config_key = config_key if isinstance(config_key, str) else None
+            summary["errors"].append(
+                {"index": index, "config_key": config_key, "msg": e.detail[0]["msg"]}
+            )
+            continue
+
+        seen.add(item["config_key"])
+        batch.append((index, {"config_key": item["config_key"], "data": item["data"]}))
+
+        if len(batch) >= settings.BULK_BATCH_SIZE:
+            await b_util_write(config_definition_key, batch, mode, summary)
+            batch = []
+
+    if batch:
+        await b_util_write(config_definition_key, batch, mode, summary)
+
+    return summary
+
+
+async def r_config(
+    config_definition_key: str,
+    config_key: str,
+    etags: Optional[list] = None,
+    raw: bool = False,
+):
     """
     Retrieve a configuration from the configuration definition.
 
@@ -65,27 +306,113 @@ def r_config(config_definition_key: str, config_key: str):
         The key for the configuration definition.
     config_key: str
         The key for the configuration.
+    etags: list, optional
+        The entity tags the client already has. Defaults to None.
+    raw: bool, optional
+        Whether the data is returned as `RawJSON` text, to be spliced into the
+        response without being decoded. Defaults to False.
 
     -- Returns
     dict
-        The configuration data.
+        The configuration data, with its entity tag under "etag". The data is
+        None when the entity tag is one of `etags`.
     """
 
-    validate_config_read(config_definition_key, config_key)
+    await validate_config_read(config_definition_key, config_key)
 
-    query, params = r_config_query(config_definition_key, config_key)
-    result = data_store.execute_query(query, params=params, mode="retrieve")["response"]
+    query, params = r_config_query(config_definition_key, config_key, etags, raw)
+    result = (
+        await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="r_config"
+        )
+    )["response"]
 
     if len(result) == 0 or result is None:
         raise not_found_error("configuration", config_key)
 
-    return result[0]
+    config = result[0]
+    config["etag"] = version_etag(config_key, config["version"])
+    if raw and config["data"] is not None:
+        config["data"] = RawJSON(config["data"])
+
+    return config
 
 
-def u_config(config_definition_key: str, config_key: str, data: dict):
+async def e_config(config_definition_key: str) -> AsyncIterator[bytes]:
+    """
+    Export every configuration of the configuration definition.
+
+    The definition is validated up front, so errors are raised before the
+    response starts; the configurations are then read lazily.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+
+    -- Returns
+    AsyncIterator[bytes]
+        The configurations as NDJSON, in chunks of `EXPORT_BATCH_SIZE` lines.
+    """
+    await validate_config_export(config_definition_key)
+
+    query, params = e_config_query(config_definition_key)
+    return e_util_ndjson(data_store.stream_query(query, params, kind="e_config"))
+
+
+async def e_util_ndjson(rows: AsyncIterable[dict]) -> AsyncIterator[bytes]:
+    """
+    Encodes rows as NDJSON, a chunk of `EXPORT_BATCH_SIZE` lines at a time.
+
+    -- Parameters
+    rows: AsyncIterable[dict]
+        The configurations.
+
+    -- Returns
+    AsyncIterator[bytes]
+        The encoded chunks.
+    """
+    lines = []
+    async for row in rows:
+        lines.append(json.dumps(row, default=e_util_default))
+        if len(lines) >= settings.EXPORT_BATCH_SIZE:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def e_util_default(value: Any) -> str:
+    """
+    Serializes the timestamps of an exported configuration.
+
+    -- Parameters
+    value: Any
+        A value the JSON encoder does not handle.
+
+    -- Returns
+    str
+        The value in ISO 8601 format.
+    """
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def u_config(
+    config_definition_key: str,
+    config_key: str,
+    data: dict,
+    expected_version: Optional[int] = None,
+    etags: Optional[list] = None,
+):
     """
     Update an existing configuration for the configuration definition.
 
+    Given an expected version or entity tags, the update only applies if the
+    configuration has not been modified since, so concurrent writers never
+    silently overwrite each other.
+
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
@@ -93,62 +420,194 @@ def u_config(config_definition_key: str, config_key: str, data: dict):
         The key for the configuration to be updated.
     data: dict
         The updated data for the configuration.
+    expected_version: int, optional
+        The version the configuration is expected to be at. Defaults to None.
+    etags: list, optional
+        The entity tags the configuration is expected to match, from
+        `If-Match`. Defaults to None.
     """
 
-    validate_config_update(config_definition_key, config_key, data)
+    await validate_config_update(
+        config_definition_key, config_key, data, expected_version
+    )
 
     update_query, update_params = u_config_query(
-        config_definition_key, config_key, data
+        config_definition_key, config_key, data, expected_version, etags
     )
-    rows_affected = data_store.execute_query(update_query, update_params)[
-        "rows_affected"
-    ]
+    rows_affected = (
+        await data_store.execute_query(update_query, update_params, kind="u_config")
+    )["rows_affected"]
 
     if rows_affected != 1:
-        raise not_found_error("configuration", config_key)
+        preconditioned = expected_version is not None or etags is not None
+        await u_util_missing(config_definition_key, config_key, preconditioned)
 
     return None
 
 
-def d_config(config_definition_key: str, config_key: str):
+async def p_config(
+    config_definition_key: str,
+    config_key: str,
+    patch: dict,
+    expected_version: Optional[int] = None,
+    etags: Optional[list] = None,
+):
     """
-    Delete a configuration from the configuration definition.
+    Apply a JSON Merge Patch (RFC 7396) to an existing configuration.
+
+    The patch is merged by the database, so the document is neither sent nor
+    rewritten by the API. Only the parts of the schema it touches are
+    validated, unless the schema needs the whole document: it is then read,
+    patched and validated here, and the patch only applies if the
+    configuration is still at the version read.
 
     -- Parameters
     config_definition_key: str
         The key for the configuration definition.
     config_key: str
-        The key for the configuration.
+        The key for the configuration to be patched.
+    patch: dict
+        The merge patch for the configuration data.
+    expected_version: int, optional
+        The version the configuration is expected to be at. Defaults to None.
+    etags: list, optional
+        The entity tags the configuration is expected to match, from
+        `If-Match`. Defaults to None.
     """
 
-    validate_config_deletion(config_definition_key, config_key)
+    validated = await validate_config_patch(
+        config_definition_key, config_key, patch, expected_version
+    )
+    preconditioned = expected_version is not None or etags is not None
 
-    deletion_query, deletion_params = d_config_query(config_definition_key, config_key)
-    rows_affected = data_store.execute_query(deletion_query, deletion_params)[
-        "rows_affected"
-    ]
+    for _ in range(max(1, settings.PATCH_RETRIES)):
+        version = expected_version
+        if not validated:
+            config = await r_config(config_definition_key, config_key)
+            if expected_version not in (None, config["version"]):
+                raise precondition_failed_error("configuration", config_key)
 
-    if rows_affected != 1:
-        raise not_found_error("configuration", config_key)
+            await validate_config_data(
+                config_definition_key, p_util_merge(config["data"], patch)
+            )
+            version = config["version"]
 
-    return None
+        patch_query, patch_params = p_config_query(
+            config_definition_key, config_key, patch, version, etags
+        )
+        rows_affected = (
+            await data_store.execute_query(patch_query, patch_params, kind="p_config")
+        )["rows_affected"]
+
+        if rows_affected == 1:
+            return None
+
+        if validated or preconditioned:
+            break
+    else:
+        await u_util_missing(config_definition_key, config_key, False, contended=True)
+
+    await u_util_missing(config_definition_key, config_key, preconditioned, patch=patch)
 
 
-def l_c_json_path(keys: list[str]) -> str:
+def p_util_merge(target: Any, patch: Any) -> Any:
     """
-    Constructs a JSON path for a given list of keys.
+    Apply a JSON Merge Patch, as the database does.
 
     -- Parameters
-    keys: list[str]
-        The list of keys representing the path in a JSON object.
+    target: Any
+        The document to patch.
+    patch: Any
+        The merge patch.
 
     -- Returns
-    str
-        The JSON path string.
+    Any
+        The patched document.
     """
-    if len(keys) == 1:
-        return f"data->>'{keys[0]}'"
-    return "data->" + "->".join([f"'{key}'" for key in keys[:-1]]) + f"->>'{keys[-1]}'"
+    if not isinstance(patch, dict):
+        return patch
+
+    merged = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            merged.pop(key, None)
+        else:
+            merged[key] = p_util_merge(merged.get(key), value)
+
+    return merged
+
+
+async def u_util_missing(
+    config_definition_key: str,
+    config_key: str,
+    preconditioned: bool,
+    contended: bool = False,
+    patch: Optional[dict] = None,
+):
+    """
+    Raise the error for an update that matched no configuration.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration.
+    preconditioned: bool
+        Whether the update was conditional on the client's version or entity
+        tags, so a configuration that still exists fails the precondition.
+    contended: bool, optional
+        Whether the update was only conditional on the version it read itself,
+        and lost the race on every try. Defaults to False.
+    patch: dict, optional
+        The merge patch the update applied, which matches no configuration if
+        it would leave the document empty. Defaults to None.
+
+    -- Raises
+    APIError
+        400 if the patch would leave an existing configuration empty, 412 if
+        a preconditioned configuration exists, 409 if a contended one does,
+        404 otherwise.
+    """
+    if preconditioned or contended or patch is not None:
+        query, params = r_config_query(config_definition_key, config_key)
+        result = await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="r_config"
+        )
+        if result["response"] and patch is not None:
+            if not p_util_merge(result["response"][0]["data"], patch):
+                raise validation_error(
+                    field="data", extra_info="Configuration data must be provided."
+                )
+        if result["response"] and contended:
+            raise contention_error("configuration", config_key)
+        if result["response"] and preconditioned:
+            raise precondition_failed_error("configuration", config_key)
+
+    raise not_found_error("configuration", config_key)
+
+
+async def d_config(config_definition_key: str, config_key: str):
+    """
+    Delete a configuration from the configuration definition.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration.
+    """
+
+    await validate_config_deletion(config_definition_key, config_key)
+
+    deletion_query, deletion_params = d_config_query(config_definition_key, config_key)
+    rows_affected = (
+        await data_store.execute_query(deletion_query, deletion_params, kind="d_config")
+    )["rows_affected"]
+
+    if rows_affected != 1:
+        raise not_found_error("configuration", config_key)
+
+    return None
 
 
 def l_c_sort_field(sort_by: str, allowed_fields: set[str]) -> str:
@@ -185,7 +644,15 @@ def l_util_filters(request: Request) -> dict:
         The filters for the configuration.
     """
     request_filters = request.query_params.items()
-    query_fields = {"page", "limit", "sort_by", "sort_order", "search"}
+    query_fields = {
+        "page",
+        "limit",
+        "sort_by",
+        "sort_order",
+        "search",
+        "cursor",
+        "count",
+    }
 
     filters = {}
     for key, value in request_filters:
@@ -215,7 +682,59 @@ def l_util_sort(sort_by: str) -> str:
     return l_c_sort_field(sort_by, sortable_fields)
 
 
-def l_config(
+def l_util_encode_cursor(sort_by: str, sort_order: str, row: dict) -> str:
+    """
+    Encodes the position of a row into an opaque cursor.
+
+    -- Parameters
+    sort_by: str
+        The field to sort by, as given in the request.
+    sort_order: str
+        The sort order.
+    row: dict
+        The last row of the page, with its `sort_value`.
+
+    -- Returns
+    str
+        The cursor for the page following the row.
+    """
+    position = [sort_by, sort_order, row["sort_value"], row["config_key"]]
+    encoded = json.dumps(position, default=lambda value: value.isoformat())
+    return base64.urlsafe_b64encode(encoded.encode()).decode()
+
+
+def l_util_decode_cursor(cursor: str, sort_by: str, sort_order: str) -> tuple:
+    """
+    Decodes a cursor into the position of the last row of the previous page.
+
+    -- Parameters
+    cursor: str
+        The cursor returned with the previous page.
+    sort_by: str
+        The field to sort by, as given in the request.
+    sort_order: str
+        The sort order.
+
+    -- Returns
+    tuple
+        The sort value and configuration key of the last row.
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        cursor_sort_by, cursor_sort_order, sort_value, config_key = position
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise validation_error(field="cursor", extra_info="Cursor is malformed.")
+
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise validation_error(
+            field="cursor",
+            extra_info="Cursor does not match the sort_by and sort_order parameters.",
+        )
+
+    return sort_value, config_key
+
+
+async def l_config(
     config_definition_key: str,
     page: int = 1,
     limit: int = 10,
@@ -223,6 +742,9 @@ def l_config(
     sort_order: str = "desc",
     search: str = None,
     request: Request = None,
+    cursor: str = None,
+    count: str = "exact",
+    raw: bool = False,
 ):
     """
     List all configurations for a configuration definition.
@@ -242,37 +764,94 @@ def l_config(
         The search term. Defaults to None.
     request: Request, optional
         The request object. Defaults to None
+    cursor: str, optional
+        The `next_cursor` of the previous page, to continue listing after it
+        instead of paging by offset. Defaults to None.
+    count: str, optional
+        How the total is counted: "exact", "estimated" or "none". Defaults to
+        "exact".
+    raw: bool, optional
+        Whether the data is returned as `RawJSON` text, to be spliced into the
+        response without being decoded. Defaults to False.
 
     -- Returns
     tuple
-        The configurations and the count of configurations.
+        The configurations and the list metadata: the total, how it was
+        counted and the cursor for the next page, if any.
     """
-    validate_config_list(
-        config_definition_key, page, limit, sort_by, sort_order, search, request
+    await validate_config_list(
+        config_definition_key,
+        page,
+        limit,
+        sort_by,
+        sort_order,
+        search,
+        request,
+        cursor,
+        count,
     )
 
     filters = l_util_filters(request)
-    sort_by = l_util_sort(sort_by)
+    sort_field = l_util_sort(sort_by)
 
     clause_query, clause_params = l_clause_query(filters, search)
+    page_query, page_params = clause_query, clause_params
+
+    if cursor:
+        sort_value, last_key = l_util_decode_cursor(cursor, sort_by, sort_order)
+        cursor_query, cursor_params = l_cursor_query(
+            sort_field,
+            sort_order,
+            sort_value,
+            last_key,
+            nullable=sort_field != sort_by,
+        )
+        page_query = f"{clause_query} {cursor_query}"
+        page_params = (*clause_params, *cursor_params)
 
     query, params = l_config_query(
         config_definition_key,
         page,
         limit,
-        sort_by,
+        sort_field,
         sort_order,
-        clause_query,
-        clause_params,
+        page_query,
+        page_params,
+        raw,
     )
-    result = data_store.execute_query(query, params=params, mode="retrieve")["response"]
-
-    count_query, count_params = l_config_count_query(
-        config_definition_key, clause_query, clause_params
-    )
-    count_result = data_store.execute_query(count_query, count_params, mode="retrieve")[
-        "response"
-    ]
-    count_result = count_result[0]["count"]
-
-    return result, count_result
+    result = (
+        await data_store.execute_query(
+            query, params=params, mode="retrieve", kind="l_config"
+        )
+    )["response"]
+
+    next_cursor = None
+    if len(result) > limit:
+        result = result[:limit]
+        next_cursor = l_util_encode_cursor(sort_by, sort_order, result[-1])
+
+    for row in result:
+        row.pop("sort_value", None)
+        if raw:
+            row["data"] = RawJSON(row["data"])
+
+    total = None
+    if count == "exact":
+        count_query, count_params = l_config_count_query(
+            config_definition_key, clause_query, clause_params
+        )
+        count_result = (
+            await data_store.execute_query(
+                count_query, count_params, mode="retrieve", kind="count"
+            )
+        )["response"]
+        total = count_result[0]["count"]
+
+    elif count == "estimated":
+        total, exact = await data_store.estimate_count(
+            config_definition_key, clause_query, clause_params
+        )
+        count = "exact" if exact else count
+
+    meta = {"total": total, "count": count, "next_cursor": next_cursor}
+    return result, meta
@@ -8,14 +8,19 @@
 
 import jsonschema
 import re
+from typing import Any, Optional
 from fastapi import Request
 
 from app.utils.config_definitions.validations import (
+    split_index,
     validate_config_definition_key,
     validate_list_params,
 )
 from app.utils.config_definitions.utils import r_config_definition
-from app.utils.exceptions.errors import APIError, conflict_error, validation_error
+from app.utils.config_definitions.cache import SchemaValidator, validator_cache
+from app.utils.exceptions.errors import validation_error
+from app.utils.tracing.utils import span, traced
+from app.utils.timing.utils import timed
 
 
 def validate_config_key(config_key: str) -> None:
@@ -37,30 +42,16 @@ def validate_config_key(config_key: str) -> None:
             extra_info="Configuration key must start with a letter and contain only "
             "alphanumeric characters and underscores, at least 3 characters long.",
         )
+    if len(config_key) > 255:
+        raise validation_error(
+            field="config_key",
+            extra_info="Configuration key must not exceed 255 characters.",
+        )
 
 
-def validate_unique_key(config_definition_key: str, config_key: str) -> None:
-    """
-    Validates that a configuration key is unique.
-
-    -- Parameters
-    config_definition_key: str
-        The key for the configuration definition.
-    config_key: str
-        The key for the configuration
-
-    """
-    from app.utils.configs.utils import r_config
-
-    try:
-        r_config(config_definition_key, config_key)
-    except APIError:
-        return
-    else:
-        raise conflict_error("config", config_key)
-
-
-def validate_config_data(config_definition_key: str, data: dict) -> None:
+@traced
+@timed("validate")
+async def validate_config_data(config_definition_key: str, data: dict) -> None:
     """
     Validates the configuration data.
 
@@ -75,19 +66,24 @@ def validate_config_data(config_definition_key: str, data: dict) -> None:
             field="data", extra_info="Configuration data must be provided."
         )
 
-    config_definition = r_config_definition(config_definition_key)
+    config_definition = await r_config_definition(config_definition_key)
     json_schema = config_definition.get("json_schema")
 
     if not json_schema:
         return
 
+    validator = validator_cache.get(config_definition_key, json_schema)
+
     try:
-        jsonschema.validate(data, json_schema)
+        with span("jsonschema.validate"):
+            validator.validate(data)
     except jsonschema.ValidationError as e:
         raise validation_error("data", e.message.split("\n", 1)[0])
 
 
-def validate_config_creation(
+@traced
+@timed("validate")
+async def validate_config_creation(
     config_definition_key: str, config_key: str, data: dict
 ) -> None:
     """
@@ -103,13 +99,94 @@ def validate_config_creation(
     """
     validate_config_definition_key(config_definition_key)
     validate_config_key(config_key)
-    validate_unique_key(config_definition_key, config_key)
-    validate_config_data(config_definition_key, data)
+    await validate_config_data(config_definition_key, data)
 
     return None
 
 
-def validate_config_read(config_definition_key: str, config_key: str) -> None:
+@traced
+@timed("validate")
+async def validate_config_bulk(config_definition_key: str, mode: str) -> None:
+    """
+    Validates a bulk write of configurations.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    mode: str
+        How existing configurations are handled.
+    """
+    validate_config_definition_key(config_definition_key)
+
+    if mode not in ["insert", "upsert", "skip-existing"]:
+        raise validation_error(
+            field="mode",
+            extra_info="Mode must be one of 'insert', 'upsert', 'skip-existing'.",
+        )
+
+    await r_config_definition(config_definition_key)
+
+    return None
+
+
+@timed("validate")
+def validate_bulk_item(item: Any, validator: Optional[SchemaValidator]) -> None:
+    """
+    Validates a single configuration of a bulk write.
+
+    -- Parameters
+    item: Any
+        The configuration, as parsed from the request.
+    validator: SchemaValidator, optional
+        The compiled schema of the configuration definition, if it has one.
+    """
+    if (
+        not isinstance(item, dict)
+        or not isinstance(item.get("config_key") or "", str)
+        or not isinstance(item.get("data"), dict)
+    ):
+        raise validation_error(
+            field="item",
+            extra_info="Item must be a JSON object with 'config_key' and 'data'.",
+        )
+
+    validate_config_key(item.get("config_key"))
+
+    if not item["data"]:
+        raise validation_error(
+            field="data", extra_info="Configuration data must be provided."
+        )
+
+    if validator is None:
+        return None
+
+    try:
+        validator.validate(item["data"])
+    except jsonschema.ValidationError as e:
+        raise validation_error("data", e.message.split("\n", 1)[0])
+
+    return None
+
+
+@traced
+@timed("validate")
+async def validate_config_export(config_definition_key: str) -> None:
+    """
+    Validates the export of a configuration definition's configurations.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    """
+    validate_config_definition_key(config_definition_key)
+    await r_config_definition(config_definition_key)
+
+    return None
+
+
+@traced
+@timed("validate")
+async def validate_config_read(config_definition_key: str, config_key: str) -> None:
     """
     Validates the retrieval of a configuration.
 
@@ -119,14 +196,34 @@ def validate_config_read(config_definition_key: str, config_key: str) -> None:
     config_key: str
         The key for the configuration.
     """
-    r_config_definition(config_definition_key)
+    await r_config_definition(config_definition_key)
     validate_config_key(config_key)
 
     return None
 
 
-def validate_config_update(
-    config_definition_key: str, config_key: str, data: dict
+def validate_expected_version(expected_version: Optional[int]) -> None:
+    """
+    Validates the version a configuration is expected to be at.
+
+    -- Parameters
+    expected_version: int, optional
+        The expected version.
+    """
+    if expected_version is not None and expected_version < 1:
+        raise validation_error(
+            field="expected_version",
+            extra_info="Expected version must be a positive integer.",
+        )
+
+
+@traced
+@timed("validate")
+async def validate_config_update(
+    config_definition_key: str,
+    config_key: str,
+    data: dict,
+    expected_version: Optional[int] = None,
 ) -> None:
     """
     Validates the update of an existing configuration.
@@ -138,15 +235,71 @@ def validate_config_update(
         The key for the configuration to be updated.
     data: dict
         The updated data for the configuration.
+    expected_version: int, optional
+        The version the configuration is expected to be at.
     """
     validate_config_definition_key(config_definition_key)
     validate_config_key(config_key)
-    validate_config_data(config_definition_key, data)
+    validate_expected_version(expected_version)
+    await validate_config_data(config_definition_key, data)
 
     return None
 
 
-def validate_config_deletion(config_definition_key: str, config_key: str) -> None:
+@traced
+@timed("validate")
+async def validate_config_patch(
+    config_definition_key: str,
+    config_key: str,
+    patch: dict,
+    expected_version: Optional[int] = None,
+) -> bool:
+    """
+    Validates a JSON Merge Patch of an existing configuration, against only
+    the parts of the schema it touches when the schema allows it.
+
+    -- Parameters
+    config_definition_key: str
+        The key for the configuration definition.
+    config_key: str
+        The key for the configuration to be patched.
+    patch: dict
+        The merge patch for the configuration data.
+    expected_version: int, optional
+        The version the configuration is expected to be at.
+
+    -- Returns
+    bool
+        True if the patch was validated, False if the patched document has to
+        be validated whole.
+    """
+    validate_config_definition_key(config_definition_key)
+    validate_config_key(config_key)
+    validate_expected_version(expected_version)
+
+    if not patch:
+        raise validation_error(
+            field="patch", extra_info="Patch must change at least one field."
+        )
+
+    config_definition = await r_config_definition(config_definition_key)
+    json_schema = config_definition.get("json_schema")
+
+    if not json_schema:
+        return True
+
+    validator = validator_cache.get(config_definition_key, json_schema)
+
+    try:
+        with span("jsonschema.validate_patch"):
+            return validator.validate_patch(patch)
+    except jsonschema.ValidationError as e:
+        raise validation_error("data", e.message.split("\n", 1)[0])
+
+
+@traced
+@timed("validate")
+async def validate_config_deletion(config_definition_key: str, config_key: str) -> None:
     """
     Validates the deletion of a configuration.
 
@@ -156,13 +309,15 @@ def validate_config_deletion(config_definition_key: str, config_key: str) -> Non
     config_key: str
         The key for the configuration.
     """
-    r_config_definition(config_definition_key)
+    await r_config_definition(config_definition_key)
     validate_config_key(config_key)
 
     return None
 
 
-def validate_config_list(
+@traced
+@timed("validate")
+async def validate_config_list(
     config_definition_key: str,
     page: int,
     limit: int,
@@ -170,6 +325,8 @@ def validate_config_list(
     sort_order: str,
     search: str,
     request: Request,
+    cursor: str = None,
+    count: str = "exact",
 ) -> None:
     """
     Validates the listing of configurations.
@@ -189,12 +346,26 @@ def validate_config_list(
         The search term to validate.
     request: Request
         The request object.
+    cursor: str, optional
+        The cursor to continue listing from. Defaults to None.
+    count: str, optional
+        How the total is counted. Defaults to "exact".
     """
-    config_definition = r_config_definition(config_definition_key)
-    indexes = config_definition.get("indexes", [])
+    config_definition = await r_config_definition(config_definition_key)
+    indexes = [
+        split_index(index)[0] for index in config_definition.get("indexes") or []
+    ]
 
     sortable_fields = {"config_key", "created_at", "modified_at", *indexes}
-    query_fields = {"page", "limit", "sort_by", "sort_order", "search"}
+    query_fields = {
+        "page",
+        "limit",
+        "sort_by",
+        "sort_order",
+        "search",
+        "cursor",
+        "count",
+    }
 
     filterable_fields = {
         field
@@ -209,6 +380,13 @@ def validate_config_list(
                 extra_info=f"Invalid query parameter. Must be one of: 'created_at', 'modified_at' or indexes",
             )
 
-    validate_list_params(sortable_fields, page, limit, sort_by, sort_order, search)
+    validate_list_params(
+        sortable_fields, page, limit, sort_by, sort_order, search, count
+    )
+
+    if cursor and page != 1:
+        raise validation_error(
+            field="cursor", extra_info="Cursor cannot be combined with a page number."
+        )
 
     return None
@@ -6,102 +6,533 @@
 
 """
 
-from psycopg2 import connect
+import time
+import asyncio
+import weakref
+from collections import Counter
+from collections.abc import Mapping
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, List, Optional
+from psycopg import AsyncClientCursor, AsyncConnection
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.utils.settings.config import settings
+from app.utils.exceptions.logger import JSONMessage
+from app.utils.metrics.utils import QUERY_DURATION
+from app.utils.tracing.utils import span
+from app.utils.timing.utils import measure
 from app.utils.data.queries import (
     QUERY_CREATE_TABLE,
     QUERY_CREATE_INDEX,
+    QUERY_CREATE_CHANGE_LOG,
+    QUERY_CREATE_MERGE_PATCH,
+    QUERY_MIGRATE_CONFIG_VERSION,
+    QUERY_NOTIFY,
+    QUERY_BOUNDED_COUNT,
+    QUERY_PLANNED_COUNT,
 )
 import logging
 
 logger = logging.getLogger("api-logger")
 
+DDL_STATEMENTS = {"CREATE", "ALTER", "DROP", "DO", "TRUNCATE", "COMMENT"}
+
+SLOW_QUERY_MAX_SQL = 1000
+SLOW_QUERY_MAX_PARAMS = 20
+
+
+class RequestQueries:
+    """
+    Counts the queries a request executes until its response starts. Queries
+    run while a response is streamed are not counted, and only the kinds of
+    the first `budget + 1` queries are kept.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.count = 0
+        self.kinds: List[str] = []
+        self.closed = False
+
+    def add(self, kind: str):
+        """
+        Count a query, unless the response has started.
+
+        -- Parameters
+        kind: str
+            The kind of the query.
+        """
+        if self.closed:
+            return
+
+        self.count += 1
+        if len(self.kinds) <= self.budget:
+            self.kinds.append(kind)
+
+
+request_queries: ContextVar[Optional[RequestQueries]] = ContextVar(
+    "request_queries", default=None
+)
+
 
 class DataStore:
     """
-    DataStore class to manage the connection to the database and the internal table.
+    DataStore class to manage the async connection pool to the database and the
+    internal table.
     """
 
     def __init__(self):
-        self.connection = None
-        self._create_connection()
-        self._initialize_table()
+        self.pool = None
+        self._released_at = weakref.WeakKeyDictionary()
+        self._subscriptions = {}
+        self._listener = None
 
-    def __del__(self):
-        self._close_connection()
+    async def open(self):
+        """
+        Open the connection pool, initialize the internal table and start
+        listening for notifications on the subscribed channels.
+        """
+        await self._create_pool()
+        await self._initialize_table()
+
+        if self._subscriptions:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self):
+        """
+        Stop the notification listener and close the connection pool.
+        """
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+        await self._close_pool()
+
+    def subscribe(self, channel: str, callback: Callable[[Optional[str]], None]):
+        """
+        Register a callback for notifications published on a channel.
+
+        -- Parameters
+        channel: str
+            The channel to listen on.
+        callback: Callable[[Optional[str]], None]
+            Called with the payload of each notification, or with None whenever
+            the listener (re)connects and notifications may have been missed.
+        """
+        self._subscriptions.setdefault(channel, []).append(callback)
+
+    async def notify(self, channel: str, payload: str):
+        """
+        Publish a notification to every process listening on a channel.
+
+        -- Parameters
+        channel: str
+            The channel to publish on.
+        payload: str
+            The payload of the notification.
+        """
+        await self.execute_query(QUERY_NOTIFY, (channel, payload), kind="notify")
 
-    def _create_internal_table(self):
+    async def estimate_count(
+        self, table: str, clause_query: str = "", clause_params: tuple = ()
+    ) -> tuple:
+        """
+        Count the rows of a table matching a WHERE clause, cheaply.
+
+        Up to `COUNT_ESTIMATE_THRESHOLD` rows are counted exactly; past that,
+        the number of rows the planner expects from its statistics is used.
+
+        -- Parameters
+        table: str
+            The table to count rows in.
+        clause_query: str, optional
+            The WHERE clause for the count. Defaults to "".
+        clause_params: tuple, optional
+            The parameters for the WHERE clause. Defaults to ().
+
+        -- Returns
+        tuple
+            The number of rows and whether it is exact.
+        """
+        threshold = settings.COUNT_ESTIMATE_THRESHOLD
+
+        query = QUERY_BOUNDED_COUNT.format(table=table, clause_query=clause_query)
+        result = await self.execute_query(
+            query, (*clause_params, threshold), mode="retrieve", kind="count"
+        )
+        count = result["response"][0]["count"]
+        if count < threshold:
+            return count, True
+
+        query = QUERY_PLANNED_COUNT.format(table=table, clause_query=clause_query)
+        result = await self.execute_query(
+            query, clause_params, mode="retrieve", kind="count"
+        )
+        planned = result["response"][0]["QUERY PLAN"][0]["Plan"]["Plan Rows"]
+        return max(int(planned), threshold), False
+
+    def _dispatch(self, channel: str, payload: Optional[str]):
+        """
+        Hand a notification over to the callbacks subscribed to its channel.
+        """
+        for callback in self._subscriptions.get(channel, []):
+            try:
+                callback(payload)
+            except Exception as e:
+                logger.exception(f"Notification callback failed: {e}")
+
+    async def _listen(self):
+        """
+        Keep a dedicated connection listening on the subscribed channels,
+        reconnecting with a capped exponential backoff.
+        """
+        delay = 1.0
+        while True:
+            try:
+                connection = await AsyncConnection.connect(
+                    **self._connection_kwargs(
+                        host=settings.DB_LISTEN_HOST or settings.DB_HOST,
+                        port=settings.DB_LISTEN_PORT or settings.DB_PORT,
+                    )
+                )
+                async with connection:
+                    for channel in self._subscriptions:
+                        await connection.execute(f"LISTEN {channel};")
+                    logger.info("DataStore Listener Established!")
+
+                    delay = 1.0
+                    for channel in self._subscriptions:
+                        self._dispatch(channel, None)
+
+                    async for notification in connection.notifies():
+                        self._dispatch(notification.channel, notification.payload)
+
+            except Exception as e:
+                logger.warning(f"DataStore listener disconnected: {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60.0)
+
+    def _connection_kwargs(self, **overrides) -> dict:
+        """
+        Build the keyword arguments used to open a database connection.
+        """
+        return {
+            "dbname": settings.DB_NAME,
+            "user": settings.DB_USER,
+            "password": settings.DB_PASSWORD,
+            "host": settings.DB_HOST,
+            "port": settings.DB_PORT,
+            "autocommit": True,
+            "cursor_factory": AsyncClientCursor,
+            **overrides,
+        }
+
+    async def _create_internal_table(self):
         """
         Create the internal table to store the configuration
         """
         query = QUERY_CREATE_TABLE
-        self.execute_query(query)
+        await self.execute_query(query, kind="ddl")
 
-    def _create_internal_indexes(self):
+    async def _create_internal_indexes(self):
         """
         Create the indexes on the internal table
         """
         query = QUERY_CREATE_INDEX
-        self.execute_query(query)
+        await self.execute_query(query, kind="ddl")
+
+    async def _create_change_log(self):
+        """
+        Create the change log of configurations and its sequence counter
+        """
+        query = QUERY_CREATE_CHANGE_LOG
+        await self.execute_query(query, kind="ddl")
+
+    async def _create_merge_patch(self):
+        """
+        Create the function applying JSON Merge Patches to configuration data
+        """
+        query = QUERY_CREATE_MERGE_PATCH
+        await self.execute_query(query, kind="ddl")
 
-    def _create_connection(self):
+    async def _migrate_config_tables(self):
         """
-        Create a connection to the database
+        Add the columns introduced since a configuration table was created
+        """
+        query = QUERY_MIGRATE_CONFIG_VERSION
+        await self.execute_query(query, kind="ddl")
+
+    async def _check_connection(self, connection):
+        """
+        Ping a pooled connection that sat idle longer than the health check interval.
+        """
+        released_at = self._released_at.get(connection)
+        if released_at is None:
+            return
+
+        if time.monotonic() - released_at > settings.DB_POOL_HEALTH_CHECK_INTERVAL:
+            await AsyncConnectionPool.check_connection(connection)
+
+    async def _mark_released(self, connection):
+        """
+        Record when a connection was returned to the pool.
+        """
+        self._released_at[connection] = time.monotonic()
+
+    async def _create_pool(self):
+        """
+        Create the connection pool to the database
         """
         logger.info("Attempting to connect to the database...")
+        pool = AsyncConnectionPool(
+            kwargs=self._connection_kwargs(),
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_MAX_SIZE,
+            timeout=settings.DB_POOL_TIMEOUT,
+            max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+            check=self._check_connection,
+            reset=self._mark_released,
+            open=False,
+        )
         try:
-            self.connection = connect(
-                dbname=settings.DB_NAME,
-                user=settings.DB_USER,
-                password=settings.DB_PASSWORD,
-                host=settings.DB_HOST,
-                port=settings.DB_PORT,
-            )
-            self.connection.autocommit = True
-            logger.info("DataStore Connection Established!")
+            await pool.open(wait=True, timeout=settings.DB_POOL_TIMEOUT)
+            self.pool = pool
+            logger.info("DataStore Connection Pool Established!")
 
         except Exception as e:
             logger.exception(f"DataStore set-up failed: {e}")
-            self.connection = None
+            await pool.close()
+            self.pool = None
 
-    def _initialize_table(self):
+    async def _initialize_table(self):
         """
-        Initialize the table and its indices.
+        Initialize the tables and their indices.
         """
-        self._create_internal_table()
-        self._create_internal_indexes()
+        await self._create_internal_table()
+        await self._create_internal_indexes()
+        await self._create_change_log()
+        await self._create_merge_patch()
+        await self._migrate_config_tables()
 
-    def _close_connection(self):
+    async def _close_pool(self):
         """
-        Close the connection to the database
+        Close the connection pool to the database
         """
-        if self.connection:
-            self.connection.close()
-            logger.info("DataStore Connection Closed!")
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            logger.info("DataStore Connection Pool Closed!")
 
-    def execute_query(self, query, params=(), mode="submit") -> dict:
+    @staticmethod
+    def _params_shape(params: Any) -> Any:
         """
-        Execute a SQL query using a cursor, with error handling and cleanup.
+        Describe the parameters of a query by their types and sizes, without
+        their values, for the slow query log.
+        """
+
+        def shape(value: Any) -> str:
+            if isinstance(value, (str, bytes, list, tuple, dict)):
+                return f"{type(value).__name__}[{len(value)}]"
+            return type(value).__name__
+
+        if isinstance(params, Mapping):
+            return {key: shape(value) for key, value in params.items()}
+
+        shapes = [shape(value) for value in params or ()]
+        if len(shapes) > SLOW_QUERY_MAX_PARAMS:
+            hidden = len(shapes) - SLOW_QUERY_MAX_PARAMS
+            shapes = shapes[:SLOW_QUERY_MAX_PARAMS] + [f"... {hidden} more"]
+
+        return shapes
+
+    def _log_slow_query(
+        self, kind: str, query: str, params: Any, duration: float, rows: int
+    ):
+        """
+        Log a query slower than `SLOW_QUERY_THRESHOLD`, with its SQL template
+        and the shape of its parameters.
+        """
+        sql = " ".join(query.split())
+        if len(sql) > SLOW_QUERY_MAX_SQL:
+            sql = sql[:SLOW_QUERY_MAX_SQL] + "..."
+
+        logger.warning(
+            "Slow Query: %s",
+            JSONMessage(
+                {
+                    "kind": kind,
+                    "sql": sql,
+                    "params": self._params_shape(params),
+                    "duration_ms": round(duration * 1000, 3),
+                    "rows_affected": rows,
+                }
+            ),
+        )
+
+    async def execute_query(
+        self, query, params=(), mode="submit", *, kind: str
+    ) -> dict:
+        """
+        Execute a SQL query using a cursor on a pooled connection, with error
+        handling and cleanup.
+
+        Its duration is observed under `kind`, reported to the timer of the
+        request, and traced in a span carrying the SQL, without its
+        parameters. Queries slower than `SLOW_QUERY_THRESHOLD` are logged, and
+        each one counts towards the query budget of the request.
+
+        `kind` names the operation the query is part of, such as "r_config"
+        or "l_config", or "ddl" for schema changes and "count" for counts.
         """
         response = None
-        if not self.connection:
+        if not self.pool:
             raise RuntimeError("No database connection defined!")
-        try:
-            cursor = self.connection.cursor()
-            cursor.execute(query, params)
-            if mode == "retrieve":
-                response = [
-                    dict(zip([column[0] for column in cursor.description], row))
-                    for row in cursor.fetchall()
-                ]
-            rows_affected = cursor.rowcount
-            cursor.close()
 
-        except Exception as e:
-            logger.exception(f"Query execution failed: {e}")
-            raise e
+        queries = request_queries.get()
+        if queries is not None:
+            queries.add(kind)
+
+        with span(
+            f"query {kind}",
+            {"db.system": "postgresql", "db.statement": query},
+        ) as query_span, measure("db"):
+            try:
+                async with self.pool.connection() as connection:
+                    start_time = time.perf_counter()
+                    cursor = connection.cursor(row_factory=dict_row)
+                    try:
+                        await cursor.execute(query, params)
+                        if mode == "retrieve":
+                            response = await cursor.fetchall()
+                        rows_affected = cursor.rowcount
+                        await cursor.close()
+                    finally:
+                        duration = time.perf_counter() - start_time
+                        QUERY_DURATION.labels(kind).observe(duration)
+
+            except Exception as e:
+                logger.exception(f"Query execution failed: {e}")
+                raise e
+
+            if query_span is not None:
+                query_span.set_attribute("db.rows_affected", rows_affected)
+
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        if threshold and duration >= threshold:
+            self._log_slow_query(kind, query, params, duration, rows_affected)
 
         return {
             "rows_affected": rows_affected,
             "response": response,
         }
+
+    async def stream_query(
+        self, query, params=(), batch_size: Optional[int] = None, *, kind: str
+    ) -> AsyncIterator[dict]:
+        """
+        Execute a SQL query through a server-side cursor and yield its rows,
+        fetching `batch_size` rows at a time so memory stays flat however many
+        rows the query returns.
+
+        The pooled connection is held until the iterator is exhausted or closed.
+        Opening the cursor is observed under `kind`, like `execute_query`.
+        """
+        if not self.pool:
+            raise RuntimeError("No database connection defined!")
+        try:
+            async with self.pool.connection() as connection:
+                async with connection.transaction():
+                    cursor = connection.cursor(name="stream", row_factory=dict_row)
+                    cursor.itersize = batch_size or settings.EXPORT_BATCH_SIZE
+                    try:
+                        start_time = time.perf_counter()
+                        with span(
+                            f"query {kind}",
+                            {"db.system": "postgresql", "db.statement": query},
+                        ):
+                            await cursor.execute(query, params)
+                        QUERY_DURATION.labels(kind).observe(
+                            time.perf_counter() - start_time
+                        )
+
+                        async for row in cursor:
+                            yield row
+                    finally:
+                        await cursor.close()
+
+        except Exception as e:
+            logger.exception(f"Query streaming failed: {e}")
+            raise e
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware counting the queries each request executes before its
+    response starts, and warning of the requests executing more than
+    `QUERY_BUDGET`. The queries of streamed responses, such as the heartbeats
+    of an event stream or the batches of an export, are not counted.
+
+    It must run inside ErrorHandlingMiddleware, whose request ID the warning
+    carries.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Handle a request, counting its queries.
+
+        -- Parameters
+        scope: Scope
+            The connection scope.
+        receive: Receive
+            Receives the request messages.
+        send: Send
+            Sends the response messages.
+        """
+        budget = settings.QUERY_BUDGET
+        if not budget or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(budget)
+
+        async def send_closing(message: Message):
+            if message["type"] == "http.response.start":
+                queries.closed = True
+
+            await send(message)
+
+        token = request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send_closing)
+        finally:
+            request_queries.reset(token)
+
+            if queries.count > budget:
+                route = scope.get("route")
+                logger.warning(
+                    "Query Budget Exceeded: %s",
+                    JSONMessage(
+                        {
+                            "request_id": scope.get("state", {}).get(
+                                "request_id", "N/A"
+                            ),
+                            "method": scope["method"],
+                            "route": getattr(route, "path", scope["path"]),
+                            "queries": queries.count,
+                            "budget": budget,
+                            "kinds": dict(Counter(queries.kinds)),
+                        }
+                    ),
+                )
+
+
+data_store = DataStore()
@@ -31,3 +31,103 @@ ON {settings.INTERNAL_TABLE} (created_at);
 CREATE INDEX IF NOT EXISTS idx_{settings.DB_NAME}_modified_at
 ON {settings.INTERNAL_TABLE} (modified_at);
 """
+
+QUERY_CREATE_CHANGE_LOG = f"""
+CREATE TABLE IF NOT EXISTS {settings.CHANGE_LOG_TABLE} (
+    seq BIGINT PRIMARY KEY,
+    config_definition_key VARCHAR(255) NOT NULL,
+    config_key VARCHAR(255),
+    operation VARCHAR(16) NOT NULL,
+    data JSONB,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS {settings.CHANGE_LOG_TABLE}_horizon (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    seq BIGINT NOT NULL
+);
+
+INSERT INTO {settings.CHANGE_LOG_TABLE}_horizon (seq) VALUES (0) ON CONFLICT DO NOTHING;
+
+DROP TABLE IF EXISTS {settings.CHANGE_LOG_TABLE}_seq;
+
+CREATE INDEX IF NOT EXISTS idx_{settings.CHANGE_LOG_TABLE}_definition
+ON {settings.CHANGE_LOG_TABLE} (config_definition_key, seq);
+
+CREATE INDEX IF NOT EXISTS idx_{settings.CHANGE_LOG_TABLE}_config
+ON {settings.CHANGE_LOG_TABLE} (config_definition_key, config_key, seq);
+
+CREATE INDEX IF NOT EXISTS idx_{settings.CHANGE_LOG_TABLE}_changed_at
+ON {settings.CHANGE_LOG_TABLE} (changed_at);
+"""
+
+QUERY_NOTIFY = """
+SELECT pg_notify(%s, %s);
+"""
+
+QUERY_BOUNDED_COUNT = """
+SELECT COUNT(*) FROM (SELECT 1 FROM {table} {clause_query} LIMIT %s) AS bounded;
+"""
+
+QUERY_PLANNED_COUNT = """
+EXPLAIN (FORMAT JSON) SELECT 1 FROM {table} {clause_query};
+"""
+
+MERGE_PATCH_FUNCTION = "tartarus_merge_patch"
+
+QUERY_CREATE_MERGE_PATCH = f"""
+CREATE OR REPLACE FUNCTION {MERGE_PATCH_FUNCTION}(target JSONB, patch JSONB)
+RETURNS JSONB
+LANGUAGE plpgsql IMMUTABLE
+AS $$
+DECLARE
+    patch_key TEXT;
+    patch_value JSONB;
+BEGIN
+    IF jsonb_typeof(patch) IS DISTINCT FROM 'object' THEN
+        RETURN patch;
+    END IF;
+
+    IF jsonb_typeof(target) IS DISTINCT FROM 'object' THEN
+        target := '{{}}'::JSONB;
+    END IF;
+
+    FOR patch_key, patch_value IN SELECT * FROM jsonb_each(patch) LOOP
+        IF jsonb_typeof(patch_value) = 'null' THEN
+            target := target - patch_key;
+        ELSE
+            target := jsonb_set(
+                target,
+                ARRAY[patch_key],
+                {MERGE_PATCH_FUNCTION}(target -> patch_key, patch_value)
+            );
+        END IF;
+    END LOOP;
+
+    RETURN target;
+END $$;
+"""
+
+QUERY_MIGRATE_CONFIG_VERSION = f"""
+DO $$
+DECLARE
+    config_table TEXT;
+BEGIN
+    FOR config_table IN
+        SELECT tables.table_name
+        FROM {settings.INTERNAL_TABLE} AS definitions
+        JOIN information_schema.tables AS tables
+        ON tables.table_schema = current_schema()
+        AND tables.table_name = lower(definitions.config_definition_key)
+        WHERE NOT EXISTS (
+            SELECT 1 FROM information_schema.columns AS columns
+            WHERE columns.table_schema = tables.table_schema
+            AND columns.table_name = tables.table_name
+            AND columns.column_name = 'version'
+        )
+    LOOP
+        EXECUTE 'ALTER TABLE ' || quote_ident(config_table)
+        || ' ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1';
+    END LOOP;
+END $$;
+"""
@@ -0,0 +1,137 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from typing import Optional
+
+from fastapi import Response, status
+
+
+def parse_etags(header: Optional[str], weak: bool = True) -> list:
+    """
+    Parse the entity tags of an `If-None-Match` or `If-Match` header.
+
+    -- Parameters
+    header: str, optional
+        The value of the header.
+    weak: bool, optional
+        Whether tags are compared weakly, as RFC 9110 requires for
+        `If-None-Match`. `If-Match` compares strongly, so weak tags are
+        dropped there. Defaults to True.
+
+    -- Returns
+    list
+        The opaque tags, or ["*"] if any current representation matches.
+    """
+    if not header:
+        return []
+
+    tags = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return ["*"]
+        if tag.startswith("W/"):
+            if not weak:
+                continue
+            tag = tag[2:]
+        tags.append(tag.strip('"'))
+
+    return tags
+
+
+def match_etag(etag: str, etags: list) -> bool:
+    """
+    Check whether an entity tag is matched by the tags a client sent.
+
+    -- Parameters
+    etag: str
+        The opaque tag of the current representation.
+    etags: list
+        The tags parsed from `If-None-Match`.
+
+    -- Returns
+    bool
+        True if the client already has the current representation.
+    """
+    return etag in etags or "*" in etags
+
+
+def version_etag(key: str, version: int) -> str:
+    """
+    Build the opaque tag of a versioned entity. Every write bumps the version,
+    so the tag changes with any write and is never hashed from the row.
+
+    -- Parameters
+    key: str
+        The key of the entity.
+    version: int
+        The version the entity is at.
+
+    -- Returns
+    str
+        The opaque tag, as "{key}-{version}".
+    """
+    return f"{key}-{version}"
+
+
+def parse_versions(key: str, etags: list) -> list:
+    """
+    Parse the versions named by the tags a client sent for an entity, so they
+    can be compared against its version directly.
+
+    -- Parameters
+    key: str
+        The key of the entity.
+    etags: list
+        The opaque tags parsed from `If-Match` or `If-None-Match`.
+
+    -- Returns
+    list
+        The versions of the tags built by `version_etag` for this entity.
+        Any other tag names no version and is left out.
+    """
+    prefix = f"{key}-"
+
+    return [
+        int(tag[len(prefix) :])
+        for tag in etags
+        if tag.startswith(prefix) and tag[len(prefix) :].isdigit()
+    ]
+
+
+def quote_etag(etag: str) -> str:
+    """
+    Format an opaque tag as the value of a strong `ETag` header.
+
+    -- Parameters
+    etag: str
+        The opaque tag.
+
+    -- Returns
+    str
+        The quoted tag.
+    """
+    return f'"{etag}"'
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Build the empty `304 Not Modified` response for a conditional read.
+
+    -- Parameters
+    etag: str
+        The opaque tag of the current representation.
+
+    -- Returns
+    Response
+        The response, carrying the `ETag` it was validated against.
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": quote_etag(etag)},
+    )
@@ -66,6 +66,24 @@ def conflict_error(entity: str, key: str):
     )
 
 
+def contention_error(entity: str, key: str):
+    """
+    Return a conflict error for an entity modified concurrently on every try.
+
+    -- Parameters
+    entity: str
+        The entity that kept being modified.
+    key: str
+        The key of the entity.
+    """
+
+    return APIError(
+        status_code=status.HTTP_409_CONFLICT,
+        error_type="conflict_error",
+        detail=f"{entity.capitalize()} with '{key}' kept being modified concurrently!",
+    )
+
+
 def not_found_error(entity: str, key: str):
     """
     Return a not found error.
@@ -81,6 +99,42 @@ def not_found_error(entity: str, key: str):
     )
 
 
+def precondition_failed_error(entity: str, key: str):
+    """
+    Return a precondition failed error.
+
+    -- Parameters
+    entity: str
+        The entity that was modified in the meantime.
+    key: str
+        The key of the entity.
+    """
+
+    return APIError(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        error_type="precondition_failed_error",
+        detail=f"{entity.capitalize()} with '{key}' has been modified since it was read!",
+    )
+
+
+def gone_error(entity: str, key: str):
+    """
+    Return a gone error.
+
+    -- Parameters
+    entity: str
+        The entity that is no longer available.
+    key: str
+        The key of the entity.
+    """
+
+    return APIError(
+        status_code=status.HTTP_410_GONE,
+        error_type="gone_error",
+        detail=f"{entity.capitalize()} after '{key}' have been pruned!",
+    )
+
+
 def validation_error(field: str, extra_info: str = ""):
     """
     Return a validation error.
@@ -9,7 +9,8 @@
 import time
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from logging import getLogger
 
 from app.models.common import BaseResponse, Status
@@ -79,30 +80,59 @@ async def api_error_handler(request: Request, exc: APIError):
     )
 
 
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ErrorHandlingMiddleware:
+    """
+    ASGI middleware tagging every response with the request and correlation
+    IDs, turning unhandled exceptions into JSON error responses and logging
+    each request once its response is sent.
+
+    It wraps `send` instead of buffering the response, so streamed responses
+    pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """
-        Middleware to handle exceptions and return a JSON response with the error message.
+        Handle a request, adding the ID headers and catching exceptions.
 
         -- Parameters
-        request: Request
-            The request object.
-        call_next: Callable
-            The next function to call.
+        scope: Scope
+            The connection scope.
+        receive: Receive
+            Receives the request messages.
+        send: Send
+            Sends the response messages.
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
         headers = request.headers
         request.state.request_id = headers.get("X-Request-ID", "N/A")
         request.state.correlation_id = headers.get("X-Correlation-ID", "N/A")
 
-        try:
-            start_time = time.perf_counter_ns()
+        status_code = 500
+        response_started = False
 
-            response = await call_next(request)
+        async def send_with_ids(message: Message):
+            nonlocal status_code, response_started
 
-            response.headers["X-Request-ID"] = request.state.request_id
-            response.headers["X-Correlation-ID"] = request.state.correlation_id
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
 
-            return response
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Request-ID"] = request.state.request_id
+                response_headers["X-Correlation-ID"] = request.state.correlation_id
+
+            await send(message)
+
+        start_time = time.perf_counter_ns()
+        try:
+            await self.app(scope, receive, send_with_ids)
 
         except Exception as e:
             error = handle_exception(e)
@@ -110,18 +140,21 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
             request.state.traceback = error.detail
             logger.exception(f"Unhandled Exception: {str(e)}", exc_info=True)
 
-            return self.json_response(
+            if response_started:
+                raise
+
+            response = self.json_response(
                 Status.error,
                 error.status_code,
                 error.detail,
                 request.state.request_id,
                 request.state.correlation_id,
             )
+            status_code = response.status_code
+            await response(scope, receive, send)
+
         finally:
             end_time = time.perf_counter_ns()
-            status_code = (
-                getattr(response, "status_code", 500) if "response" in locals() else 500
-            )
 
             logger_utility.log(
                 request_id=request.state.request_id,
@@ -133,11 +166,7 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
                 },
                 response={
                     "status": status_code,
-                    "traceback": (
-                        request.state.traceback
-                        if hasattr(request.state, "traceback")
-                        else None
-                    ),
+                    "traceback": getattr(request.state, "traceback", None),
                 },
                 duration_ms=(end_time - start_time) / 1_000_000,
             )
@@ -7,11 +7,94 @@
 """
 
 import json
+import queue
+import random
 import logging
+import logging.config
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.utils.settings.config import settings
 
 logger = logging.getLogger("api-logger")
 
 
+class JSONMessage:
+    """
+    Log argument encoded as JSON only once the record is formatted, so the
+    encoding happens on the thread writing the log.
+    """
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: dict):
+        self.data = data
+
+    def __str__(self) -> str:
+        return json.dumps(self.data)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Queue handler that never blocks the caller. Records arriving while the
+    queue is full are dropped and counted, and a warning with the number
+    dropped is queued as soon as there is room again.
+
+    Records are queued as they are, to be formatted by the listener thread.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        if self._unreported:
+            try:
+                self.queue.put_nowait(self._dropped_record(self._unreported))
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+
+    def _dropped_record(self, count: int) -> logging.LogRecord:
+        """
+        Build the warning reporting records dropped since the last report.
+        """
+        return logging.makeLogRecord(
+            {
+                "name": logger.name,
+                "levelno": logging.WARNING,
+                "levelname": logging.getLevelName(logging.WARNING),
+                "pathname": __file__,
+                "filename": __name__.rsplit(".", 1)[-1] + ".py",
+                "msg": "Dropped %d log records, the log queue was full.",
+                "args": (count,),
+            }
+        )
+
+
+class LogListener(QueueListener):
+    """
+    Listener writing out the records queued for a set of loggers to the
+    handlers those loggers had.
+    """
+
+    def __init__(self, queue_handler: DroppingQueueHandler, logger_handlers: dict):
+        handlers = dict.fromkeys(h for hs in logger_handlers.values() for h in hs)
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.logger_handlers = logger_handlers
+
+
 class LoggerUtility:
     """
     Logger Utility to standardize log format and include additional information.
@@ -26,6 +109,14 @@ class LoggerUtility:
         duration_ms,
         extras=None,
     ):
+        """
+        Log a request. Only `LOG_SUCCESS_SAMPLE_RATE` of the requests that
+        succeeded are logged; failed requests always are.
+        """
+        status_code = response.get("status", 500)
+        if status_code < 400 and random.random() >= settings.LOG_SUCCESS_SAMPLE_RATE:
+            return
+
         log_data = {
             "request_id": request_id,
             "correlation_id": correlation_id,
@@ -35,7 +126,7 @@ class LoggerUtility:
             "extras": extras,
         }
 
-        logger.info("API Log: %s", json.dumps(log_data))
+        logger.info("API Log: %s", JSONMessage(log_data))
 
 
 def get_log_config():
@@ -72,5 +163,49 @@ def get_log_config():
     }
 
 
+def start_log_queue() -> DroppingQueueHandler:
+    """
+    Route the records of the application loggers through a bounded queue,
+    written out by a listener thread, so logging never waits on the output.
+
+    -- Returns
+    DroppingQueueHandler
+        The handler queuing the records, which counts those dropped.
+    """
+    global log_listener
+
+    if log_listener:
+        return log_listener.queue_handler
+
+    loggers = [logging.getLogger(), logger]
+    handlers = {log: log.handlers for log in loggers}
+
+    queue_handler = DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    for log in loggers:
+        log.handlers = [queue_handler]
+
+    log_listener = LogListener(queue_handler, handlers)
+    log_listener.start()
+
+    return queue_handler
+
+
+def stop_log_queue():
+    """
+    Write out the records still queued, stop the listener thread and log
+    directly again.
+    """
+    global log_listener
+
+    if not log_listener:
+        return
+
+    log_listener.stop()
+    for log, handlers in log_listener.logger_handlers.items():
+        log.handlers = handlers
+    log_listener = None
+
+
 logging.config.dictConfig(get_log_config())
 logger_utility = LoggerUtility()
+log_listener: Optional[LogListener] = None
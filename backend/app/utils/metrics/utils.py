@@ -0,0 +1,144 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import time
+from typing import Any, Iterator
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.exceptions import logger as logging_utils
+
+REQUEST_DURATION = Histogram(
+    "tartarus_request_duration_seconds",
+    "Time taken to handle a request, until its response is sent.",
+    ["method", "route", "status"],
+)
+QUERY_DURATION = Histogram(
+    "tartarus_query_duration_seconds",
+    "Time taken to execute a query and fetch its rows.",
+    ["kind"],
+)
+VALIDATION_DURATION = Histogram(
+    "tartarus_validation_duration_seconds",
+    "Time taken to validate configuration data against its schema.",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1),
+)
+CACHE_REQUESTS = Counter(
+    "tartarus_cache_requests",
+    "Cache lookups, by cache and whether they hit.",
+    ["cache", "result"],
+)
+
+DEFINITION_CACHE_HITS = CACHE_REQUESTS.labels("definition", "hit")
+DEFINITION_CACHE_MISSES = CACHE_REQUESTS.labels("definition", "miss")
+VALIDATOR_CACHE_HITS = CACHE_REQUESTS.labels("validator", "hit")
+VALIDATOR_CACHE_MISSES = CACHE_REQUESTS.labels("validator", "miss")
+
+
+class DataStoreCollector(Collector):
+    """
+    Collects the usage of the connection pool and of the log queue when
+    metrics are scraped.
+
+    -- Parameters
+    data_store: DataStore
+        The data store whose pool is measured.
+    """
+
+    def __init__(self, data_store: Any):
+        self.data_store = data_store
+
+    def collect(self) -> Iterator:
+        pool = self.data_store.pool
+        if pool is not None:
+            stats = pool.get_stats()
+            for name, key, description in (
+                ("size", "pool_size", "Connections open, in use or not."),
+                ("available", "pool_available", "Connections open and idle."),
+                ("max", "pool_max", "The most connections the pool may open."),
+                ("waiting", "requests_waiting", "Requests waiting for a connection."),
+            ):
+                yield GaugeMetricFamily(
+                    f"tartarus_db_pool_{name}", description, value=stats.get(key, 0)
+                )
+
+        log_listener = logging_utils.log_listener
+        if log_listener is not None:
+            yield CounterMetricFamily(
+                "tartarus_log_records_dropped",
+                "Log records dropped because the log queue was full.",
+                value=log_listener.queue_handler.dropped,
+            )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware observing the duration of every request, labeled by the
+    path template of its route so the number of series stays bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Handle a request, timing it until its response is sent.
+
+        -- Parameters
+        scope: Scope
+            The connection scope.
+        receive: Receive
+            Receives the request messages.
+        send: Send
+            Sends the response messages.
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+            ).observe(time.perf_counter() - start_time)
+
+
+def r_metrics() -> Response:
+    """
+    Render every metric in the Prometheus text format.
+
+    -- Returns
+    Response
+        The metrics.
+    """
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,188 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import types
+from functools import lru_cache
+from typing import Any, Union, get_args, get_origin
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined, to_json, to_jsonable_python
+
+from app.utils.timing.utils import mark
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RawJSON(str):
+    """
+    JSON text, as selected from the database, spliced into a response as is.
+    """
+
+
+RAW_MARKER = "\x00RawJSON\x00"
+RAW_MARKER_JSON = '"\\u0000RawJSON\\u0000"'
+RAW_WALKED = (dict, list, tuple, RawJSON)
+
+
+def r_util_dumps(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON, with `orjson` when it is installed.
+
+    -- Parameters
+    value: Any
+        The value to encode.
+
+    -- Returns
+    bytes
+        The JSON text.
+    """
+    if orjson:
+        return orjson.dumps(value, default=to_jsonable_python)
+
+    return to_json(value)
+
+
+def r_util_encode(value: Any) -> str:
+    """
+    Encode a response envelope as JSON, splicing `RawJSON` text in verbatim.
+
+    Keys set to None are left out, like `response_model_exclude_none`. Raw
+    JSON is swapped for a marker while the envelope is encoded, and spliced in
+    where the markers ended up; it is never parsed.
+
+    -- Parameters
+    value: Any
+        The value to encode.
+
+    -- Returns
+    str
+        The JSON text.
+    """
+    raws = []
+
+    def mark(item: Any) -> Any:
+        if type(item) is RawJSON:
+            raws.append(item)
+            return RAW_MARKER
+        if type(item) is dict:
+            return {
+                key: mark(nested) if type(nested) in RAW_WALKED else nested
+                for key, nested in item.items()
+                if nested is not None
+            }
+        return [
+            mark(nested) if type(nested) in RAW_WALKED else nested for nested in item
+        ]
+
+    if type(value) in RAW_WALKED:
+        value = mark(value)
+    parts = r_util_dumps(value).decode().split(RAW_MARKER_JSON)
+
+    return parts[0] + "".join(raw + part for raw, part in zip(raws, parts[1:]))
+
+
+@lru_cache(maxsize=None)
+def r_util_fields(model: type) -> tuple:
+    """
+    Describe the fields of a response model, for shaping content after it.
+
+    -- Parameters
+    model: type
+        The response model.
+
+    -- Returns
+    tuple
+        The name, default, nested model and whether it holds a list of them,
+        for each field.
+    """
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation, many = field.annotation, False
+
+        if get_origin(annotation) in (Union, types.UnionType):
+            args = [arg for arg in get_args(annotation) if arg is not type(None)]
+            annotation = args[0] if len(args) == 1 else Any
+        if get_origin(annotation) is list:
+            annotation, many = get_args(annotation)[0], True
+
+        nested = annotation if isinstance(annotation, type) else None
+        if nested and not issubclass(nested, BaseModel):
+            nested = None
+
+        fields.append((name, field.get_default(), nested, many))
+
+    return tuple(fields)
+
+
+def r_util_shape(model: type, content: Any, exclude_none: bool = False) -> Any:
+    """
+    Shape trusted content after a response model without validating it: fill
+    in defaults, leave out unknown keys and, with `exclude_none`, fields set
+    to None. Values of fields that are not models are kept as they are.
+
+    -- Parameters
+    model: type
+        The response model.
+    content: Any
+        The content returned by the route.
+    exclude_none: bool, optional
+        Whether fields set to None are left out. Defaults to False.
+
+    -- Returns
+    Any
+        The content, ready to be encoded.
+    """
+    if isinstance(content, BaseModel):
+        content = dict(content)
+    if not isinstance(content, dict):
+        return content
+
+    shaped = {}
+    for name, default, nested, many in r_util_fields(model):
+        value = content.get(name, default)
+        if value is PydanticUndefined or (value is None and exclude_none):
+            continue
+
+        if nested and value is not None:
+            value = (
+                [r_util_shape(nested, item, exclude_none) for item in value]
+                if many
+                else r_util_shape(nested, value, exclude_none)
+            )
+
+        shaped[name] = value
+
+    return shaped
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with `orjson` when it is installed.
+
+    Hot read routes return it with their content shaped by `r_util_shape`, so
+    their responses skip `response_model` validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        mark("serialize")
+        return r_util_dumps(content)
+
+
+class RawJSONResponse(JSONResponse):
+    """
+    JSON response whose `RawJSON` values are spliced in without being decoded
+    and encoded again.
+    """
+
+    def render(self, content: Any) -> bytes:
+        mark("serialize")
+        return r_util_encode(content).encode("utf-8")
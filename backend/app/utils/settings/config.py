@@ -26,8 +26,85 @@ class Settings(BaseSettings):
         The database host.
     DB_PORT: str
         The database port.
+    DB_POOL_MIN_SIZE: int
+        The number of connections opened when the pool starts.
+    DB_POOL_MAX_SIZE: int
+        The maximum number of connections the pool may open.
+    DB_POOL_TIMEOUT: float
+        Seconds to wait for a free connection before failing.
+    DB_POOL_MAX_LIFETIME: float
+        Seconds after which a connection is recycled.
+    DB_POOL_HEALTH_CHECK_INTERVAL: float
+        Idle seconds after which a connection is pinged before reuse.
+    DB_LISTEN_HOST: str
+        The database host for LISTEN/NOTIFY, when DB_HOST is a transaction pooler.
+    DB_LISTEN_PORT: str
+        The database port for LISTEN/NOTIFY, when DB_PORT is a transaction pooler.
     INTERNAL_TABLE: str
         The internal table name.
+    DEFINITION_CACHE_TTL: float
+        Seconds a configuration definition is served from the process cache.
+    DEFINITION_CACHE_MAX_SIZE: int
+        The maximum number of configuration definitions held in the cache.
+    DEFINITION_CACHE_CHANNEL: str
+        The notification channel used to invalidate cached definitions.
+    SCHEMA_FAST_VALIDATION_THRESHOLD: int
+        Validations of a definition after which a code-generated validator is
+        built for it, or 0 to disable. Requires the `fast-validation` extra.
+    COUNT_ESTIMATE_THRESHOLD: int
+        Rows counted exactly by `count=estimated` listings before falling back to
+        the planner's estimate.
+    BULK_BATCH_SIZE: int
+        Configurations written per statement by bulk writes.
+    EXPORT_BATCH_SIZE: int
+        Configurations fetched from the export cursor and sent per chunk.
+    PATCH_RETRIES: int
+        Tries of a patch validated against the whole document, which only
+        applies at the version it read, before it fails with 409 Conflict.
+        A patch is always tried at least once, so 0 counts as 1.
+    CHANGE_LOG_TABLE: str
+        The table recording every configuration change, in order.
+    CHANGE_LOG_RETENTION: float
+        Seconds changes are kept in the change log before they are pruned, or
+        0 to keep them forever. Consumers further behind must resync.
+    CHANGE_LOG_PRUNE_INTERVAL: float
+        Seconds between two prunings of the change log.
+    CHANGE_CHANNEL: str
+        The notification channel used to wake up watchers of a definition.
+    WATCH_TIMEOUT: float
+        The longest a long-poll watch request waits for a change, in seconds.
+    WATCH_HEARTBEAT: float
+        Seconds between keep-alive comments on an idle event stream. Watchers
+        also re-read the change log this often, should a notification be lost.
+    LOG_QUEUE_SIZE: int
+        The most log records waiting to be written out. Records logged while
+        the queue is full are dropped and counted.
+    LOG_SUCCESS_SAMPLE_RATE: float
+        The fraction of successful requests logged, from 0 to 1. Failed
+        requests are always logged.
+    TRACING_EXPORTER: str
+        Where spans are exported: "otlp" to an OTLP/HTTP collector, "file" to
+        a file of JSON lines, or "" to turn tracing off. Requires the `tracing`
+        extra.
+    TRACING_OTLP_ENDPOINT: str
+        The OTLP/HTTP endpoint spans are exported to.
+    TRACING_FILE: str
+        The file spans are appended to.
+    TRACING_SERVICE_NAME: str
+        The service name spans are exported under.
+    TRACING_SAMPLE_RATE: float
+        The fraction of traces started here that are recorded, from 0 to 1.
+        Traces continued from a caller follow the caller's decision.
+    SLOW_QUERY_THRESHOLD: float
+        Seconds a query may take before it is logged as slow, with its SQL and
+        the shape of its parameters, or 0 to log none.
+    QUERY_BUDGET: int
+        The most queries a request is expected to execute. Requests executing
+        more are logged with a warning, or 0 to count none.
+    SERVER_TIMING: bool
+        Whether responses carry a `Server-Timing` header, splitting the time
+        of the request between the database, validation, serialization and
+        authentication.
     """
 
     API_KEY: str = "OPEN_SESAME"
@@ -38,7 +115,50 @@ class Settings(BaseSettings):
     DB_HOST: str = "127.0.0.1"
     DB_PORT: str = "5432"
 
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_MAX_LIFETIME: float = 3600.0
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = 30.0
+
+    DB_LISTEN_HOST: str = ""
+    DB_LISTEN_PORT: str = ""
+
     INTERNAL_TABLE: str = "tartarus_internal_cft"
 
+    DEFINITION_CACHE_TTL: float = 60.0
+    DEFINITION_CACHE_MAX_SIZE: int = 1024
+    DEFINITION_CACHE_CHANNEL: str = "tartarus_definition_changes"
+
+    SCHEMA_FAST_VALIDATION_THRESHOLD: int = 0
+
+    COUNT_ESTIMATE_THRESHOLD: int = 1000
+
+    BULK_BATCH_SIZE: int = 1000
+
+    EXPORT_BATCH_SIZE: int = 1000
+    PATCH_RETRIES: int = 3
+
+    CHANGE_LOG_TABLE: str = "tartarus_internal_changes"
+    CHANGE_LOG_RETENTION: float = 604800.0
+    CHANGE_LOG_PRUNE_INTERVAL: float = 3600.0
+    CHANGE_CHANNEL: str = "tartarus_config_changes"
+    WATCH_TIMEOUT: float = 30.0
+    WATCH_HEARTBEAT: float = 15.0
+
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+
+    TRACING_EXPORTER: str = ""
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_FILE: str = "traces.jsonl"
+    TRACING_SERVICE_NAME: str = "tartarus"
+    TRACING_SAMPLE_RATE: float = 1.0
+
+    SLOW_QUERY_THRESHOLD: float = 0.5
+    QUERY_BUDGET: int = 10
+
+    SERVER_TIMING: bool = False
+
 
 settings = Settings()
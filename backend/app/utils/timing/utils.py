@@ -0,0 +1,212 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, ContextManager, Dict, Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.settings.config import settings
+
+NO_PHASE = nullcontext()
+
+TIMED_PHASES = ("db", "validate", "serialize", "auth")
+
+
+class RequestTimer:
+    """
+    Splits the time of a request between the phases it goes through.
+
+    One phase runs at a time: a phase entered within another pauses it, so
+    the time of the definition lookups a validation makes counts as `db`
+    and not also as `validate`.
+    """
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._phase: Optional[str] = None
+        self._phase_started_at = self.started_at
+
+    def switch(self, phase: Optional[str]) -> Optional[str]:
+        """
+        End the running phase, if any, and start another.
+
+        -- Parameters
+        phase: str, optional
+            The phase to start, or None to run none.
+
+        -- Returns
+        str, optional
+            The phase that was running.
+        """
+        now = time.perf_counter()
+        previous = self._phase
+        if previous is not None:
+            self.durations[previous] = (
+                self.durations.get(previous, 0.0) + now - self._phase_started_at
+            )
+
+        self._phase, self._phase_started_at = phase, now
+        return previous
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """
+        Run a phase, resuming the one it interrupted when it ends.
+
+        -- Parameters
+        phase: str
+            The phase to run.
+        """
+        self.counts[phase] = self.counts.get(phase, 0) + 1
+        previous = self.switch(phase)
+        try:
+            yield
+        finally:
+            self.switch(previous)
+
+    def header(self) -> str:
+        """
+        Render the phases as a `Server-Timing` header, in milliseconds.
+
+        -- Returns
+        str
+            The header value.
+        """
+        total = time.perf_counter() - self.started_at
+        queries = self.counts.get("db", 0)
+        metrics = [
+            f'db;dur={self.durations.get("db", 0.0) * 1000:.2f};'
+            f'desc="{queries} {"query" if queries == 1 else "queries"}"'
+        ]
+        metrics.extend(
+            f"{phase};dur={self.durations[phase] * 1000:.2f}"
+            for phase in TIMED_PHASES[1:]
+            if phase in self.durations
+        )
+        metrics.append(f"total;dur={total * 1000:.2f}")
+
+        return ", ".join(metrics)
+
+
+request_timer: ContextVar[Optional[RequestTimer]] = ContextVar(
+    "request_timer", default=None
+)
+
+
+def measure(phase: str) -> ContextManager:
+    """
+    Report the time spent in a block to the timer of the request, if any.
+
+    -- Parameters
+    phase: str
+        The phase the block is part of.
+
+    -- Returns
+    ContextManager
+        Runs the block as the phase.
+    """
+    timer = request_timer.get()
+    if timer is None:
+        return NO_PHASE
+
+    return timer.phase(phase)
+
+
+def mark(phase: Optional[str]):
+    """
+    Attribute the time from now on to a phase, until another one starts.
+
+    -- Parameters
+    phase: str, optional
+        The phase to start, or None to run none.
+    """
+    timer = request_timer.get()
+    if timer is not None:
+        timer.switch(phase)
+
+
+def timed(phase: str) -> Callable:
+    """
+    Decorate a function, sync or async, to report its time to a phase.
+
+    -- Parameters
+    phase: str
+        The phase the function is part of.
+
+    -- Returns
+    Callable
+        The decorator.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if inspect.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with measure(phase):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with measure(phase):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware timing every request and sending its phases in the
+    `Server-Timing` header, when `SERVER_TIMING` is on.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Handle a request with a timer, adding its header to the response.
+
+        -- Parameters
+        scope: Scope
+            The connection scope.
+        receive: Receive
+            Receives the request messages.
+        send: Send
+            Sends the response messages.
+        """
+        if not settings.SERVER_TIMING or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                timer.switch(None)
+                MutableHeaders(scope=message).append("Server-Timing", timer.header())
+
+            await send(message)
+
+        token = request_timer.set(timer)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_timer.reset(token)
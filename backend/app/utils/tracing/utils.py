@@ -0,0 +1,216 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import functools
+import inspect
+import logging
+from contextlib import nullcontext
+from typing import IO, Any, Callable, ContextManager, Optional
+
+from fastapi import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.settings.config import settings
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    from opentelemetry.trace import SpanKind
+except ImportError:
+    TracerProvider = None
+
+logger = logging.getLogger("api-logger")
+
+NO_SPAN = nullcontext()
+
+TRACING_EXPORTERS = {"otlp", "file"}
+
+
+def span(name: str, attributes: Optional[dict] = None) -> ContextManager:
+    """
+    Start a span as a child of the current one, when tracing is on.
+
+    -- Parameters
+    name: str
+        The name of the span.
+    attributes: dict, optional
+        The attributes of the span. Defaults to None.
+
+    -- Returns
+    ContextManager
+        Yields the span, or None when tracing is off.
+    """
+    if tracer is None:
+        return NO_SPAN
+
+    return tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced(function: Callable) -> Callable:
+    """
+    Decorate a function, sync or async, to run in a span named after it.
+
+    -- Parameters
+    function: Callable
+        The function to trace.
+
+    -- Returns
+    Callable
+        The traced function.
+    """
+    name = function.__name__
+
+    if inspect.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            with span(name):
+                return await function(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with span(name):
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware running every request in a server span, continuing the
+    trace of the caller if it sent a `traceparent` header.
+
+    It must run inside ErrorHandlingMiddleware, whose request and correlation
+    IDs the span carries.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """
+        Handle a request in a span, recording its route and status.
+
+        -- Parameters
+        scope: Scope
+            The connection scope.
+        receive: Receive
+            Receives the request messages.
+        send: Send
+            Sends the response messages.
+        """
+        if tracer is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = Request(scope)
+        state = scope.get("state", {})
+
+        with tracer.start_as_current_span(
+            scope["method"],
+            context=propagate.extract(request.headers),
+            kind=SpanKind.SERVER,
+            attributes={
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+                "tartarus.request_id": state.get("request_id", "N/A"),
+                "tartarus.correlation_id": state.get("correlation_id", "N/A"),
+            },
+        ) as request_span:
+
+            async def send_with_status(message: Message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute(
+                        "http.response.status_code", message["status"]
+                    )
+
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    request_span.set_attribute("http.route", route.path)
+                    request_span.update_name(f"{scope['method']} {route.path}")
+
+
+def start_tracing() -> Optional[Any]:
+    """
+    Set up the tracer exporting spans to the exporter in `TRACING_EXPORTER`,
+    if any. Requires the `tracing` extra.
+
+    -- Returns
+    Tracer, optional
+        The tracer, or None if tracing is off.
+    """
+    global tracer, tracer_provider, trace_file
+
+    exporter_name = settings.TRACING_EXPORTER
+    if tracer is not None or not exporter_name:
+        return tracer
+
+    if TracerProvider is None:
+        logger.warning("Tracing is off, the `tracing` extra is not installed.")
+        return None
+
+    if exporter_name not in TRACING_EXPORTERS:
+        logger.warning(f"Tracing is off, unknown exporter '{exporter_name}'.")
+        return None
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        exporter = OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+    else:
+        trace_file = open(settings.TRACING_FILE, "a")
+        exporter = ConsoleSpanExporter(
+            out=trace_file, formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+
+    tracer_provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATE)),
+    )
+    tracer_provider.add_span_processor(BatchSpanProcessor(exporter))
+    tracer = tracer_provider.get_tracer("tartarus")
+
+    return tracer
+
+
+def stop_tracing():
+    """
+    Export the spans still buffered and stop tracing.
+    """
+    global tracer, tracer_provider, trace_file
+
+    if tracer_provider is None:
+        return
+
+    tracer = None
+    tracer_provider.shutdown()
+    tracer_provider = None
+
+    if trace_file is not None:
+        trace_file.close()
+        trace_file = None
+
+
+tracer: Optional[Any] = None
+tracer_provider: Optional[Any] = None
+trace_file: Optional[IO] = None
@@ -0,0 +1,391 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import platform
+import datetime
+import subprocess
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import psycopg
+
+from app.utils.settings.config import settings
+
+DESCRIPTION = """
+Latency percentiles and throughput of the config endpoints of a running API
+server, at a fixed concurrency. Definitions of each size are seeded straight
+into the database the server uses, once, and reused by later runs. Results
+are printed as JSON, and compared to an earlier run with --compare.
+"""
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+SEED_BATCH_SIZE = 1_000_000
+
+JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "group": {"type": "string"},
+        "name": {"type": "string"},
+        "score": {"type": "integer"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "limits": {
+            "type": "object",
+            "properties": {"max": {"type": "integer"}},
+        },
+    },
+    "required": ["group", "name"],
+}
+INDEXES = ["group", "name"]
+GROUPS = 100
+
+SEED_QUERY = """
+    INSERT INTO {table} (config_key, data, created_at, modified_at)
+    SELECT
+        'config_' || i,
+        jsonb_build_object(
+            'group', 'g' || (i %% {groups}),
+            'name', 'name_' || lpad(i::TEXT, 8, '0'),
+            'score', (i * 7919) %% 1000,
+            'tags', jsonb_build_array('a', 'b'),
+            'limits', jsonb_build_object('max', i %% 10)
+        ),
+        TIMESTAMP '2024-01-01' + i * INTERVAL '1 second',
+        TIMESTAMP '2024-01-01' + i * INTERVAL '1 second'
+    FROM generate_series(%s::BIGINT, %s::BIGINT) AS i
+    ON CONFLICT (config_key) DO NOTHING;
+"""
+
+
+def make_data(i: int) -> dict:
+    """
+    Build the data of the i-th seeded config, as the seed query does.
+    """
+    return {
+        "group": f"g{i % GROUPS}",
+        "name": f"name_{i:08d}",
+        "score": (i * 7919) % 1000,
+        "tags": ["a", "b"],
+        "limits": {"max": i % 10},
+    }
+
+
+def make_scenarios(size: int) -> Dict[str, Callable[[random.Random, int], tuple]]:
+    """
+    Build the requests of each scenario against a definition of `size`
+    configs, as (method, path, json) from a random generator and a sequence
+    number.
+    """
+    deep_page = max(1, min(size // 50 // 2, 2000))
+
+    def key(rng: random.Random) -> int:
+        return rng.randint(1, size)
+
+    return {
+        "get_config": lambda rng, n: ("GET", f"/config_{key(rng)}", None),
+        "list_filtered": lambda rng, n: (
+            "GET",
+            f"/?group=g{rng.randrange(GROUPS)}&limit=50&count=estimated",
+            None,
+        ),
+        "list_sorted": lambda rng, n: (
+            "GET",
+            "/?sort_by=name&sort_order=desc&limit=50&count=estimated",
+            None,
+        ),
+        "list_deep_page": lambda rng, n: (
+            "GET",
+            f"/?page={deep_page}&limit=50&count=none",
+            None,
+        ),
+        "create_config": lambda rng, n: (
+            "POST",
+            "/",
+            {"config_key": f"bench_new_{n}", "data": make_data(size + n)},
+        ),
+        "update_config": lambda rng, n: (
+            "PUT",
+            f"/config_{(i := key(rng))}",
+            {"data": make_data(i)},
+        ),
+    }
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    """
+    Return the nearest-rank percentile of sorted latencies, in milliseconds.
+    """
+    if not latencies:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(latencies)))
+    return latencies[rank - 1] * 1000
+
+
+def connect() -> psycopg.Connection:
+    """
+    Connect to the database the server uses.
+    """
+    return psycopg.connect(
+        dbname=settings.DB_NAME,
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        autocommit=True,
+    )
+
+
+async def seed(client: httpx.AsyncClient, label: str, size: int) -> str:
+    """
+    Create the definition of a dataset through the API, if missing, and fill
+    it up to `size` configs straight in the database.
+    """
+    definition_key = f"bench_{label}"
+    response = await client.get(f"/api/v1/config_definition/{definition_key}")
+    if response.status_code == 404:
+        response = await client.post(
+            "/api/v1/config_definition/",
+            json={
+                "config_definition_key": definition_key,
+                "json_schema": JSON_SCHEMA,
+                "indexes": INDEXES,
+            },
+        )
+    response.raise_for_status()
+
+    with connect() as connection:
+        count = connection.execute(
+            f"SELECT COUNT(*) FROM {definition_key} WHERE config_key LIKE 'config\\_%';"
+        ).fetchone()[0]
+        if count >= size:
+            return definition_key
+
+        print(f"Seeding {definition_key}: {count} -> {size}", file=sys.stderr)
+        for start in range(1, size + 1, SEED_BATCH_SIZE):
+            end = min(start + SEED_BATCH_SIZE - 1, size)
+            connection.execute(
+                SEED_QUERY.format(table=definition_key, groups=GROUPS), (start, end)
+            )
+            print(f"  {end}/{size}", file=sys.stderr)
+        connection.execute(f"ANALYZE {definition_key};")
+
+    return definition_key
+
+
+def clean_up(definition_key: str):
+    """
+    Delete the configs created by the benchmark, so every run starts from the
+    same data.
+    """
+    with connect() as connection:
+        connection.execute(
+            f"DELETE FROM {definition_key} WHERE config_key LIKE 'bench\\_new\\_%';"
+        )
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    base_path: str,
+    scenario: Callable[[random.Random, int], tuple],
+    requests: int,
+    concurrency: int,
+    seed_value: int,
+) -> dict:
+    """
+    Send `requests` requests of a scenario from `concurrency` workers, and
+    summarize their latencies.
+    """
+    latencies: List[float] = []
+    errors = 0
+    sequence = iter(range(requests))
+
+    async def worker(rng: random.Random):
+        nonlocal errors
+        for n in sequence:
+            method, path, body = scenario(rng, n)
+            start = time.perf_counter()
+            response = await client.request(method, base_path + path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(worker(random.Random(seed_value + i)) for i in range(concurrency))
+    )
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3),
+            "max": round(latencies[-1] * 1000, 3),
+        },
+    }
+
+
+def git_commit() -> Optional[str]:
+    """
+    Return the commit the benchmark runs at, if known.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict):
+    """
+    Print how each result moved since a baseline report.
+    """
+    before = {
+        (result["dataset"], result["scenario"]): result
+        for result in baseline["results"]
+    }
+    print(
+        f"{'dataset':<8}{'scenario':<16}{'p50':>10}{'p99':>10}{'rps':>10}",
+        file=sys.stderr,
+    )
+    for result in report["results"]:
+        old = before.get((result["dataset"], result["scenario"]))
+        if old is None:
+            continue
+
+        def change(new: float, previous: float) -> str:
+            return f"{(new - previous) / previous * 100:+.1f}%" if previous else "n/a"
+
+        print(
+            f"{result['dataset']:<8}{result['scenario']:<16}"
+            f"{change(result['latency_ms']['p50'], old['latency_ms']['p50']):>10}"
+            f"{change(result['latency_ms']['p99'], old['latency_ms']['p99']):>10}"
+            f"{change(result['throughput_rps'], old['throughput_rps']):>10}",
+            file=sys.stderr,
+        )
+
+
+async def main(args: argparse.Namespace) -> dict:
+    """
+    Seed every dataset, then run every scenario against each of them.
+    """
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "url": args.url,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "results": [],
+    }
+
+    async with httpx.AsyncClient(
+        base_url=args.url,
+        headers={"Authorization": settings.API_KEY},
+        limits=httpx.Limits(max_connections=args.concurrency),
+        timeout=60.0,
+    ) as client:
+        for label in args.sizes:
+            size = SIZES[label]
+            definition_key = await seed(client, label, size)
+            base_path = f"/api/v1/config_definition/{definition_key}/config"
+
+            for name, scenario in make_scenarios(size).items():
+                if args.scenarios and name not in args.scenarios:
+                    continue
+
+                clean_up(definition_key)
+                if args.warmup:
+                    await drive(
+                        client,
+                        base_path,
+                        lambda rng, n: scenario(rng, args.requests + n),
+                        args.warmup,
+                        args.concurrency,
+                        args.seed - 1,
+                    )
+
+                result = await drive(
+                    client,
+                    base_path,
+                    scenario,
+                    args.requests,
+                    args.concurrency,
+                    args.seed,
+                )
+                report["results"].append(
+                    {"dataset": label, "rows": size, "scenario": name, **result}
+                )
+                print(
+                    f"{label:<5}{name:<16}p50 {result['latency_ms']['p50']:>8.2f} ms"
+                    f"  p99 {result['latency_ms']['p99']:>8.2f} ms"
+                    f"  {result['throughput_rps']:>8.1f} req/s",
+                    file=sys.stderr,
+                )
+
+            clean_up(definition_key)
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument(
+        "--sizes",
+        type=lambda sizes: sizes.split(","),
+        default=list(SIZES),
+        help="Comma separated datasets, among " + ", ".join(SIZES),
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=lambda scenarios: scenarios.split(","),
+        default=None,
+        help="Comma separated scenarios to run. Defaults to all of them.",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the report to this file too.")
+    parser.add_argument("--compare", help="A report to compare the results to.")
+    args = parser.parse_args()
+
+    unknown = set(args.sizes) - set(SIZES)
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(main(args))
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare(report, json.load(file))
@@ -0,0 +1,156 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import datetime
+
+import httpx
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+from app.models.common import Status
+from app.models.config import ListConfigResponse
+from app.utils.responses.utils import (
+    FastJSONResponse,
+    RawJSON,
+    RawJSONResponse,
+    orjson,
+    r_util_shape,
+)
+
+DESCRIPTION = """
+CPU time per request of a `list_configs` page, for each way of encoding it.
+No database is needed: the page is built in memory, as psycopg would hand it
+over, and requested through the ASGI app.
+"""
+
+
+def make_page(rows: int, raw: bool) -> dict:
+    """
+    Build the content `list_configs` returns for a page of `rows` configs.
+    """
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+    data = '{"name": "John Doe", "age": 30, "tags": ["a", "b"], "limits": {"max": 5}}'
+    results = [
+        {
+            "config_key": f"config_{i}",
+            "data": RawJSON(data) if raw else json.loads(data),
+            "version": 1,
+            "created_at": now,
+            "modified_at": now,
+        }
+        for i in range(rows)
+    ]
+
+    return {
+        "message": "Configurations listed successfully.",
+        "data": {
+            "results": results,
+            "meta": {"page": 1, "limit": rows, "total": rows, "count": "exact"},
+        },
+    }
+
+
+def make_app(rows: int) -> FastAPI:
+    """
+    Mount the same page under each encoding.
+    """
+    validated = APIRouter(route_class=APIRoute, default_response_class=JSONResponse)
+    fast = APIRouter(route_class=APIRoute, default_response_class=FastJSONResponse)
+
+    @validated.get(
+        "/validated",
+        response_model=ListConfigResponse,
+        response_model_exclude_none=True,
+    )
+    async def list_validated():
+        return make_page(rows, raw=False)
+
+    @fast.get(
+        "/fast", response_model=ListConfigResponse, response_model_exclude_none=True
+    )
+    async def list_fast():
+        return make_page(rows, raw=False)
+
+    shaped = APIRouter()
+
+    @shaped.get(
+        "/shaped", response_model=ListConfigResponse, response_model_exclude_none=True
+    )
+    async def list_shaped():
+        return FastJSONResponse(
+            r_util_shape(ListConfigResponse, make_page(rows, raw=False), True)
+        )
+
+    @shaped.get(
+        "/raw", response_model=ListConfigResponse, response_model_exclude_none=True
+    )
+    async def list_raw():
+        return RawJSONResponse({"status": Status.success, **make_page(rows, raw=True)})
+
+    app = FastAPI()
+    for router in (validated, fast, shaped):
+        app.include_router(router)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    """
+    Return the CPU time per request, in microseconds.
+    """
+    for _ in range(requests // 10):
+        await client.get(path)
+
+    start = time.process_time()
+    for _ in range(requests):
+        await client.get(path)
+
+    return (time.process_time() - start) / requests * 1e6
+
+
+async def main(rows: int, requests: int):
+    """
+    Check that every encoding returns the same page, then time each of them.
+    """
+    app = make_app(rows)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        bodies = {
+            path: (await client.get(path)).json()
+            for path in ("/validated", "/fast", "/shaped", "/raw")
+        }
+        assert bodies["/validated"] == bodies["/fast"] == bodies["/shaped"]
+
+        baseline = None
+        print(f"{rows} rows per page, orjson {'on' if orjson else 'off'}")
+        for name, path in (
+            ("response_model + json", "/validated"),
+            ("response_model + orjson", "/fast"),
+            ("shaped + orjson", "/shaped"),
+            ("raw JSONB splice", "/raw"),
+        ):
+            cpu = await measure(client, path, requests)
+            baseline = baseline or cpu
+            print(f"{name:<26}{cpu:>10.1f} us/request{baseline / cpu:>8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.requests))
@@ -0,0 +1,113 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from typing import Any, Coroutine
+from unittest.mock import patch
+
+import pytest
+from fastapi import Request
+
+from app.utils.config_definitions.cache import evict_definition
+from app.utils.data.data_source import DataStore
+
+
+class FakeDataStore(DataStore):
+    """
+    DataStore answering the lookups of configuration definitions from memory,
+    so the code around the queries is measured without a database.
+
+    -- Parameters
+    definitions: dict
+        The rows of the internal table, by configuration definition key.
+    """
+
+    def __init__(self, definitions: dict):
+        super().__init__()
+        self.definitions = definitions
+        self.queries = 0
+
+    async def execute_query(self, query, params=(), mode="submit", *, kind) -> dict:
+        self.queries += 1
+        definition = self.definitions.get(params[0]) if params else None
+
+        return {
+            "rows_affected": 1 if definition else 0,
+            "response": [definition] if definition else [],
+        }
+
+
+@pytest.fixture
+def fake_data_store():
+    """
+    Swaps the data store for a fake one holding the `sample` definition, with
+    cold definition caches.
+    """
+    data_store = FakeDataStore(
+        {
+            "sample": {
+                "config_definition_key": "sample",
+                "json_schema": {
+                    "type": "object",
+                    "properties": {
+                        "group": {"type": "string"},
+                        "name": {"type": "string"},
+                        "limits": {
+                            "type": "object",
+                            "properties": {"max": {"type": "integer"}},
+                        },
+                    },
+                },
+                "indexes": ["group", "name", "limits.max"],
+            }
+        }
+    )
+
+    evict_definition()
+    with patch("app.utils.config_definitions.utils.data_store", data_store):
+        yield data_store
+    evict_definition()
+
+
+@pytest.fixture
+def run_sync():
+    """
+    Returns a function running a coroutine that never suspends, such as a
+    lookup answered from the caches, without the cost of an event loop.
+    """
+
+    def run(coroutine: Coroutine) -> Any:
+        try:
+            coroutine.send(None)
+        except StopIteration as stop:
+            return stop.value
+
+        coroutine.close()
+        raise RuntimeError("The coroutine suspended, it is not CPU bound.")
+
+    return run
+
+
+@pytest.fixture
+def make_request():
+    """
+    Returns a function building a request to list the `sample`
+    configurations with a query string.
+    """
+
+    def make(query_string: str) -> Request:
+        return Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/api/v1/config_definition/sample/config/",
+                "query_string": query_string.encode(),
+                "headers": [],
+            }
+        )
+
+    return make
@@ -0,0 +1,66 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import pytest
+
+from app.utils.configs.queries import l_c_json_path, l_clause_query
+from app.utils.configs.utils import l_util_filters
+
+
+class TestQueryBuilders:
+    """
+    Benchmarks of the functions building the SQL of configuration listings.
+    """
+
+    @pytest.mark.parametrize(
+        "keys",
+        [["name"], ["limits", "max"], ["a", "b", "c", "d", "e"]],
+        ids=["depth_1", "depth_2", "depth_5"],
+    )
+    def test_l_c_json_path(self, benchmark, keys):
+        """
+        Benchmark the JSON path of a filter or sort field.
+        """
+        benchmark(l_c_json_path, keys)
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "page=2&limit=50&sort_by=name&sort_order=asc",
+            "group=g1&name=name_00000001&limits.max=5&page=2&limit=50",
+        ],
+        ids=["no_filters", "three_filters"],
+    )
+    def test_l_util_filters(self, benchmark, make_request, query_string):
+        """
+        Benchmark reading the filters out of the query parameters of a request.
+        """
+        request = make_request(query_string)
+
+        benchmark(l_util_filters, request)
+
+    @pytest.mark.parametrize(
+        "filters, search",
+        [
+            ({}, None),
+            (
+                {
+                    "data->>'group'": "g1",
+                    "data->>'name'": "name_00000001",
+                    "data->'limits'->>'max'": "5",
+                },
+                "config",
+            ),
+        ],
+        ids=["empty", "three_filters_search"],
+    )
+    def test_l_clause_query(self, benchmark, filters, search):
+        """
+        Benchmark the WHERE clause of a listing.
+        """
+        benchmark(l_clause_query, filters, search)
@@ -0,0 +1,65 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models.common import Status
+from app.models.config import ListConfigResponse
+from app.utils.responses.utils import (
+    r_util_dumps,
+    r_util_encode,
+    r_util_shape,
+)
+
+from benchmarks.bench_responses import make_page
+
+
+class TestSerialization:
+    """
+    Benchmarks of the serialization of a `list_configs` page, in each way it
+    can be encoded.
+    """
+
+    @pytest.mark.parametrize("rows", [10, 100])
+    def test_response_model(self, benchmark, rows):
+        """
+        Benchmark validating a page into `ListConfigResponse` and encoding it,
+        as routes returning their content do.
+        """
+        page = {"status": Status.success, **make_page(rows, raw=False)}
+
+        def serialize():
+            model = ListConfigResponse.model_validate(page)
+            content = jsonable_encoder(model, exclude_none=True)
+            return r_util_dumps(content)
+
+        benchmark(serialize)
+
+    @pytest.mark.parametrize("rows", [10, 100])
+    def test_shaped(self, benchmark, rows):
+        """
+        Benchmark shaping a page after `ListConfigResponse` and encoding it,
+        as hot read routes returning a `FastJSONResponse` do.
+        """
+        page = {"status": Status.success, **make_page(rows, raw=False)}
+
+        def serialize():
+            return r_util_dumps(r_util_shape(ListConfigResponse, page, True))
+
+        benchmark(serialize)
+
+    @pytest.mark.parametrize("rows", [10, 100])
+    def test_raw(self, benchmark, rows):
+        """
+        Benchmark splicing the JSON text of the configurations into a page, as
+        `list_configs` does.
+        """
+        page = {"status": Status.success, **make_page(rows, raw=True)}
+
+        benchmark(r_util_encode, page)
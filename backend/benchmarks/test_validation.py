@@ -0,0 +1,146 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import pytest
+
+from app.utils.config_definitions.cache import SchemaValidator, fastjsonschema
+from app.utils.configs.validations import validate_config_list
+
+
+FLAT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "group": {"type": "string"},
+        "name": {"type": "string"},
+        "score": {"type": "integer"},
+        "enabled": {"type": "boolean"},
+    },
+    "required": ["group", "name"],
+}
+FLAT_DATA = {"group": "g1", "name": "name_00000001", "score": 42, "enabled": True}
+
+NESTED_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "service": {"type": "string", "pattern": "^[a-z][a-z0-9-]*$"},
+        "tier": {"enum": ["free", "pro", "enterprise"]},
+        "limits": {
+            "type": "object",
+            "properties": {
+                "requests": {"type": "integer", "minimum": 0},
+                "burst": {"type": "integer", "minimum": 0, "maximum": 1000},
+                "window": {"type": "string", "format": "duration"},
+            },
+            "required": ["requests"],
+            "additionalProperties": False,
+        },
+        "owners": {
+            "type": "array",
+            "items": {"type": "string", "minLength": 1},
+            "uniqueItems": True,
+        },
+    },
+    "required": ["service", "tier", "limits"],
+}
+NESTED_DATA = {
+    "service": "billing-api",
+    "tier": "pro",
+    "limits": {"requests": 1000, "burst": 50, "window": "PT1M"},
+    "owners": ["team-a", "team-b"],
+}
+
+COLLECTION_SCHEMA = {
+    "type": "object",
+    "$defs": {
+        "rule": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string"},
+                "methods": {
+                    "type": "array",
+                    "items": {"enum": ["GET", "POST", "PUT", "PATCH", "DELETE"]},
+                },
+                "weight": {"type": "number", "minimum": 0},
+            },
+            "required": ["path", "methods"],
+        }
+    },
+    "properties": {"rules": {"type": "array", "items": {"$ref": "#/$defs/rule"}}},
+    "required": ["rules"],
+}
+COLLECTION_DATA = {
+    "rules": [
+        {"path": f"/v1/resource/{i}", "methods": ["GET", "PUT"], "weight": i / 10}
+        for i in range(100)
+    ]
+}
+
+SCHEMAS = {
+    "flat": (FLAT_SCHEMA, FLAT_DATA),
+    "nested": (NESTED_SCHEMA, NESTED_DATA),
+    "collection_100": (COLLECTION_SCHEMA, COLLECTION_DATA),
+}
+
+
+class TestValidation:
+    """
+    Benchmarks of the validation of listings and configuration data.
+    """
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            "page=2&limit=50&sort_by=name&sort_order=asc",
+            "group=g1&name=name_00000001&limits.max=5&page=2&limit=50",
+        ],
+        ids=["no_filters", "three_filters"],
+    )
+    def test_validate_config_list(
+        self, benchmark, fake_data_store, run_sync, make_request, query_string
+    ):
+        """
+        Benchmark validating a listing, its definition served from the cache.
+        """
+        request = make_request(query_string)
+        params = dict(request.query_params)
+
+        def validate():
+            return run_sync(
+                validate_config_list(
+                    "sample",
+                    int(params.get("page", 1)),
+                    int(params.get("limit", 10)),
+                    params.get("sort_by", "modified_at"),
+                    params.get("sort_order", "desc"),
+                    None,
+                    request,
+                )
+            )
+
+        run_sync(validate_config_list("sample", 1, 10, "name", "asc", None, request))
+        benchmark(validate)
+
+        assert fake_data_store.queries == 1
+
+    @pytest.mark.parametrize("schema", list(SCHEMAS))
+    @pytest.mark.parametrize("validator", ["jsonschema", "fastjsonschema"])
+    def test_schema_validate(self, benchmark, schema, validator):
+        """
+        Benchmark validating configuration data against a compiled schema,
+        with `jsonschema` or with the code-generated validator.
+        """
+        if validator == "fastjsonschema" and fastjsonschema is None:
+            pytest.skip("The `fast-validation` extra is not installed.")
+
+        json_schema, data = SCHEMAS[schema]
+        schema_validator = SchemaValidator(
+            json_schema, fast_threshold=1 if validator == "fastjsonschema" else 0
+        )
+        schema_validator.validate(data)
+
+        benchmark(schema_validator.validate, data)
@@ -8,22 +8,58 @@
 
 import logging
 import logging.config
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.utils.exceptions.errors import APIError
-from app.utils.exceptions.logger import get_log_config
+from app.utils.exceptions.logger import (
+    get_log_config,
+    start_log_queue,
+    stop_log_queue,
+)
 from app.utils.exceptions.handler import ErrorHandlingMiddleware, api_error_handler
+from app.utils.data.data_source import QueryBudgetMiddleware, data_store
+from app.utils.config_definitions.utils import u_config_definition_migrate
+from app.utils.changes.utils import start_pruning, stop_pruning
+from app.utils.responses.utils import FastJSONResponse
+from app.utils.metrics.utils import DataStoreCollector, MetricsMiddleware, r_metrics
+from app.utils.tracing.utils import TracingMiddleware, start_tracing, stop_tracing
+from app.utils.timing.utils import ServerTimingMiddleware
+from prometheus_client import REGISTRY
 
 from app.api.v1 import api_router as api_router_v1
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start queued logging and tracing, open the database connection pool and
+    migrate the configuration tables and start pruning the change log on
+    startup, and stop them on shutdown.
+    """
+    start_log_queue()
+    start_tracing()
+    await data_store.open()
+    await u_config_definition_migrate()
+    start_pruning()
+    yield
+    await stop_pruning()
+    await data_store.close()
+    stop_tracing()
+    stop_log_queue()
+
+
 app = FastAPI(
     title="Tartarus API",
     description="Tartarus API for managing the underworld configurations",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 logging.config.dictConfig(get_log_config())
+REGISTRY.register(DataStoreCollector(data_store))
 
 app.add_exception_handler(APIError, api_error_handler)
 app.add_middleware(
@@ -33,15 +69,27 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryBudgetMiddleware)
+app.add_middleware(TracingMiddleware)
 app.add_middleware(ErrorHandlingMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(api_router_v1, prefix="/api/v1")
 
 
 @app.get("/")
 @app.get("/health")
 @app.get("/readiness-probe")
-def health_check():
+async def health_check():
     """
     Health check, Welcomes a user to the API
     """
     return {"message": "Welcome to Tartarus API"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Metrics of the API, the database pool and the caches, for Prometheus
+    """
+    return r_metrics()
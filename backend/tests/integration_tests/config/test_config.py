@@ -6,12 +6,18 @@
 
 """
 
+import json
 import pytest
+import psycopg
+from unittest.mock import patch
+from functools import partial
 from fastapi.testclient import TestClient
 from main import app
 
 from app.utils.settings.config import settings
+from app.utils.changes.utils import d_changes
 from app.utils.config_definitions.utils import c_config_definition, d_config_definition
+from app.utils.configs.queries import c_config_query, l_c_json_path, l_config_query
 
 from tests.integration_tests.payloads.payload_extractor import (
     extract_payload_params,
@@ -21,6 +27,15 @@ from tests.integration_tests.payloads.payload_extractor import (
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def lifespan():
+    """
+    Runs the application lifespan so the database pool is open during the tests.
+    """
+    with client:
+        yield
+
+
 class TestConfigIntegration:
     """
     Integration test suite for configuration definition endpoints.
@@ -34,9 +49,11 @@ class TestConfigIntegration:
         payload = extract_payload()
         pre_payload = payload.get("pre_test_config")
 
-        c_config_definition(**pre_payload)
+        client.portal.call(partial(c_config_definition, **pre_payload))
         yield payload
-        d_config_definition(pre_payload.get("config_definition_key"))
+        client.portal.call(
+            d_config_definition, pre_payload.get("config_definition_key")
+        )
 
     def _run_test(self, payload_extract):
         """
@@ -69,6 +86,406 @@ class TestConfigIntegration:
         payload_extract = get_payload["test_create_config"]
         self._run_test(payload_extract)
 
+    def test_create_config_conflict(self, get_payload):
+        """
+        Test that creating an existing configuration is rejected.
+        """
+        payload_extract = get_payload["test_create_config_conflict"]
+        self._run_test(payload_extract)
+
+    def test_bulk_configs(self, get_payload):
+        """
+        Test bulk writes of configurations in every mode, as JSON and NDJSON.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+        configs = [
+            {"config_key": "bulk_0", "data": {"name": "bulk_0"}},
+            {"config_key": "bulk_1", "data": {"name": 1}},
+            {"config_key": "bulk_2", "data": {"name": "bulk_2"}},
+        ]
+
+        response = client.post(f"{url}/bulk", headers=headers, json=configs)
+        assert response.status_code == 200
+        result = response.json()["data"]
+        assert (result["created"], result["updated"], result["skipped"]) == (2, 0, 0)
+        assert [error["index"] for error in result["errors"]] == [1]
+
+        response = client.post(
+            f"{url}/bulk",
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+            params={"mode": "skip-existing"},
+            content=b'{"config_key": "bulk_0", "data": {"name": "x"}}\n'
+            b'{"config_key": "bulk_3", "data": {"name": "bulk_3"}}\n',
+        )
+        assert response.status_code == 200
+        result = response.json()["data"]
+        assert (result["created"], result["updated"], result["skipped"]) == (1, 0, 1)
+
+        response = client.post(
+            f"{url}/bulk", headers=headers, params={"mode": "insert"}, json=configs[:1]
+        )
+        assert response.json()["data"]["errors"][0]["config_key"] == "bulk_0"
+
+        response = client.post(
+            f"{url}/bulk",
+            headers=headers,
+            params={"mode": "upsert"},
+            json=[{"config_key": "bulk_0", "data": {"name": "upserted"}}],
+        )
+        assert response.json()["data"]["updated"] == 1
+
+        response = client.get(f"{url}/bulk_0", headers=headers)
+        assert response.json()["data"]["data"] == {"name": "upserted"}
+
+        for index in [0, 2, 3]:
+            client.delete(f"{url}/bulk_{index}", headers=headers)
+
+    def test_export_configs(self, get_payload):
+        """
+        Test that exporting streams every configuration as NDJSON, ordered by key.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config"
+        configs = [
+            {"config_key": f"export_{index}", "data": {"name": f"export_{index}"}}
+            for index in range(5)
+        ]
+        client.post(f"{url}/config/bulk", headers=headers, json=configs)
+
+        response = client.get(f"{url}/config", headers=headers, params={"limit": 100})
+        expected = sorted(
+            row["config_key"] for row in response.json()["data"]["results"]
+        )
+
+        with patch.object(settings, "EXPORT_BATCH_SIZE", 2):
+            response = client.get(f"{url}/export", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [row["config_key"] for row in rows] == expected
+        assert rows[expected.index("export_0")]["data"] == {"name": "export_0"}
+
+        response = client.get(
+            "/api/v1/config_definition/missing_config/export", headers=headers
+        )
+        assert response.status_code == 404
+
+        for config in configs:
+            client.delete(f"{url}/config/{config['config_key']}", headers=headers)
+
+    def test_watch_configs(self, get_payload):
+        """
+        Test that every write is recorded in order and can be watched from a
+        sequence number, for a definition or a single configuration.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config"
+
+        response = client.get(f"{url}/watch", headers=headers, params={"timeout": 0})
+        assert response.status_code == 200
+        since = response.json()["data"]["last_seq"]
+
+        client.post(
+            f"{url}/config",
+            headers=headers,
+            json={"config_key": "watch_0", "data": {"name": "watch_0"}},
+        )
+        client.post(
+            f"{url}/config/bulk",
+            headers=headers,
+            params={"mode": "upsert"},
+            json=[
+                {"config_key": "watch_0", "data": {"name": "upserted"}},
+                {"config_key": "watch_1", "data": {"name": "watch_1"}},
+            ],
+        )
+        client.delete(f"{url}/config/watch_0", headers=headers)
+
+        response = client.get(
+            f"{url}/watch", headers=headers, params={"since": since, "timeout": 0}
+        )
+        data = response.json()["data"]
+        changes = [(c["config_key"], c["operation"]) for c in data["changes"]]
+        assert changes == [
+            ("watch_0", "create"),
+            ("watch_0", "update"),
+            ("watch_1", "create"),
+            ("watch_0", "delete"),
+        ]
+        seqs = [c["seq"] for c in data["changes"]]
+        assert since < seqs[0] and seqs == sorted(set(seqs))
+        assert data["last_seq"] == seqs[-1]
+
+        response = client.get(
+            f"{url}/watch",
+            headers=headers,
+            params={"since": since, "timeout": 0, "config_key": "watch_1"},
+        )
+        assert [c["seq"] for c in response.json()["data"]["changes"]] == [seqs[2]]
+
+        client.delete(f"{url}/config/watch_1", headers=headers)
+
+    def test_list_changes(self, get_payload):
+        """
+        Test that changes are listed across definitions in sequence order, with
+        timestamps taken by the database in the same statement as the write.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        since = client.get(
+            "/api/v1/config_definition/test_config/watch",
+            headers=headers,
+            params={"timeout": 0},
+        ).json()["data"]["last_seq"]
+        client.post(
+            url,
+            headers=headers,
+            json={"config_key": "changes_0", "data": {"name": "changes_0"}},
+        )
+
+        response = client.get(
+            "/api/v1/changes", headers=headers, params={"since": since}
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert len(data["changes"]) == 1 and data["changes"][0]["seq"] > since
+        assert data["changes"][0]["config_definition_key"] == "test_config"
+        assert data["last_seq"] == data["changes"][0]["seq"]
+
+        config = client.get(f"{url}/changes_0", headers=headers).json()["data"]
+        assert config["created_at"] == data["changes"][0]["changed_at"]
+        assert config["modified_at"] == data["changes"][0]["changed_at"]
+
+        client.delete(f"{url}/changes_0", headers=headers)
+
+    def test_list_changes_late_commit(self, get_payload):
+        """
+        Test that a change committing after a later one is not skipped: the
+        later change is held back until every earlier transaction is done.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        since = client.get(
+            "/api/v1/config_definition/test_config/watch",
+            headers=headers,
+            params={"timeout": 0},
+        ).json()["data"]["last_seq"]
+
+        with psycopg.connect(
+            dbname=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            cursor_factory=psycopg.ClientCursor,
+        ) as connection:
+            query, params = c_config_query("test_config", "late_0", {"name": "late_0"})
+            connection.execute(query, params)
+
+            client.post(
+                url,
+                headers=headers,
+                json={"config_key": "late_1", "data": {"name": "late_1"}},
+            )
+            response = client.get(
+                "/api/v1/changes", headers=headers, params={"since": since}
+            )
+            assert response.json()["data"]["changes"] == []
+
+        response = client.get(
+            "/api/v1/changes", headers=headers, params={"since": since}
+        )
+        changes = [c["config_key"] for c in response.json()["data"]["changes"]]
+        assert changes == ["late_0", "late_1"]
+
+        client.delete(f"{url}/late_0", headers=headers)
+        client.delete(f"{url}/late_1", headers=headers)
+
+    def test_list_changes_pruned(self, get_payload):
+        """
+        Test that changes past their retention are pruned, and that reading
+        from before the latest pruned change is answered with 410.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        since = client.get(
+            "/api/v1/config_definition/test_config/watch",
+            headers=headers,
+            params={"timeout": 0},
+        ).json()["data"]["last_seq"]
+        client.post(
+            url,
+            headers=headers,
+            json={"config_key": "pruned_0", "data": {"name": "pruned_0"}},
+        )
+
+        with psycopg.connect(
+            dbname=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            autocommit=True,
+        ) as connection:
+            connection.execute(
+                f"UPDATE {settings.CHANGE_LOG_TABLE} "
+                "SET changed_at = changed_at - INTERVAL '2 days' "
+                "WHERE seq > %s AND config_key = 'pruned_0';",
+                (since,),
+            )
+
+        with patch.object(settings, "CHANGE_LOG_RETENTION", 86400.0):
+            assert client.portal.call(d_changes) >= 1
+
+        response = client.get(
+            "/api/v1/changes", headers=headers, params={"since": since}
+        )
+        assert response.status_code == 410
+
+        client.delete(f"{url}/pruned_0", headers=headers)
+
+    def test_get_config_etag(self, get_payload):
+        """
+        Test that a configuration is read with an ETag, which answers a
+        matching If-None-Match with an empty 304 until the configuration changes.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        client.post(
+            url, headers=headers, json={"config_key": "etag_0", "data": {"name": "a"}}
+        )
+        etag = client.get(f"{url}/etag_0", headers=headers).headers["ETag"]
+        assert etag == '"etag_0-1"'
+
+        for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            response = client.get(
+                f"{url}/etag_0", headers={**headers, "If-None-Match": if_none_match}
+            )
+            assert response.status_code == 304
+            assert response.headers["ETag"] == etag
+            assert response.content == b""
+
+        client.put(f"{url}/etag_0", headers=headers, json={"data": {"name": "b"}})
+        response = client.get(
+            f"{url}/etag_0", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] == '"etag_0-2"'
+        assert response.json()["data"]["data"] == {"name": "b"}
+
+        client.delete(f"{url}/etag_0", headers=headers)
+
+    def test_update_config_version(self, get_payload):
+        """
+        Test that updates bump the version, and that an update expecting a
+        stale version or ETag is rejected with 412.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        client.post(
+            url, headers=headers, json={"config_key": "version_0", "data": {"n": 0}}
+        )
+        response = client.get(f"{url}/version_0", headers=headers)
+        assert response.json()["data"]["version"] == 1
+        etag = response.headers["ETag"]
+
+        response = client.put(
+            f"{url}/version_0",
+            headers=headers,
+            params={"expected_version": 1},
+            json={"data": {"n": 1}},
+        )
+        assert response.status_code == 200
+
+        response = client.put(
+            f"{url}/version_0",
+            headers=headers,
+            params={"expected_version": 1},
+            json={"data": {"n": 2}},
+        )
+        assert response.status_code == 412
+
+        for if_match in (etag, f"W/{etag}"):
+            response = client.put(
+                f"{url}/version_0",
+                headers={**headers, "If-Match": if_match},
+                json={"data": {"n": 2}},
+            )
+            assert response.status_code == 412
+
+        etag = client.get(f"{url}/version_0", headers=headers).headers["ETag"]
+        response = client.put(
+            f"{url}/version_0",
+            headers={**headers, "If-Match": etag},
+            json={"data": {"n": 2}},
+        )
+        assert response.status_code == 200
+
+        config = client.get(f"{url}/version_0", headers=headers).json()["data"]
+        assert (config["version"], config["data"]) == (3, {"n": 2})
+
+        client.delete(f"{url}/version_0", headers=headers)
+
+    def test_patch_config(self, get_payload):
+        """
+        Test that a JSON Merge Patch is merged into a configuration by the
+        database, and validated against the schema of the fields it touches.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+        patch_headers = {**headers, "Content-Type": "application/merge-patch+json"}
+
+        client.post(
+            url,
+            headers=headers,
+            json={
+                "config_key": "patch_0",
+                "data": {"name": "a", "date": "b", "extra": {"x": 1, "y": 2}},
+            },
+        )
+
+        response = client.patch(
+            f"{url}/patch_0",
+            headers=patch_headers,
+            params={"expected_version": 1},
+            content=json.dumps({"date": None, "extra": {"y": None, "z": 3}}),
+        )
+        assert response.status_code == 200
+
+        config = client.get(f"{url}/patch_0", headers=headers).json()["data"]
+        assert config["data"] == {"name": "a", "extra": {"x": 1, "z": 3}}
+        assert config["version"] == 2
+
+        response = client.patch(
+            f"{url}/patch_0", headers=patch_headers, content=json.dumps({"name": 1})
+        )
+        assert response.status_code == 422
+        assert response.json()["errors"][0]["msg"] == (
+            "Invalid Data! 1 is not of type 'string'"
+        )
+
+        response = client.patch(
+            f"{url}/patch_0",
+            headers=patch_headers,
+            params={"expected_version": 1},
+            content=json.dumps({"name": "c"}),
+        )
+        assert response.status_code == 412
+
+        response = client.patch(
+            f"{url}/missing_0", headers=patch_headers, content=json.dumps({"name": "c"})
+        )
+        assert response.status_code == 404
+
+        client.delete(f"{url}/patch_0", headers=headers)
+
     def test_get_config(self, get_payload):
         """
         Test the retrieval of a configuration.
@@ -96,3 +513,103 @@ class TestConfigIntegration:
         """
         payload_extract = get_payload["test_list_configs"]
         self._run_test(payload_extract)
+
+    def test_list_configs_cursor(self, get_payload):
+        """
+        Test that paging with cursors visits every configuration exactly once,
+        in the same order as a single page.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        dates = ["2020-01-02", None, "2020-01-01", "2020-01-02", None, "2020-01-03"]
+        for index, date in enumerate(dates):
+            data = {"name": f"cursor_{index}"}
+            if date:
+                data["date"] = date
+            client.post(
+                url,
+                headers=headers,
+                json={"config_key": f"cursor_{index}", "data": data},
+            )
+
+        for sort_by in ["modified_at", "config_key", "date"]:
+            for sort_order in ["asc", "desc"]:
+                params = {"sort_by": sort_by, "sort_order": sort_order}
+                response = client.get(url, headers=headers, params=params)
+                expected = [
+                    row["config_key"] for row in response.json()["data"]["results"]
+                ]
+
+                keys, cursor = [], None
+                while True:
+                    page_params = {**params, "limit": 2}
+                    if cursor:
+                        page_params["cursor"] = cursor
+                    response = client.get(url, headers=headers, params=page_params)
+                    assert response.status_code == 200
+
+                    data = response.json()["data"]
+                    assert data["meta"]["total"] == len(expected)
+                    keys += [row["config_key"] for row in data["results"]]
+
+                    cursor = data["meta"].get("next_cursor")
+                    if not cursor:
+                        break
+
+                assert keys == expected
+
+        for index in range(len(dates)):
+            client.delete(f"{url}/cursor_{index}", headers=headers)
+
+    def test_list_configs_count(self, get_payload):
+        """
+        Test listing configurations with an estimated count and without a count.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition/test_config/config"
+
+        response = client.get(url, headers=headers, params={"count": "estimated"})
+        assert response.status_code == 200
+        meta = response.json()["data"]["meta"]
+        assert meta["count"] == "exact"
+        assert meta["total"] == len(response.json()["data"]["results"])
+
+        response = client.get(url, headers=headers, params={"count": "none"})
+        assert response.status_code == 200
+        meta = response.json()["data"]["meta"]
+        assert meta["count"] == "none"
+        assert "total" not in meta
+
+        with patch.object(settings, "COUNT_ESTIMATE_THRESHOLD", 0):
+            response = client.get(
+                url, headers=headers, params={"count": "estimated", "date": "x"}
+            )
+        assert response.status_code == 200
+        assert response.json()["data"]["meta"]["count"] == "estimated"
+
+    def test_list_configs_index(self, get_payload):
+        """
+        Test that filtered and sorted listings can be served by the declared indexes.
+        """
+        query, params = l_config_query(
+            "test_config",
+            sort_by=l_c_json_path(["date"]),
+            clause_query=f"WHERE {l_c_json_path(['date'])} = %s",
+            clause_params=("2020-01-01",),
+        )
+
+        with psycopg.connect(
+            dbname=settings.DB_NAME,
+            user=settings.DB_USER,
+            password=settings.DB_PASSWORD,
+            host=settings.DB_HOST,
+            port=settings.DB_PORT,
+            cursor_factory=psycopg.ClientCursor,
+        ) as connection:
+            connection.execute("SET enable_seqscan = off;")
+            plan = connection.execute(f"EXPLAIN {query}", params).fetchall()
+
+        plan = "\n".join(row[0] for row in plan)
+        assert "idx_test_config_date_btree" in plan
+        assert "Sort" not in plan
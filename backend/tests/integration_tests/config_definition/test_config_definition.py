@@ -7,6 +7,7 @@
 """
 
 import pytest
+import psycopg
 from fastapi.testclient import TestClient
 from main import app
 
@@ -20,6 +21,15 @@ from tests.integration_tests.payloads.payload_extractor import (
 client = TestClient(app)
 
 
+@pytest.fixture(scope="module", autouse=True)
+def lifespan():
+    """
+    Runs the application lifespan so the database pool is open during the tests.
+    """
+    with client:
+        yield
+
+
 class TestConfigDefinitionIntegration:
     """
     Integration test suite for configuration definition endpoints.
@@ -70,6 +80,36 @@ class TestConfigDefinitionIntegration:
         payload_extract = get_payload["test_get_config_definition"]
         self._run_test(payload_extract)
 
+    def test_get_config_definition_etag(self, get_payload):
+        """
+        Test that a configuration definition is read with an ETag, which
+        answers a matching If-None-Match with an empty 304 until it changes.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition"
+
+        client.post(
+            f"{url}/",
+            headers=headers,
+            json={"config_definition_key": "etag_config", "json_schema": {}},
+        )
+        etag = client.get(f"{url}/etag_config", headers=headers).headers["ETag"]
+
+        response = client.get(
+            f"{url}/etag_config", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+        client.put(f"{url}/etag_config", headers=headers, json={"indexes": []})
+        response = client.get(
+            f"{url}/etag_config", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+        client.delete(f"{url}/etag_config", headers=headers)
+
     def test_update_config_definition(self, get_payload):
         """
         Test the update of an existing configuration definition.
@@ -77,6 +117,71 @@ class TestConfigDefinitionIntegration:
         payload_extract = get_payload["test_update_config_definition"]
         self._run_test(payload_extract)
 
+    def test_update_config_definition_long_key(self):
+        """
+        Test that updating a definition whose key and index path are too long
+        to fit in an index name keeps every index on its table.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition"
+        config_definition_key = "long_config_definition_key_" + "x" * 23
+        body = {
+            "indexes": [
+                "settings.limits.requests_per_minute",
+                "settings.limits.requests_per_second",
+            ]
+        }
+
+        def l_indexes():
+            with psycopg.connect(
+                dbname=settings.DB_NAME,
+                user=settings.DB_USER,
+                password=settings.DB_PASSWORD,
+                host=settings.DB_HOST,
+                port=settings.DB_PORT,
+            ) as connection:
+                return connection.execute(
+                    "SELECT indexname FROM pg_indexes WHERE tablename = %s;",
+                    (config_definition_key,),
+                ).fetchall()
+
+        response = client.post(
+            f"{url}/",
+            headers=headers,
+            json={
+                "config_definition_key": config_definition_key,
+                "json_schema": {
+                    "type": "object",
+                    "properties": {
+                        "settings": {
+                            "type": "object",
+                            "properties": {
+                                "limits": {
+                                    "type": "object",
+                                    "properties": {
+                                        "requests_per_minute": {"type": "integer"},
+                                        "requests_per_second": {"type": "integer"},
+                                    },
+                                }
+                            },
+                        }
+                    },
+                },
+                **body,
+            },
+        )
+        assert response.status_code == 201
+        indexes = l_indexes()
+        assert len(indexes) == 5
+
+        response = client.put(
+            f"{url}/{config_definition_key}", headers=headers, json=body
+        )
+        assert response.status_code == 200
+        assert sorted(l_indexes()) == sorted(indexes)
+
+        client.delete(f"{url}/{config_definition_key}", headers=headers)
+
     def test_delete_config_definition(self, get_payload):
         """
         Test the deletion of a configuration definition.
@@ -84,6 +189,41 @@ class TestConfigDefinitionIntegration:
         payload_extract = get_payload["test_delete_config_definition"]
         self._run_test(payload_extract)
 
+    def test_delete_config_definition_changes(self, get_payload):
+        """
+        Test that deleting a configuration definition appends a drop to the
+        change log, after the changes of the definition, which are kept.
+        """
+        headers = {"Authorization": settings.API_KEY}
+        url = "/api/v1/config_definition"
+
+        client.post(
+            f"{url}/",
+            headers=headers,
+            json={"config_definition_key": "dropped_config", "json_schema": {}},
+        )
+        since = client.get(
+            f"{url}/dropped_config/watch", headers=headers, params={"timeout": 0}
+        ).json()["data"]["last_seq"]
+        client.post(
+            f"{url}/dropped_config/config",
+            headers=headers,
+            json={"config_key": "dropped_0", "data": {"name": "dropped_0"}},
+        )
+        client.delete(f"{url}/dropped_config", headers=headers)
+
+        response = client.get(
+            "/api/v1/changes", headers=headers, params={"since": since}
+        )
+        changes = [
+            (c["config_definition_key"], c.get("config_key"), c["operation"])
+            for c in response.json()["data"]["changes"]
+        ]
+        assert changes == [
+            ("dropped_config", "dropped_0", "create"),
+            ("dropped_config", None, "drop"),
+        ]
+
     def test_list_config_definitions(self, get_payload):
         """
         Test listing of all configuration definitions.
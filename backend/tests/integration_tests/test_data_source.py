@@ -6,6 +6,7 @@
 
 """
 
+import asyncio
 import pytest
 from app.utils.data.data_source import DataStore
 from app.utils.settings.config import settings
@@ -16,52 +17,99 @@ class TestDataStoreIntegration:
     Integration test suite for the DataStore class.
     """
 
-    @pytest.fixture(scope="class")
-    def datastore(self):
+    @pytest.fixture
+    async def datastore(self):
         """
         Fixture to initialize the DataStore instance for integration tests.
-        Ensures that the connection is properly established before tests and
-        cleaned up after all tests in the class have run.
+        Ensures that the connection pool is properly opened before each test
+        and closed after it has run.
         """
         ds = DataStore()
+        await ds.open()
         yield ds
-        del ds
+        await ds.close()
 
-    def test_connection_established(self, datastore):
+    async def test_connection_established(self, datastore):
         """
         Test that the DataStore connection is successfully established.
 
-        This test verifies that a connection is established and that it is
-        not None, indicating that the database connection is functional.
+        This test verifies that a connection pool is established and that a
+        connection can be borrowed from it, indicating that the database
+        connection is functional.
         """
-        assert datastore.connection is not None
+        assert datastore.pool is not None
+        async with datastore.pool.connection() as connection:
+            assert not connection.closed
 
-    def test_create_internal_table(self, datastore):
+    async def test_create_internal_table(self, datastore):
         """
         Test that the internal table is created in the database.
 
         This test verifies that the internal table is created by checking
         the PostgreSQL catalog for the presence of the table.
         """
-        cursor = datastore.connection.cursor()
-        cursor.execute(
-            f"SELECT * FROM pg_catalog.pg_tables WHERE tablename = '{settings.INTERNAL_TABLE}' LIMIT 1;"
-        )
-        exists = cursor.fetchone()
-        assert exists is not None
-        cursor.close()
-
-    def test_create_internal_indexes(self, datastore):
+        async with datastore.pool.connection() as connection:
+            cursor = connection.cursor()
+            await cursor.execute(
+                f"SELECT * FROM pg_catalog.pg_tables WHERE tablename = '{settings.INTERNAL_TABLE}' LIMIT 1;"
+            )
+            exists = await cursor.fetchone()
+            assert exists is not None
+            await cursor.close()
+
+    async def test_create_internal_indexes(self, datastore):
         """
         Test that the indexes are created on the internal table.
 
         This test verifies that the indexes on the internal table are created
         by checking the PostgreSQL catalog for the presence of the indexes.
         """
-        cursor = datastore.connection.cursor()
-        cursor.execute(
-            f"SELECT * FROM pg_indexes WHERE tablename = '{settings.INTERNAL_TABLE}';"
-        )
-        indexes = cursor.fetchall()
-        assert len(indexes) == 5
-        cursor.close()
+        async with datastore.pool.connection() as connection:
+            cursor = connection.cursor()
+            await cursor.execute(
+                f"SELECT * FROM pg_indexes WHERE tablename = '{settings.INTERNAL_TABLE}';"
+            )
+            indexes = await cursor.fetchall()
+            assert len(indexes) == 5
+            await cursor.close()
+
+    async def test_listen_notify(self):
+        """
+        Test that a notification published through the pool reaches subscribers.
+
+        This test verifies that the listener connection receives notifications
+        on the subscribed channel and hands the payload to the callback.
+        """
+        received = asyncio.Queue()
+
+        ds = DataStore()
+        ds.subscribe("tartarus_test_channel", received.put_nowait)
+        await ds.open()
+
+        try:
+            assert await asyncio.wait_for(received.get(), timeout=5) is None
+
+            await ds.notify("tartarus_test_channel", "payload")
+            assert await asyncio.wait_for(received.get(), timeout=5) == "payload"
+        finally:
+            await ds.close()
+
+    async def test_stream_query(self, datastore):
+        """
+        Test that a streamed query yields every row through a server-side cursor.
+
+        This test verifies that rows are fetched in batches from a named cursor
+        and that the connection is returned to the pool afterwards.
+        """
+        rows = [
+            row
+            async for row in datastore.stream_query(
+                "SELECT generate_series(1, %s) AS n",
+                (25,),
+                batch_size=10,
+                kind="e_config",
+            )
+        ]
+
+        assert [row["n"] for row in rows] == list(range(1, 26))
+        assert datastore.pool.get_stats()["pool_available"] >= 1
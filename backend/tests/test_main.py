@@ -20,3 +20,13 @@ def test_startup():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json()["message"] == "Welcome to Tartarus API"
+
+
+def test_metrics():
+    """
+    Test that the metrics are exposed for Prometheus.
+    """
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "tartarus_request_duration_seconds" in response.text
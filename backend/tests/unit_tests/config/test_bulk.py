@@ -0,0 +1,266 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+from psycopg import DataError, OperationalError
+
+from app.utils.data.data_source import DataStore
+from app.utils.exceptions.errors import APIError
+
+from app.utils.configs.utils import (
+    b_config,
+    b_util_ndjson,
+)
+
+from tests.unit_tests.config.payloads.payload_extractor import (
+    extract_payload_params,
+    extract_payload,
+)
+
+
+async def _iterate(items):
+    """
+    Yields the given items as an async iterable.
+    """
+    for item in items:
+        yield item
+
+
+class TestConfigBulk:
+    """
+    Test suite for the bulk config write functions.
+    """
+
+    @pytest.fixture(scope="class")
+    def get_payload(self):
+        """
+        Extracts the test payload from the payload file for the test suite.
+        """
+        return extract_payload()["bulk"]
+
+    async def _run_b_config(
+        self,
+        payload_extract,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+    ):
+        """
+        Helper function to run b_config and handle assertions.
+        """
+        (
+            config_definition_key,
+            _,
+            data,
+            schema,
+            return_value,
+            expected_error,
+        ) = extract_payload_params(payload_extract)
+
+        mock_validate_definition.return_value = schema
+        mock_r_config_definition.return_value = schema
+        mock_execute_query.return_value = return_value
+
+        configs = _iterate(data["configs"])
+
+        if expected_error:
+            with pytest.raises(APIError) as error:
+                await b_config(config_definition_key, configs, data["mode"])
+            detail = error.value.detail[0]
+            assert detail["msg"] == expected_error
+            mock_execute_query.assert_not_called()
+            return
+
+        summary = await b_config(config_definition_key, configs, data["mode"])
+        assert summary == payload_extract["summary"]
+        assert mock_execute_query.call_count == 1
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_w_schema(
+        self,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+        get_payload,
+    ):
+        """
+        Test that valid configurations are written and invalid ones reported.
+        """
+        payload_extract = get_payload["test_bulk_w_schema"]
+        await self._run_b_config(
+            payload_extract,
+            mock_execute_query,
+            mock_validate_definition,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_w_conflict(
+        self,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+        get_payload,
+    ):
+        """
+        Test that existing configurations are reported as conflicts on insert.
+        """
+        payload_extract = get_payload["test_bulk_w_conflict"]
+        await self._run_b_config(
+            payload_extract,
+            mock_execute_query,
+            mock_validate_definition,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_w_skip(
+        self,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+        get_payload,
+    ):
+        """
+        Test that existing configurations are counted as skipped in skip-existing mode.
+        """
+        payload_extract = get_payload["test_bulk_w_skip"]
+        await self._run_b_config(
+            payload_extract,
+            mock_execute_query,
+            mock_validate_definition,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_w_upsert(
+        self,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+        get_payload,
+    ):
+        """
+        Test that existing configurations are counted as updated in upsert mode.
+        """
+        payload_extract = get_payload["test_bulk_w_upsert"]
+        await self._run_b_config(
+            payload_extract,
+            mock_execute_query,
+            mock_validate_definition,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_n_mode(
+        self,
+        mock_execute_query,
+        mock_validate_definition,
+        mock_r_config_definition,
+        get_payload,
+    ):
+        """
+        Test that an unknown write mode is rejected.
+        """
+        payload_extract = get_payload["test_bulk_n_mode"]
+        await self._run_b_config(
+            payload_extract,
+            mock_execute_query,
+            mock_validate_definition,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_w_data_error(
+        self, mock_execute_query, mock_validate_definition, mock_r_config_definition
+    ):
+        """
+        Test that batches rejected for their data are split in halves until the
+        offending configurations are reported, and the others are written.
+        """
+        mock_validate_definition.return_value = {"json_schema": None}
+        mock_r_config_definition.return_value = {"json_schema": None}
+
+        async def execute_query(query, params, mode, kind):
+            configs = json.loads(params[0])
+            if any(config["config_key"] == "bad" for config in configs):
+                raise DataError("invalid input syntax\nLINE 1")
+            return {
+                "rows_affected": len(configs),
+                "response": [
+                    {"config_key": config["config_key"], "inserted": True}
+                    for config in configs
+                ],
+            }
+
+        mock_execute_query.side_effect = execute_query
+        keys = ["first", "second", "third", "bad", "fifth", "sixth", "seventh", "last"]
+        configs = _iterate([{"config_key": key, "data": {"name": key}} for key in keys])
+
+        summary = await b_config("sample_config_definition", configs, "insert")
+
+        assert summary == {
+            "created": 7,
+            "updated": 0,
+            "skipped": 0,
+            "errors": [
+                {
+                    "index": 3,
+                    "config_key": "bad",
+                    "msg": "Invalid Data! invalid input syntax",
+                }
+            ],
+        }
+        assert mock_execute_query.call_count == 7
+
+    @patch("app.utils.configs.utils.r_config_definition")
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_bulk_n_database(
+        self, mock_execute_query, mock_validate_definition, mock_r_config_definition
+    ):
+        """
+        Test that a database failure other than bad data fails the whole write
+        instead of being retried configuration by configuration.
+        """
+        mock_validate_definition.return_value = {"json_schema": None}
+        mock_r_config_definition.return_value = {"json_schema": None}
+        mock_execute_query.side_effect = OperationalError("connection lost")
+        configs = _iterate(
+            [{"config_key": f"config_{i}", "data": {"name": i}} for i in range(4)]
+        )
+
+        with pytest.raises(OperationalError):
+            await b_config("sample_config_definition", configs, "insert")
+
+        assert mock_execute_query.call_count == 1
+
+    async def test_bulk_ndjson(self):
+        """
+        Test that NDJSON lines split across chunks are parsed, and that invalid
+        lines are passed on as None.
+        """
+        chunks = [b'{"config_key": "fir', b'st"}\n\nnot json\n{"config_', b'key": 1}']
+        lines = [line async for line in b_util_ndjson(_iterate(chunks))]
+
+        assert lines == [{"config_key": "first"}, None, {"config_key": 1}]
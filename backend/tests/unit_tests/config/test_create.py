@@ -6,20 +6,16 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from app.utils.data.data_source import DataStore
 from app.utils.exceptions.errors import APIError
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.configs.utils import (
-        c_config,
-    )
+from app.utils.configs.utils import (
+    c_config,
+)
 
 from tests.unit_tests.config.payloads.payload_extractor import (
     extract_payload_params,
@@ -39,7 +35,7 @@ class TestConfigCreate:
         """
         return extract_payload()["create"]
 
-    def _run_c_config(
+    async def _run_c_config(
         self, payload_extract, mock_execute_query, mock_r_config_definition
     ):
         """
@@ -50,32 +46,36 @@ class TestConfigCreate:
             config_key,
             data,
             schema,
-            _,
+            return_value,
             expected_error,
         ) = extract_payload_params(payload_extract)
 
         mock_r_config_definition.return_value = schema
+        mock_execute_query.return_value = return_value or {
+            "rows_affected": 1,
+            "response": [{"config_key": config_key}],
+        }
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                c_config(config_definition_key, config_key, data)
+                await c_config(config_definition_key, config_key, data)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
 
-        c_config(config_definition_key, config_key, data)
-        assert mock_execute_query.call_count == 2
+        await c_config(config_definition_key, config_key, data)
+        assert mock_execute_query.call_count == 1
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_create_w_schema(
+    async def test_create_w_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function creates a new configuration with schema.
         """
         payload_extract = get_payload["test_create_w_schema"]
-        self._run_c_config(
+        await self._run_c_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -83,14 +83,14 @@ class TestConfigCreate:
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_create_o_schema(
+    async def test_create_o_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function creates a new configuration without a schema.
         """
         payload_extract = get_payload["test_create_o_schema"]
-        self._run_c_config(
+        await self._run_c_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -98,14 +98,29 @@ class TestConfigCreate:
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_create_n_schema(
+    async def test_create_n_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function raises an exception if the schema is invalid.
         """
         payload_extract = get_payload["test_create_n_schema"]
-        self._run_c_config(
+        await self._run_c_config(
+            payload_extract,
+            mock_execute_query,
+            mock_r_config_definition,
+        )
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_create_w_conflict(
+        self, mock_execute_query, mock_r_config_definition, get_payload
+    ):
+        """
+        Test that the function raises a conflict if the configuration already exists.
+        """
+        payload_extract = get_payload["test_create_w_conflict"]
+        await self._run_c_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
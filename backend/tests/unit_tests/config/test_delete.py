@@ -6,19 +6,15 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.configs.utils import (
-        d_config,
-    )
+from app.utils.configs.utils import (
+    d_config,
+)
 
 from app.utils.configs.queries import (
     d_config_query,
@@ -43,7 +39,7 @@ class TestConfigDelete:
         """
         return extract_payload()["delete"]
 
-    def _run_d_config(
+    async def _run_d_config(
         self,
         payload_extract,
         mock_execute_query,
@@ -64,7 +60,7 @@ class TestConfigDelete:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                d_config(config_definition_key, config_key)
+                await d_config(config_definition_key, config_key)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
@@ -73,37 +69,39 @@ class TestConfigDelete:
             config_definition_key, config_key
         )
 
-        d_config(config_definition_key, config_key)
-        mock_execute_query.assert_any_call(deletion_query, deletion_params)
+        await d_config(config_definition_key, config_key)
+        mock_execute_query.assert_any_call(
+            deletion_query, deletion_params, kind="d_config"
+        )
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_w_key(self, mock_execute_query, get_payload):
+    async def test_delete_w_key(self, mock_execute_query, get_payload):
         """
         Test the deletion of a configuration with a key.
         """
         payload_extract = get_payload["test_delete_w_key"]
-        self._run_d_config(payload_extract, mock_execute_query)
+        await self._run_d_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_o_key(self, mock_execute_query, get_payload):
+    async def test_delete_o_key(self, mock_execute_query, get_payload):
         """
         Test the deletion of a configuration without a key.
         """
         payload_extract = get_payload["test_delete_o_key"]
-        self._run_d_config(payload_extract, mock_execute_query)
+        await self._run_d_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_w_cd_key(self, mock_execute_query, get_payload):
+    async def test_delete_w_cd_key(self, mock_execute_query, get_payload):
         """
         Test the deletion of a configuration with a key and config definition key.
         """
         payload_extract = get_payload["test_delete_w_cd_key"]
-        self._run_d_config(payload_extract, mock_execute_query)
+        await self._run_d_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_o_cd_key(self, mock_execute_query, get_payload):
+    async def test_delete_o_cd_key(self, mock_execute_query, get_payload):
         """
         Test the deletion of a configuration without a key and config definition key.
         """
         payload_extract = get_payload["test_delete_o_cd_key"]
-        self._run_d_config(payload_extract, mock_execute_query)
+        await self._run_d_config(payload_extract, mock_execute_query)
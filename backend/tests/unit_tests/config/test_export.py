@@ -0,0 +1,77 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import json
+import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.data.data_source import DataStore
+from app.utils.exceptions.errors import APIError
+from app.utils.settings.config import settings
+
+from app.utils.configs.utils import e_config
+
+
+async def _iterate(items):
+    """
+    Yields the given items as an async iterable.
+    """
+    for item in items:
+        yield item
+
+
+class TestConfigExport:
+    """
+    Test suite for the config export functions.
+    """
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "stream_query")
+    async def test_export(self, mock_stream_query, mock_r_config_definition):
+        """
+        Test that configurations are encoded as NDJSON in chunks of the export
+        batch size.
+        """
+        timestamp = datetime.datetime(2024, 1, 1, 12, 30)
+        rows = [
+            {
+                "config_key": f"sample_config_{index}",
+                "data": {"name": "test_export"},
+                "created_at": timestamp,
+                "modified_at": timestamp,
+            }
+            for index in range(3)
+        ]
+        mock_stream_query.side_effect = lambda *args, **kwargs: _iterate(rows)
+
+        with patch.object(settings, "EXPORT_BATCH_SIZE", 2):
+            chunks = [
+                chunk async for chunk in await e_config("sample_config_definition")
+            ]
+
+        assert len(chunks) == 2
+        lines = b"".join(chunks).decode().splitlines()
+        assert [json.loads(line)["config_key"] for line in lines] == [
+            "sample_config_0",
+            "sample_config_1",
+            "sample_config_2",
+        ]
+        assert json.loads(lines[0])["created_at"] == "2024-01-01T12:30:00"
+
+    @patch.object(DataStore, "stream_query")
+    async def test_export_n_definition_key(self, mock_stream_query):
+        """
+        Test that an invalid definition key is rejected before anything is read.
+        """
+        with pytest.raises(APIError) as error:
+            await e_config("1_invalid")
+
+        assert error.value.status_code == 422
+        mock_stream_query.assert_not_called()
@@ -12,13 +12,9 @@ import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.configs.utils import (
-        l_config,
-    )
+from app.utils.configs.utils import (
+    l_config,
+)
 
 from app.utils.exceptions.errors import APIError
 
@@ -40,7 +36,7 @@ class TestConfigList:
         """
         return extract_payload()["list"]
 
-    def _run_l_config(
+    async def _run_l_config(
         self,
         payload_extract,
         mock_execute_query,
@@ -67,94 +63,110 @@ class TestConfigList:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                l_config(config_definition_key, **params, request=mock_request)
+                await l_config(config_definition_key, **params, request=mock_request)
                 mock_execute_query.assert_not_called()
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
 
-        l_config(config_definition_key, **params, request=mock_request)
+        await l_config(config_definition_key, **params, request=mock_request)
         assert mock_execute_query.call_count == 3
 
     @patch.object(DataStore, "execute_query")
-    def test_list_w_cd_key(self, mock_execute_query, get_payload):
+    async def test_list_w_cd_key(self, mock_execute_query, get_payload):
         """
         Test that the function returns a list of configurations for a given configuration definition.
         """
         payload_extract = get_payload["test_list_w_cd_key"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_o_cd_key(self, mock_execute_query, get_payload):
+    async def test_list_o_cd_key(self, mock_execute_query, get_payload):
         """
         Test that the function raises an error when a configuration definition is not found.
         """
         payload_extract = get_payload["test_list_o_cd_key"]
-        self._run_l_config(
+        await self._run_l_config(
             payload_extract,
             mock_execute_query,
         )
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_page(self, mock_execute_query, get_payload):
+    async def test_list_n_page(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid page number.
         """
         payload_extract = get_payload["test_list_n_page"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_nlimit(self, mock_execute_query, get_payload):
+    async def test_list_n_nlimit(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid limit.
         """
         payload_extract = get_payload["test_list_n_nlimit"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_plimit(self, mock_execute_query, get_payload):
+    async def test_list_n_plimit(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an excessive limit.
         """
         payload_extract = get_payload["test_list_n_plimit"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_sort_by(self, mock_execute_query, get_payload):
+    async def test_list_n_sort_by(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid sort variable.
         """
         payload_extract = get_payload["test_list_n_sort_by"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_sort_order(self, mock_execute_query, get_payload):
+    async def test_list_n_sort_order(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid sort order.
         """
         payload_extract = get_payload["test_list_n_sort_order"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_search(self, mock_execute_query, get_payload):
+    async def test_list_n_search(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid search term.
         """
         payload_extract = get_payload["test_list_n_search"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_filters(self, mock_execute_query, get_payload):
+    async def test_list_filters(self, mock_execute_query, get_payload):
         """
         Test that the function returns a list of configurations for a given filter.
         """
         payload_extract = get_payload["test_list_filters"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_filters(self, mock_execute_query, get_payload):
+    async def test_list_n_filters(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid filter.
         """
         payload_extract = get_payload["test_list_n_filters"]
-        self._run_l_config(payload_extract, mock_execute_query)
+        await self._run_l_config(payload_extract, mock_execute_query)
+
+    @patch.object(DataStore, "execute_query")
+    async def test_list_n_cursor(self, mock_execute_query, get_payload):
+        """
+        Test that the function raises an exception when given a malformed cursor.
+        """
+        payload_extract = get_payload["test_list_n_cursor"]
+        await self._run_l_config(payload_extract, mock_execute_query)
+
+    @patch.object(DataStore, "execute_query")
+    async def test_list_n_cursor_page(self, mock_execute_query, get_payload):
+        """
+        Test that the function raises an exception when given a cursor and a page.
+        """
+        payload_extract = get_payload["test_list_n_cursor_page"]
+        await self._run_l_config(payload_extract, mock_execute_query)
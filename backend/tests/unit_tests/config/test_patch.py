@@ -0,0 +1,235 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.data.data_source import DataStore
+from app.utils.data.queries import MERGE_PATCH_FUNCTION
+from app.utils.exceptions.errors import APIError
+
+from app.utils.configs.utils import p_config, p_util_merge
+
+
+SCHEMA = {
+    "json_schema": {
+        "type": "object",
+        "properties": {
+            "name": {"type": "string"},
+            "limits": {
+                "type": "object",
+                "properties": {"max": {"type": "integer"}},
+            },
+        },
+        "required": ["name"],
+    }
+}
+
+BOUNDED_SCHEMA = {
+    "json_schema": {
+        "type": "object",
+        "properties": {"tags": {"type": "object", "minProperties": 1}},
+    }
+}
+
+
+class TestConfigPatch:
+    """
+    Test suite for the config patch functions.
+    """
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_w_subtree(self, mock_execute_query, mock_r_config_definition):
+        """
+        Test that a patch validated against the subschemas it touches is merged
+        by the database without reading the configuration.
+        """
+        mock_r_config_definition.return_value = SCHEMA
+        mock_execute_query.return_value = {"rows_affected": 1, "response": None}
+
+        await p_config(
+            "sample_config_definition",
+            "sample_config",
+            {"limits": {"max": 5}, "extra": None},
+        )
+
+        query, params = mock_execute_query.call_args.args
+        assert mock_execute_query.call_count == 1
+        assert f"SET data = {MERGE_PATCH_FUNCTION}(data, %s::JSONB)" in query
+        assert params[:2] == ('{"limits": {"max": 5}, "extra": null}', "sample_config")
+
+    @pytest.mark.parametrize("retries", [0, 1, 3])
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_w_retries(
+        self, mock_execute_query, mock_r_config_definition, retries
+    ):
+        """
+        Test that a patch is always tried once, whatever `PATCH_RETRIES` is.
+        """
+        mock_r_config_definition.return_value = SCHEMA
+        mock_execute_query.return_value = {"rows_affected": 1, "response": None}
+
+        with patch("app.utils.configs.utils.settings.PATCH_RETRIES", retries):
+            await p_config(
+                "sample_config_definition", "sample_config", {"limits": {"max": 5}}
+            )
+
+        assert mock_execute_query.call_count == 1
+        assert "UPDATE" in mock_execute_query.call_args.args[0]
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_o_empty(self, mock_execute_query, mock_r_config_definition):
+        """
+        Test that a patch removing every key of the document is rejected,
+        rather than leaving the configuration empty.
+        """
+        mock_r_config_definition.return_value = {"json_schema": None}
+        mock_execute_query.side_effect = lambda query, *args, **kwargs: {
+            "rows_affected": 0 if "UPDATE" in query else 1,
+            "response": [{"data": {"legacy": 1}, "version": 2}],
+        }
+
+        with pytest.raises(APIError) as error:
+            await p_config(
+                "sample_config_definition", "sample_config", {"legacy": None}
+            )
+
+        update_query = mock_execute_query.call_args_list[0].args[0]
+        assert f"AND {MERGE_PATCH_FUNCTION}(data, %s::JSONB) <> '{{}}'::JSONB" in (
+            update_query
+        )
+        assert error.value.detail[0]["msg"] == (
+            "Invalid Data! Configuration data must be provided."
+        )
+
+    @pytest.mark.parametrize(
+        "patch_data, expected_error",
+        [
+            ({"name": 1}, "Invalid Data! 1 is not of type 'string'"),
+            ({"limits": {"max": "5"}}, "Invalid Data! '5' is not of type 'integer'"),
+            ({"name": None}, "Invalid Data! 'name' is a required property"),
+            ({}, "Invalid Patch! Patch must change at least one field."),
+        ],
+    )
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_n_subtree(
+        self, mock_execute_query, mock_r_config_definition, patch_data, expected_error
+    ):
+        """
+        Test that a patch breaking the subschemas it touches is rejected.
+        """
+        mock_r_config_definition.return_value = SCHEMA
+
+        with pytest.raises(APIError) as error:
+            await p_config("sample_config_definition", "sample_config", patch_data)
+
+        assert error.value.detail[0]["msg"] == expected_error
+        mock_execute_query.assert_not_called()
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_w_document(self, mock_execute_query, mock_r_config_definition):
+        """
+        Test that a schema needing the whole document has the patched document
+        validated, and the patch applied only at the version read.
+        """
+        mock_r_config_definition.return_value = BOUNDED_SCHEMA
+        mock_execute_query.side_effect = [
+            {
+                "rows_affected": 1,
+                "response": [{"data": {"tags": {"a": 1}}, "version": 4}],
+            },
+            {"rows_affected": 1, "response": None},
+        ]
+
+        await p_config("sample_config_definition", "sample_config", {"tags": {"b": 2}})
+
+        query, params = mock_execute_query.call_args.args
+        assert "AND version = %s" in query
+        assert params[1:3] == ("sample_config", 4)
+
+    @pytest.mark.parametrize(
+        "etags, status_code, call_count",
+        [(None, 409, 5), (["sample_config-4"], 412, 3)],
+        ids=["contended", "preconditioned"],
+    )
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_o_version(
+        self,
+        mock_execute_query,
+        mock_r_config_definition,
+        etags,
+        status_code,
+        call_count,
+    ):
+        """
+        Test that a patch losing the race on every try is a conflict, retried
+        `PATCH_RETRIES` times, while one with an `If-Match` fails its
+        precondition on the first.
+        """
+        mock_r_config_definition.return_value = BOUNDED_SCHEMA
+        row = {"data": {"tags": {"a": 1}}, "version": 4}
+        mock_execute_query.side_effect = lambda query, *args, **kwargs: {
+            "rows_affected": 0 if "UPDATE" in query else 1,
+            "response": [row],
+        }
+
+        with patch("app.utils.configs.utils.settings.PATCH_RETRIES", 2):
+            with pytest.raises(APIError) as error:
+                await p_config(
+                    "sample_config_definition",
+                    "sample_config",
+                    {"tags": {"b": 2}},
+                    etags=etags,
+                )
+
+        assert error.value.status_code == status_code
+        assert mock_execute_query.call_count == call_count
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_patch_n_document(self, mock_execute_query, mock_r_config_definition):
+        """
+        Test that a patch leaving the whole document invalid is rejected.
+        """
+        mock_r_config_definition.return_value = BOUNDED_SCHEMA
+        mock_execute_query.return_value = {
+            "rows_affected": 1,
+            "response": [{"data": {"tags": {"a": 1}}, "version": 4}],
+        }
+
+        with pytest.raises(APIError) as error:
+            await p_config(
+                "sample_config_definition", "sample_config", {"tags": {"a": None}}
+            )
+
+        assert error.value.detail[0]["msg"] == "Invalid Data! {} should be non-empty"
+        assert mock_execute_query.call_count == 1
+
+    @pytest.mark.parametrize(
+        "target, patch_data, expected",
+        [
+            ({"a": "b"}, {"a": "c"}, {"a": "c"}),
+            ({"a": "b", "b": "c"}, {"a": None}, {"b": "c"}),
+            ({"a": {"b": "c"}}, {"a": {"b": "d", "c": None}}, {"a": {"b": "d"}}),
+            ({"a": [{"b": "c"}]}, {"a": [1]}, {"a": [1]}),
+            ({"e": None}, {"a": 1}, {"e": None, "a": 1}),
+            ({}, {"a": {"bb": {"ccc": None}}}, {"a": {"bb": {}}}),
+        ],
+    )
+    def test_patch_merge(self, target, patch_data, expected):
+        """
+        Test that merge patches are applied as RFC 7396 specifies.
+        """
+        assert p_util_merge(target, patch_data) == expected
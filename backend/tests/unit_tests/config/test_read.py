@@ -6,21 +6,19 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.configs.utils import (
-        r_config,
-    )
+from app.utils.configs.utils import (
+    r_config,
+)
 
+from app.utils.etags.utils import parse_etags
 from app.utils.exceptions.errors import APIError
+from app.utils.responses.utils import RawJSON, r_util_encode
 
 from tests.unit_tests.config.payloads.payload_extractor import (
     extract_payload_params,
@@ -40,7 +38,7 @@ class TestConfigRead:
         """
         return extract_payload()["read"]
 
-    def _run_r_config(
+    async def _run_r_config(
         self,
         payload_extract,
         mock_execute_query,
@@ -61,41 +59,103 @@ class TestConfigRead:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                r_config(config_definition_key, config_key)
+                await r_config(config_definition_key, config_key)
                 mock_execute_query.assert_not_called()
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
 
-        r_config(config_definition_key, config_key)
+        await r_config(config_definition_key, config_key)
         assert mock_execute_query.call_count == 2
 
     @patch.object(DataStore, "execute_query")
-    def test_read_w_key(self, mock_execute_query, get_payload):
+    async def test_read_w_key(self, mock_execute_query, get_payload):
         """
         Test that the function retrieves a configuration with valid keys.
         """
         payload_extract = get_payload["test_read_w_key"]
-        self._run_r_config(payload_extract, mock_execute_query)
+        await self._run_r_config(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_read_o_key(self, mock_execute_query, get_payload):
+    async def test_read_o_key(self, mock_execute_query, get_payload):
         """
         Test that the function raises an error when a configuration is not found.
         """
         payload_extract = get_payload["test_read_o_key"]
-        self._run_r_config(
+        await self._run_r_config(
             payload_extract,
             mock_execute_query,
         )
 
     @patch.object(DataStore, "execute_query")
-    def test_read_o_cd_key(self, mock_execute_query, get_payload):
+    async def test_read_o_cd_key(self, mock_execute_query, get_payload):
         """
         Test that the function raises an error when a configuration definition is not found.
         """
         payload_extract = get_payload["test_read_o_cd_key"]
-        self._run_r_config(
+        await self._run_r_config(
             payload_extract,
             mock_execute_query,
         )
+
+    @patch.object(DataStore, "execute_query")
+    async def test_read_w_etag(self, mock_execute_query, get_payload):
+        """
+        Test that the entity tags a client already has are passed to the query,
+        which leaves out the data when one of them matches.
+        """
+        payload_extract = get_payload["test_read_w_key"]
+        not_modified = {"config_key": "sample_config", "data": None, "version": 3}
+        mock_execute_query.side_effect = [
+            payload_extract["schema"],
+            {"rows_affected": 0, "response": [not_modified]},
+        ]
+
+        config = await r_config(
+            "sample_config_definition",
+            "sample_config",
+            parse_etags('W/"sample_config-3", "other_config-2", "abc"'),
+        )
+
+        assert config == {**not_modified, "etag": "sample_config-3"}
+        assert mock_execute_query.call_args.kwargs["params"] == (
+            False,
+            [3],
+            "sample_config",
+        )
+
+    @pytest.mark.parametrize(
+        "if_none_match, expected",
+        [
+            (None, []),
+            ('"abc"', ["abc"]),
+            ('W/"abc", "def"', ["abc", "def"]),
+            ('"abc", *', ["*"]),
+        ],
+    )
+    def test_read_etags(self, if_none_match, expected):
+        """
+        Test that If-None-Match is parsed into opaque tags, compared weakly.
+        """
+        assert parse_etags(if_none_match) == expected
+
+    @patch.object(DataStore, "execute_query")
+    async def test_read_w_raw(self, mock_execute_query, get_payload):
+        """
+        Test that a raw read selects the data as JSON text and hands it back
+        undecoded, to be spliced into the response.
+        """
+        payload_extract = get_payload["test_read_w_key"]
+        row = {"config_key": "sample_config", "data": '{"a": [1, 2]}', "version": 1}
+        mock_execute_query.side_effect = [
+            payload_extract["schema"],
+            {"rows_affected": 1, "response": [row]},
+        ]
+
+        config = await r_config("sample_config_definition", "sample_config", raw=True)
+
+        assert "data::TEXT" in mock_execute_query.call_args.args[0]
+        assert isinstance(config["data"], RawJSON)
+        assert r_util_encode({"data": config["data"], "errors": None}) == (
+            '{"data":{"a": [1, 2]}}'
+        )
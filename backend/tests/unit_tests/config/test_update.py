@@ -6,19 +6,15 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.configs.utils import (
-        u_config,
-    )
+from app.utils.configs.utils import (
+    u_config,
+)
 
 from app.utils.exceptions.errors import APIError
 
@@ -40,7 +36,7 @@ class TestConfigUpdate:
         """
         return extract_payload()["update"]
 
-    def _run_u_config(
+    async def _run_u_config(
         self,
         payload_extract,
         mock_execute_query,
@@ -62,26 +58,26 @@ class TestConfigUpdate:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                u_config(config_definition_key, config_key, data)
+                await u_config(config_definition_key, config_key, data)
             mock_execute_query.assert_not_called()
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
 
         mock_execute_query.return_value = payload_extract
-        u_config(config_definition_key, config_key, data)
+        await u_config(config_definition_key, config_key, data)
         mock_execute_query.assert_called_once()
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_w_schema(
+    async def test_update_w_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function updates an existing configuration with a valid schema.
         """
         payload_extract = get_payload["test_update_w_schema"]
-        self._run_u_config(
+        await self._run_u_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -89,14 +85,14 @@ class TestConfigUpdate:
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_wo_key(
+    async def test_update_wo_key(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function raises an exception if the configuration key does not exist.
         """
         payload_extract = get_payload["test_update_o_key"]
-        self._run_u_config(
+        await self._run_u_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -104,14 +100,14 @@ class TestConfigUpdate:
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_o_schema(
+    async def test_update_o_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function raises an exception if the schema is invalid.
         """
         payload_extract = get_payload["test_update_o_schema"]
-        self._run_u_config(
+        await self._run_u_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -119,15 +115,84 @@ class TestConfigUpdate:
 
     @patch("app.utils.configs.validations.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_n_schema(
+    async def test_update_n_schema(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
         Test that the function updates an existing configuration with invalid schema.
         """
         payload_extract = get_payload["test_update_n_schema"]
-        self._run_u_config(
+        await self._run_u_config(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
         )
+
+    @pytest.mark.parametrize(
+        "exists, expected_error",
+        [
+            (
+                True,
+                "Configuration with 'sample_config' has been modified since it was read!",
+            ),
+            (False, "Configuration not found with 'sample_config'!"),
+        ],
+    )
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_update_n_version(
+        self,
+        mock_execute_query,
+        mock_r_config_definition,
+        get_payload,
+        exists,
+        expected_error,
+    ):
+        """
+        Test that an update at a stale version is rejected as modified, while a
+        missing configuration is still not found.
+        """
+        payload_extract = get_payload["test_update_w_schema"]
+        mock_r_config_definition.return_value = payload_extract["schema"]
+        mock_execute_query.side_effect = [
+            {"rows_affected": 0, "response": None},
+            {"rows_affected": 1, "response": [{"version": 3}] if exists else []},
+        ]
+
+        with pytest.raises(APIError) as error:
+            await u_config(
+                "sample_config_definition",
+                "sample_config",
+                payload_extract["data"],
+                expected_version=2,
+            )
+
+        assert error.value.detail[0]["msg"] == expected_error
+        update_query, update_params = mock_execute_query.call_args_list[0].args
+        assert "AND version = %s" in update_query
+        assert update_params[1:3] == ("sample_config", 2)
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_update_o_version(
+        self, mock_execute_query, mock_r_config_definition, get_payload
+    ):
+        """
+        Test that an expected version below 1 is rejected.
+        """
+        payload_extract = get_payload["test_update_w_schema"]
+        mock_r_config_definition.return_value = payload_extract["schema"]
+
+        with pytest.raises(APIError) as error:
+            await u_config(
+                "sample_config_definition",
+                "sample_config",
+                payload_extract["data"],
+                expected_version=0,
+            )
+
+        detail = error.value.detail[0]
+        assert detail["msg"] == (
+            "Invalid Expected_version! Expected version must be a positive integer."
+        )
+        mock_execute_query.assert_not_called()
@@ -0,0 +1,118 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import patch
+
+import pytest
+import jsonschema
+
+from app.utils.config_definitions.cache import (
+    SchemaValidator,
+    SchemaValidatorCache,
+    evict_definition,
+    validator_cache,
+)
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"date": {"type": "string"}},
+    "required": ["date"],
+}
+
+
+class TestSchemaValidatorCache:
+    """
+    Test suite for the compiled JSON Schema validator cache.
+    """
+
+    def test_validator_reused(self):
+        """
+        Test that a schema is compiled once per definition, even if re-read.
+        """
+        cache = SchemaValidatorCache(max_size=2)
+        first = cache.get("sample_config_definition", SCHEMA)
+
+        assert cache.get("sample_config_definition", SCHEMA) is first
+        assert cache.get("sample_config_definition", dict(SCHEMA)) is first
+
+    def test_validator_recompiled(self):
+        """
+        Test that a changed schema is compiled again.
+        """
+        cache = SchemaValidatorCache(max_size=2)
+        first = cache.get("sample_config_definition", SCHEMA)
+        changed = {**SCHEMA, "required": []}
+
+        assert cache.get("sample_config_definition", changed) is not first
+
+    def test_validator_evicted(self):
+        """
+        Test that validators are evicted when full or when invalidated.
+        """
+        cache = SchemaValidatorCache(max_size=1)
+        first = cache.get("first", SCHEMA)
+        cache.get("second", SCHEMA)
+
+        assert cache.get("first", SCHEMA) is not first
+
+        first = cache.get("first", SCHEMA)
+        cache.invalidate("first")
+        assert cache.get("first", SCHEMA) is not first
+
+    def test_evict_definition(self):
+        """
+        Test that evicting a definition also drops its compiled validator.
+        """
+        first = validator_cache.get("sample_config_definition", SCHEMA)
+        evict_definition("sample_config_definition")
+
+        assert validator_cache.get("sample_config_definition", SCHEMA) is not first
+
+    def test_validator_errors(self):
+        """
+        Test that validation errors match `jsonschema.validate`.
+        """
+        validator = SchemaValidator(SCHEMA)
+        validator.validate({"date": "today"})
+
+        with pytest.raises(jsonschema.ValidationError) as e:
+            validator.validate({})
+
+        assert e.value.message == "'date' is a required property"
+
+    def test_invalid_schema(self):
+        """
+        Test that an invalid schema is rejected when compiled.
+        """
+        with pytest.raises(jsonschema.SchemaError):
+            SchemaValidator({"type": "unknown"})
+
+    def test_fast_validator(self):
+        """
+        Test that hot schemas switch to the code-generated validator without
+        changing the reported errors.
+        """
+        pytest.importorskip("fastjsonschema")
+
+        validator = SchemaValidator(SCHEMA, fast_threshold=2)
+        validator.validate({"date": "today"})
+        assert validator._fast_validator is None
+
+        validator.validate({"date": "today"})
+        assert validator._fast_validator is not None
+
+        with patch.object(validator, "_validator", wraps=validator._validator) as slow:
+            validator.validate({"date": "today"})
+            slow.iter_errors.assert_not_called()
+
+            with pytest.raises(jsonschema.ValidationError) as e:
+                validator.validate({})
+            slow.iter_errors.assert_called_once()
+
+        assert e.value.message == "'date' is a required property"
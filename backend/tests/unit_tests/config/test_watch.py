@@ -0,0 +1,267 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.data.data_source import DataStore
+from app.utils.exceptions.errors import APIError
+from app.utils.settings.config import settings
+
+from app.utils.changes.feed import ChangeFeed
+from app.utils.changes.queries import CHANGE_SEQ, CHANGE_WATERMARK, w_change_query
+from app.utils.changes.utils import (
+    PRUNE_BATCH_SIZE,
+    d_changes,
+    l_changes,
+    w_config,
+    w_config_stream,
+)
+
+
+HORIZON = {"rows_affected": 1, "response": [{"seq": 0}]}
+
+CHANGE = {
+    "seq": 8,
+    "config_key": "sample_config",
+    "operation": "update",
+    "data": {"name": "test_watch"},
+    "changed_at": "2024-01-01T00:00:00",
+}
+
+
+class TestConfigWatch:
+    """
+    Test suite for the config watch functions.
+    """
+
+    def test_feed_wake(self):
+        """
+        Test that waking a definition sets only the events of its watchers, and
+        that waking without a key sets every event.
+        """
+        feed = ChangeFeed()
+        first = feed.waiter("first_definition")
+        second = feed.waiter("second_definition")
+
+        feed.wake("first_definition")
+        assert first.is_set() and not second.is_set()
+        assert feed.waiter("first_definition") is not first
+
+        feed.wake()
+        assert second.is_set()
+
+    def test_change_query(self):
+        """
+        Test that a write is wrapped so its changes are logged and announced in
+        the same statement.
+        """
+        query, params = w_change_query(
+            "sample_config", "DELETE FROM sample_config", "'delete'"
+        )
+
+        assert "WITH written AS (DELETE FROM sample_config" in query
+        assert f"INSERT INTO {settings.CHANGE_LOG_TABLE}" in query
+        assert f"{CHANGE_SEQ} + ROW_NUMBER()" in query
+        assert "_seq" not in query
+        assert params == ("sample_config", settings.CHANGE_CHANNEL)
+
+    @patch("app.utils.changes.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_w_changes(self, mock_execute_query, _):
+        """
+        Test that a long-poll returns pending changes right away.
+        """
+        mock_execute_query.side_effect = [
+            HORIZON,
+            {"rows_affected": 1, "response": [CHANGE]},
+        ]
+
+        result = await w_config("sample_config_definition", since=7, timeout=5)
+
+        assert result == {"changes": [CHANGE], "last_seq": 8}
+        assert mock_execute_query.call_count == 2
+
+    @patch("app.utils.changes.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_w_timeout(self, mock_execute_query, _):
+        """
+        Test that a long-poll without changes returns empty once it times out,
+        resuming from the latest sequence number when none is given.
+        """
+        mock_execute_query.side_effect = [
+            {"rows_affected": 1, "response": [{"seq": 7}]},
+            {"rows_affected": 0, "response": []},
+            {"rows_affected": 0, "response": []},
+        ]
+
+        result = await w_config("sample_config_definition", timeout=0.01)
+
+        assert result == {"changes": [], "last_seq": 7}
+
+    @patch("app.utils.changes.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_w_wake(self, mock_execute_query, _):
+        """
+        Test that a waiting long-poll reads the change log again once woken.
+        """
+        mock_execute_query.side_effect = [
+            HORIZON,
+            {"rows_affected": 0, "response": []},
+            {"rows_affected": 1, "response": [CHANGE]},
+        ]
+
+        with patch("app.utils.changes.utils.change_feed", ChangeFeed()) as feed:
+            watch = asyncio.create_task(
+                w_config("sample_config_definition", since=7, timeout=5)
+            )
+            while mock_execute_query.call_count < 2:
+                await asyncio.sleep(0)
+            feed.wake("sample_config_definition")
+
+            result = await asyncio.wait_for(watch, timeout=1)
+
+        assert result["changes"] == [CHANGE]
+
+    @pytest.mark.parametrize(
+        "params, expected_error",
+        [
+            (
+                {"timeout": 3600},
+                "Invalid Timeout! Timeout must be between 0 and 30 seconds.",
+            ),
+            ({"since": -1}, "Invalid Since! Since must be a non-negative integer."),
+        ],
+    )
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_n_params(self, mock_execute_query, params, expected_error):
+        """
+        Test that invalid watch parameters are rejected.
+        """
+        with pytest.raises(APIError) as error:
+            await w_config("sample_config_definition", **params)
+
+        assert error.value.detail[0]["msg"] == expected_error
+        mock_execute_query.assert_not_called()
+
+    @patch("app.utils.changes.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_stream(self, mock_execute_query, _):
+        """
+        Test that changes are streamed as Server-Sent Events identified by their
+        sequence number.
+        """
+        mock_execute_query.side_effect = [
+            HORIZON,
+            {"rows_affected": 1, "response": [CHANGE]},
+        ]
+
+        events = await w_config_stream("sample_config_definition", since=7)
+        first = await events.__anext__()
+        second = await events.__anext__()
+        await events.aclose()
+
+        assert first == b"id: 7\n\n"
+        assert second.startswith(b"id: 8\nevent: update\ndata: {")
+        assert second.endswith(b"\n\n")
+
+    @patch("app.utils.changes.validations.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_watch_stream_drop(self, mock_execute_query, _):
+        """
+        Test that the stream ends with the drop of its definition, leaving out
+        the changes logged after it.
+        """
+        drop = {**CHANGE, "seq": 9, "config_key": None, "operation": "drop"}
+        after = {**CHANGE, "seq": 10, "operation": "create"}
+        mock_execute_query.side_effect = [
+            HORIZON,
+            {"rows_affected": 3, "response": [CHANGE, drop, after]},
+        ]
+
+        events = await w_config_stream("sample_config_definition", since=7)
+        chunks = [chunk async for chunk in events]
+
+        assert len(chunks) == 2
+        assert b"id: 9\nevent: drop\n" in chunks[1]
+        assert chunks[1].endswith(b"\n\n")
+        assert b"id: 10" not in chunks[1]
+        assert mock_execute_query.call_count == 2
+
+    @patch.object(DataStore, "execute_query")
+    async def test_changes_list(self, mock_execute_query):
+        """
+        Test that the changes of every definition are listed after a sequence
+        number, with the sequence number to resume from.
+        """
+        change = {**CHANGE, "config_definition_key": "sample_config_definition"}
+        mock_execute_query.side_effect = [
+            HORIZON,
+            {"rows_affected": 1, "response": [change]},
+        ]
+
+        result = await l_changes(since=7, limit=10)
+
+        assert result == {"changes": [change], "last_seq": 8}
+        assert mock_execute_query.call_args.args[1] == (7, 10)
+        assert f"seq < {CHANGE_WATERMARK}" in mock_execute_query.call_args.args[0]
+
+    @pytest.mark.parametrize("since, pruned", [(7, False), (3, True), (0, False)])
+    @patch.object(DataStore, "execute_query")
+    async def test_changes_pruned(self, mock_execute_query, since, pruned):
+        """
+        Test that reading changes from before the latest pruned one is
+        answered with 410, unless reading the log from the start.
+        """
+        mock_execute_query.side_effect = [
+            {"rows_affected": 1, "response": [{"seq": 5}]},
+            {"rows_affected": 0, "response": []},
+        ]
+
+        if not pruned:
+            await l_changes(since=since, limit=10)
+            return
+
+        with pytest.raises(APIError) as error:
+            await l_changes(since=since, limit=10)
+
+        assert error.value.status_code == 410
+        assert error.value.detail[0]["msg"] == "Changes after '3' have been pruned!"
+
+    @patch.object(DataStore, "execute_query")
+    async def test_changes_n_limit(self, mock_execute_query):
+        """
+        Test that listing changes rejects a limit out of range.
+        """
+        with pytest.raises(APIError) as error:
+            await l_changes(since=0, limit=5000)
+
+        detail = error.value.detail[0]
+        assert detail["msg"] == "Invalid Limit! Limit must be between 1 and 1000."
+        mock_execute_query.assert_not_called()
+
+    @patch.object(DataStore, "execute_query")
+    async def test_changes_prune(self, mock_execute_query):
+        """
+        Test that the change log is pruned in batches until one comes back
+        short.
+        """
+        mock_execute_query.side_effect = [
+            {"rows_affected": 1, "response": [{"pruned": PRUNE_BATCH_SIZE}]},
+            {"rows_affected": 1, "response": [{"pruned": 3}]},
+        ]
+
+        with patch.object(settings, "CHANGE_LOG_RETENTION", 60.0):
+            assert await d_changes() == PRUNE_BATCH_SIZE + 3
+
+        query, params = mock_execute_query.call_args.args[:2]
+        assert "pg_try_advisory_xact_lock" in query
+        assert f"UPDATE {settings.CHANGE_LOG_TABLE}_horizon" in query
+        assert params == (settings.CHANGE_LOG_TABLE, 60.0, PRUNE_BATCH_SIZE)
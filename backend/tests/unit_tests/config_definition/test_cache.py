@@ -0,0 +1,121 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import patch
+
+from app.utils.data.data_source import DataStore
+from app.utils.settings.config import settings
+from app.utils.data.queries import QUERY_NOTIFY
+
+from app.utils.config_definitions.cache import DefinitionCache
+from app.utils.config_definitions.utils import (
+    r_config_definition,
+    d_config_definition,
+)
+
+
+class TestDefinitionCache:
+    """
+    Test suite for the configuration definition cache.
+    """
+
+    def test_cache_get_set(self):
+        """
+        Test that a cached value is returned until it is invalidated.
+        """
+        cache = DefinitionCache(ttl=60, max_size=2)
+        cache.set("first", {"key": 1}, cache.generation)
+
+        assert cache.get("first") == {"key": 1}
+        cache.invalidate("first")
+        assert cache.get("first") is None
+
+    def test_cache_ttl(self):
+        """
+        Test that an entry expires once its TTL has elapsed.
+        """
+        cache = DefinitionCache(ttl=60, max_size=2)
+        cache.set("first", {"key": 1}, cache.generation)
+
+        with patch("app.utils.config_definitions.cache.time.monotonic") as now:
+            now.return_value = 1e12
+            assert cache.get("first") is None
+
+    def test_cache_eviction(self):
+        """
+        Test that the least recently used entry is evicted when the cache is full.
+        """
+        cache = DefinitionCache(ttl=60, max_size=2)
+        cache.set("first", 1, cache.generation)
+        cache.set("second", 2, cache.generation)
+        cache.get("first")
+        cache.set("third", 3, cache.generation)
+
+        assert cache.get("first") == 1
+        assert cache.get("second") is None
+        assert cache.get("third") == 3
+
+    def test_cache_stale_set(self):
+        """
+        Test that a value read before an invalidation is not cached.
+        """
+        cache = DefinitionCache(ttl=60, max_size=2)
+        generation = cache.generation
+        cache.invalidate("first")
+        cache.set("first", 1, generation)
+
+        assert cache.get("first") is None
+
+    def test_cache_invalidate_all(self):
+        """
+        Test that invalidating without a key clears the whole cache.
+        """
+        cache = DefinitionCache(ttl=60, max_size=2)
+        cache.set("first", 1, cache.generation)
+        cache.set("second", 2, cache.generation)
+        cache.invalidate()
+
+        assert cache.get("first") is None
+        assert cache.get("second") is None
+
+    @patch.object(DataStore, "execute_query")
+    async def test_read_cached(self, mock_execute_query):
+        """
+        Test that a configuration definition is read from the database only once.
+        """
+        mock_execute_query.return_value = {
+            "rows_affected": 1,
+            "response": [{"config_definition_key": "sample_config_definition"}],
+        }
+
+        first = await r_config_definition("sample_config_definition")
+        second = await r_config_definition("sample_config_definition")
+
+        assert first == second
+        mock_execute_query.assert_called_once()
+
+    @patch.object(DataStore, "execute_query")
+    async def test_delete_invalidates(self, mock_execute_query):
+        """
+        Test that deleting a configuration definition evicts and broadcasts it.
+        """
+        mock_execute_query.return_value = {
+            "rows_affected": 1,
+            "response": [{"config_definition_key": "sample_config_definition"}],
+        }
+
+        await r_config_definition("sample_config_definition")
+        await d_config_definition("sample_config_definition")
+        await r_config_definition("sample_config_definition")
+
+        mock_execute_query.assert_any_call(
+            QUERY_NOTIFY,
+            (settings.DEFINITION_CACHE_CHANNEL, "sample_config_definition"),
+            kind="notify",
+        )
+        assert mock_execute_query.call_count == 5
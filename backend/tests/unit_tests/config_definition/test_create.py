@@ -6,19 +6,15 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.config_definitions.utils import (
-        c_config_definition,
-    )
+from app.utils.config_definitions.utils import (
+    c_config_definition,
+)
 
 from app.utils.config_definitions.queries import (
     c_config_definition_query,
@@ -46,7 +42,7 @@ class TestConfigDefinitionCreate:
         """
         return extract_payload()["create"]
 
-    def _run_c_config_definition(
+    async def _run_c_config_definition(
         self,
         payload_extract,
         mock_execute_query,
@@ -66,7 +62,7 @@ class TestConfigDefinitionCreate:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                c_config_definition(config_key, schema, indexes)
+                await c_config_definition(config_key, schema, indexes)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             return
@@ -77,48 +73,80 @@ class TestConfigDefinitionCreate:
         )
         index_query, index_params = c_index_query(config_key, index)
 
-        c_config_definition(config_key, schema, indexes)
+        await c_config_definition(config_key, schema, indexes)
 
-        mock_execute_query.assert_any_call(creation_query, creation_params)
-        mock_execute_query.assert_any_call(internal_query, internal_params)
-        mock_execute_query.assert_any_call(index_query, index_params)
+        mock_execute_query.assert_any_call(creation_query, creation_params, kind="ddl")
+        mock_execute_query.assert_any_call(
+            internal_query, internal_params, kind="c_config_definition"
+        )
+        mock_execute_query.assert_any_call(index_query, index_params, kind="ddl")
 
     @patch.object(DataStore, "execute_query")
-    def test_create_w_schema(self, mock_execute_query, get_payload):
+    async def test_create_w_schema(self, mock_execute_query, get_payload):
         """
         Test that the function creates a new configuration definition with a schema.
         """
         payload_extract = get_payload["test_create_w_schema"]
-        self._run_c_config_definition(payload_extract, mock_execute_query)
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_create_o_schema(self, mock_execute_query, get_payload):
+    async def test_create_o_schema(self, mock_execute_query, get_payload):
         """
         Test that the function creates a new configuration definition without a schema.
         """
         payload_extract = get_payload["test_create_o_schema"]
-        self._run_c_config_definition(payload_extract, mock_execute_query)
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_create_n_schema(self, mock_execute_query, get_payload):
+    async def test_create_n_schema(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception if the schema is invalid.
         """
         payload_extract = get_payload["test_create_n_schema"]
-        self._run_c_config_definition(payload_extract, mock_execute_query)
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_create_d_sindex(self, mock_execute_query, get_payload):
+    async def test_create_d_sindex(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception if the index are duplicated.
         """
         payload_extract = get_payload["test_create_d_sindex"]
-        self._run_c_config_definition(payload_extract, mock_execute_query)
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_create_n_sindex(self, mock_execute_query, get_payload):
+    async def test_create_n_sindex(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception if the indexes are not in the schema.
         """
         payload_extract = get_payload["test_create_n_sindex"]
-        self._run_c_config_definition(payload_extract, mock_execute_query)
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
+
+    @patch.object(DataStore, "execute_query")
+    async def test_create_w_mindex(self, mock_execute_query, get_payload):
+        """
+        Test that the function creates indexes with the requested index method.
+        """
+        payload_extract = get_payload["test_create_w_mindex"]
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
+
+    @patch.object(DataStore, "execute_query")
+    async def test_create_n_mindex(self, mock_execute_query, get_payload):
+        """
+        Test that the function raises an exception if the index method is unknown.
+        """
+        payload_extract = get_payload["test_create_n_mindex"]
+        await self._run_c_config_definition(payload_extract, mock_execute_query)
+
+    def test_index_expressions(self):
+        """
+        Test that indexes are built on the expressions the list queries use.
+        """
+        btree_query, _ = c_index_query("sample_config", "setting.first_key")
+        hash_query, _ = c_index_query("sample_config", "setting.first_key:hash")
+        gin_query, _ = c_index_query("sample_config", "setting.first_key:gin")
+
+        assert (
+            "USING btree ((data->'setting'->>'first_key'), config_key)" in btree_query
+        )
+        assert "USING hash ((data->'setting'->>'first_key'))" in hash_query
+        assert "USING gin ((data->'setting'->'first_key'))" in gin_query
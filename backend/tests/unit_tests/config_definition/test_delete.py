@@ -6,15 +6,11 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import pytest
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.config_definitions.utils import d_config_definition
+from app.utils.config_definitions.utils import d_config_definition
 
 from app.utils.config_definitions.queries import (
     d_config_definition_query,
@@ -41,7 +37,7 @@ class TestConfigDefinitionDelete:
         """
         return extract_payload()["delete"]
 
-    def _run_d_config_definition(
+    async def _run_d_config_definition(
         self,
         payload_extract,
         mock_execute_query,
@@ -63,7 +59,7 @@ class TestConfigDefinitionDelete:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                d_config_definition(config_key)
+                await d_config_definition(config_key)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             mock_execute_query.assert_not_called()
@@ -72,23 +68,25 @@ class TestConfigDefinitionDelete:
         delete_query, delete_params = d_config_definition_query(config_key)
         internal_query, internal_params = internal_d_definition_query(config_key)
 
-        d_config_definition(config_key)
+        await d_config_definition(config_key)
 
-        mock_execute_query.assert_any_call(delete_query, delete_params)
-        mock_execute_query.assert_any_call(internal_query, internal_params)
+        mock_execute_query.assert_any_call(delete_query, delete_params, kind="ddl")
+        mock_execute_query.assert_any_call(
+            internal_query, internal_params, kind="d_config_definition"
+        )
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_w_key(self, mock_execute_query, get_payload):
+    async def test_delete_w_key(self, mock_execute_query, get_payload):
         """
         Test that the function deletes a configuration definition with a valid key.
         """
         payload_extract = get_payload["test_delete_w_key"]
-        self._run_d_config_definition(payload_extract, mock_execute_query)
+        await self._run_d_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_delete_o_key(self, mock_execute_query, get_payload):
+    async def test_delete_o_key(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when trying to delete with an empty key.
         """
         payload_extract = get_payload["test_delete_o_key"]
-        self._run_d_config_definition(payload_extract, mock_execute_query)
+        await self._run_d_config_definition(payload_extract, mock_execute_query)
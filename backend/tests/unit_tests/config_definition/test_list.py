@@ -6,15 +6,12 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import pytest
 from app.utils.data.data_source import DataStore
+from app.utils.settings.config import settings
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.config_definitions.utils import l_config_definition
+from app.utils.config_definitions.utils import l_config_definition
 
 from app.utils.config_definitions.queries import l_config_definition_query
 
@@ -38,7 +35,7 @@ class TestConfigDefinitionList:
         """
         return extract_payload()["list"]
 
-    def _run_l_config_definition(
+    async def _run_l_config_definition(
         self,
         payload_extract,
         mock_execute_query,
@@ -58,7 +55,7 @@ class TestConfigDefinitionList:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                l_config_definition(**params)
+                await l_config_definition(**params)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             mock_execute_query.assert_not_called()
@@ -67,70 +64,118 @@ class TestConfigDefinitionList:
         mock_execute_query.return_value = return_value
         l_config_definition_query(**params)
 
-        l_config_definition(**params)
+        await l_config_definition(**params)
 
         assert mock_execute_query.call_count == 2
 
     @patch.object(DataStore, "execute_query")
-    def test_list_w_params(self, mock_execute_query, get_payload):
+    async def test_list_w_params(self, mock_execute_query, get_payload):
         """
         Test that the function lists configuration definitions with a valid page number and items per page.
         """
         payload_extract = get_payload["test_list_w_params"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_o_params(self, mock_execute_query, get_payload):
+    async def test_list_o_params(self, mock_execute_query, get_payload):
         """
         Test that the function lists configuration definitions without any parameters
         """
         payload_extract = get_payload["test_list_o_params"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_page(self, mock_execute_query, get_payload):
+    async def test_list_n_page(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid page number.
         """
         payload_extract = get_payload["test_list_n_page"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_nlimit(self, mock_execute_query, get_payload):
+    async def test_list_n_nlimit(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid limit.
         """
         payload_extract = get_payload["test_list_n_nlimit"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_plimit(self, mock_execute_query, get_payload):
+    async def test_list_n_plimit(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an excessive limit.
         """
         payload_extract = get_payload["test_list_n_plimit"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_sort_by(self, mock_execute_query, get_payload):
+    async def test_list_n_sort_by(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid sort variable.
         """
         payload_extract = get_payload["test_list_n_sort_by"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_sort_order(self, mock_execute_query, get_payload):
+    async def test_list_n_sort_order(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid sort order.
         """
         payload_extract = get_payload["test_list_n_sort_order"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_list_n_search(self, mock_execute_query, get_payload):
+    async def test_list_n_search(self, mock_execute_query, get_payload):
         """
         Test that the function raises an exception when given an invalid search term.
         """
         payload_extract = get_payload["test_list_n_search"]
-        self._run_l_config_definition(payload_extract, mock_execute_query)
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
+
+    @patch.object(DataStore, "execute_query")
+    async def test_list_w_count(self, mock_execute_query, get_payload):
+        """
+        Test that the function skips the count when asked not to count.
+        """
+        payload_extract = get_payload["test_list_w_count"]
+        (_, _, _, _, params, return_value, _) = extract_payload_params(payload_extract)
+        mock_execute_query.return_value = return_value
+
+        _, meta = await l_config_definition(**params)
+
+        assert meta == {"total": None, "count": "none"}
+        assert mock_execute_query.call_count == 1
+
+    @patch.object(DataStore, "execute_query")
+    async def test_list_w_estimated_count(self, mock_execute_query, get_payload):
+        """
+        Test that small estimated counts are exact and large ones are planned.
+        """
+        payload_extract = get_payload["test_list_w_count"]
+        (_, _, _, _, _, return_value, _) = extract_payload_params(payload_extract)
+        mock_execute_query.return_value = return_value
+
+        _, meta = await l_config_definition(count="estimated")
+        assert meta == {"total": 1, "count": "exact"}
+
+        mock_execute_query.side_effect = [
+            return_value,
+            {
+                "rows_affected": 1,
+                "response": [{"count": settings.COUNT_ESTIMATE_THRESHOLD}],
+            },
+            {
+                "rows_affected": 1,
+                "response": [{"QUERY PLAN": [{"Plan": {"Plan Rows": 5000}}]}],
+            },
+        ]
+        _, meta = await l_config_definition(count="estimated")
+        assert meta == {"total": 5000, "count": "estimated"}
+
+    @patch.object(DataStore, "execute_query")
+    async def test_list_n_count(self, mock_execute_query, get_payload):
+        """
+        Test that the function raises an exception when given an invalid count mode.
+        """
+        payload_extract = get_payload["test_list_n_count"]
+        await self._run_l_config_definition(payload_extract, mock_execute_query)
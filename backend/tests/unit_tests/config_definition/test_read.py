@@ -6,15 +6,11 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import pytest
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.config_definitions.utils import r_config_definition
+from app.utils.config_definitions.utils import r_config_definition
 
 from app.utils.config_definitions.queries import r_config_definition_query
 
@@ -38,7 +34,7 @@ class TestConfigDefinitionRead:
         """
         return extract_payload()["read"]
 
-    def _run_r_config_definition(self, payload_extract, mock_execute_query):
+    async def _run_r_config_definition(self, payload_extract, mock_execute_query):
         """
         Helper function to run r_config_definition and handle assertions.
         """
@@ -54,7 +50,7 @@ class TestConfigDefinitionRead:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                r_config_definition(config_key)
+                await r_config_definition(config_key)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             mock_execute_query.assert_not_called()
@@ -63,24 +59,27 @@ class TestConfigDefinitionRead:
         mock_execute_query.return_value = return_value
         internal_query, internal_params = r_config_definition_query(config_key)
 
-        r_config_definition(config_key)
+        await r_config_definition(config_key)
 
         mock_execute_query.assert_called_once_with(
-            internal_query, params=internal_params, mode="retrieve"
+            internal_query,
+            params=internal_params,
+            mode="retrieve",
+            kind="r_config_definition",
         )
 
     @patch.object(DataStore, "execute_query")
-    def test_read_w_key(self, mock_execute_query, get_payload):
+    async def test_read_w_key(self, mock_execute_query, get_payload):
         """
         Test that the function retrieves a configuration definition with a given key.
         """
         payload_extract = get_payload["test_read_w_key"]
-        self._run_r_config_definition(payload_extract, mock_execute_query)
+        await self._run_r_config_definition(payload_extract, mock_execute_query)
 
     @patch.object(DataStore, "execute_query")
-    def test_read_o_key(self, mock_execute_query, get_payload):
+    async def test_read_o_key(self, mock_execute_query, get_payload):
         """
         Test that the function raises an API Error if the config key is not given.
         """
         payload_extract = get_payload["test_read_o_key"]
-        self._run_r_config_definition(payload_extract, mock_execute_query)
+        await self._run_r_config_definition(payload_extract, mock_execute_query)
@@ -6,21 +6,20 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import pytest
 
 from app.utils.data.data_source import DataStore
 
-with patch("app.utils.data.data_source.connect") as mock_connect:
-    mock_conn = MagicMock()
-    mock_connect.return_value = mock_conn
-
-    from app.utils.config_definitions.utils import u_config_definition
+from app.utils.config_definitions.utils import u_config_definition
 
 from app.utils.config_definitions.queries import (
     internal_u_definition_query,
     l_index_query,
+    INDEX_NAME_MAX_LENGTH,
+    index_name,
     c_index_query,
+    u_index_query,
     d_index_query,
 )
 
@@ -44,7 +43,7 @@ class TestConfigDefinitionUpdate:
         """
         return extract_payload()["update"]
 
-    def _run_u_config_definition(
+    async def _run_u_config_definition(
         self,
         payload_extract,
         mock_execute_query,
@@ -68,7 +67,7 @@ class TestConfigDefinitionUpdate:
 
         if expected_error:
             with pytest.raises(APIError) as error:
-                u_config_definition(config_key, updated_indexes_list)
+                await u_config_definition(config_key, updated_indexes_list)
             detail = error.value.detail[0]
             assert detail["msg"] == expected_error
             mock_execute_query.assert_not_called()
@@ -79,24 +78,35 @@ class TestConfigDefinitionUpdate:
         )
         index_list_query, index_list_params = l_index_query(config_key)
         index_creation_query, index_creation_params = c_index_query(config_key, "name")
-        index_deletion_query, index_deletion_params = d_index_query(config_key, "date")
+        index_deletion_query, index_deletion_params = d_index_query(
+            index_name(config_key, "date")
+        )
 
         mock_execute_query.return_value = return_value
 
-        u_config_definition(config_key, updated_indexes_list)
+        await u_config_definition(config_key, updated_indexes_list)
 
         mock_execute_query.assert_any_call(
-            index_list_query, params=index_list_params, mode="retrieve"
+            index_list_query,
+            params=index_list_params,
+            mode="retrieve",
+            kind="u_config_definition_indexes",
+        )
+        mock_execute_query.assert_any_call(
+            index_creation_query, index_creation_params, kind="ddl"
+        )
+        mock_execute_query.assert_any_call(
+            index_deletion_query, index_deletion_params, kind="ddl"
         )
-        mock_execute_query.assert_any_call(index_creation_query, index_creation_params)
-        mock_execute_query.assert_any_call(index_deletion_query, index_deletion_params)
 
         mock_r_config_definition.assert_called_once_with(config_key)
-        mock_execute_query.assert_any_call(internal_query, internal_params)
+        mock_execute_query.assert_any_call(
+            internal_query, internal_params, kind="u_config_definition"
+        )
 
     @patch("app.utils.config_definitions.utils.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_w_index(
+    async def test_update_w_index(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
@@ -104,7 +114,7 @@ class TestConfigDefinitionUpdate:
         """
         payload_extract = get_payload["test_update_w_index"]
 
-        self._run_u_config_definition(
+        await self._run_u_config_definition(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -112,7 +122,7 @@ class TestConfigDefinitionUpdate:
 
     @patch("app.utils.config_definitions.utils.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_d_index(
+    async def test_update_d_index(
         self, mock_execute_query, mock_r_config_definition, get_payload
     ):
         """
@@ -120,7 +130,7 @@ class TestConfigDefinitionUpdate:
         """
         payload_extract = get_payload["test_update_d_index"]
 
-        self._run_u_config_definition(
+        await self._run_u_config_definition(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
@@ -128,14 +138,148 @@ class TestConfigDefinitionUpdate:
 
     @patch("app.utils.config_definitions.utils.r_config_definition")
     @patch.object(DataStore, "execute_query")
-    def test_update_n_index(self, mock_execute_query, mock_r_config_definition):
+    async def test_update_n_index(self, mock_execute_query, mock_r_config_definition):
         """
         Test that the function raises an exception if the secondary index is not found.
         """
         payload_extract = extract_payload()["update"]["test_update_n_index"]
 
-        self._run_u_config_definition(
+        await self._run_u_config_definition(
             payload_extract,
             mock_execute_query,
             mock_r_config_definition,
         )
+
+    def test_index_names(self):
+        """
+        Test that index names fit in the length Postgres keeps, and stay unique
+        when long keys and paths are cut short.
+        """
+        config_key = "long_config_definition_key_" + "x" * 40
+        indexes = [
+            "settings.limits.requests_per_minute",
+            "settings.limits.requests_per_minute:hash",
+            "settings.limits.requests_per_second",
+        ]
+
+        names = [index_name(config_key, index) for index in indexes]
+        names += [index_name(config_key, "created_at", fixed=True)]
+        names += [index_name(config_key, "modified_at", fixed=True)]
+
+        assert all(len(name) <= INDEX_NAME_MAX_LENGTH for name in names)
+        assert all(name == name.lower() for name in names)
+        assert len(set(names)) == len(names)
+        assert index_name(config_key, "settings.limits.requests_per_minute:btree") in (
+            names
+        )
+        assert index_name(config_key, "created_at") not in names
+
+    @patch("app.utils.config_definitions.utils.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_update_long_key(self, mock_execute_query, mock_r_config_definition):
+        """
+        Test that updating a definition with a long key and a nested index
+        keeps its indexes.
+        """
+        config_key = "long_config_definition_key_" + "x" * 40
+        indexes = ["settings.limits.requests_per_minute"]
+        names = [
+            index_name(config_key, "created_at", fixed=True),
+            index_name(config_key, "modified_at", fixed=True),
+            index_name(config_key, indexes[0]),
+        ]
+
+        mock_r_config_definition.return_value = {
+            "json_schema": {
+                "type": "object",
+                "properties": {
+                    "settings": {
+                        "type": "object",
+                        "properties": {
+                            "limits": {
+                                "type": "object",
+                                "properties": {
+                                    "requests_per_minute": {"type": "integer"}
+                                },
+                            }
+                        },
+                    }
+                },
+            }
+        }
+        mock_execute_query.return_value = {
+            "rows_affected": 3,
+            "response": [
+                {"indexname": name, "indexdef": f"CREATE INDEX {name}"}
+                for name in [*names, f"{config_key}_pkey"]
+            ],
+        }
+
+        await u_config_definition(config_key, indexes)
+
+        queries = [call.args[0] for call in mock_execute_query.call_args_list]
+        assert not any("CREATE INDEX" in query for query in queries)
+        assert not any("DROP INDEX" in query for query in queries)
+
+    @patch("app.utils.config_definitions.utils.r_config_definition")
+    @patch.object(DataStore, "execute_query")
+    async def test_update_legacy_index(
+        self, mock_execute_query, mock_r_config_definition
+    ):
+        """
+        Test that indexes named before names were hashed are renamed rather
+        than rebuilt, and that GIN indexes of the first releases are rebuilt.
+        """
+        config_key = "sample_config"
+        mock_r_config_definition.return_value = {
+            "json_schema": {
+                "type": "object",
+                "properties": {"name": {"type": "string"}},
+            }
+        }
+        mock_execute_query.return_value = {
+            "rows_affected": 3,
+            "response": [
+                {
+                    "indexname": "idx_sample_config_created_at",
+                    "indexdef": "CREATE INDEX idx_sample_config_created_at "
+                    "ON public.sample_config USING btree (created_at, config_key)",
+                },
+                {
+                    "indexname": "idx_sample_config_name_btree",
+                    "indexdef": "CREATE INDEX idx_sample_config_name_btree "
+                    "ON public.sample_config USING btree "
+                    "(((data ->> 'name'::text)), config_key)",
+                },
+                {
+                    "indexname": "idx_sample_config_name",
+                    "indexdef": "CREATE INDEX idx_sample_config_name "
+                    "ON public.sample_config USING gin (((data -> 'name'::text)))",
+                },
+            ],
+        }
+
+        await u_config_definition(config_key, ["name"])
+
+        mock_execute_query.assert_any_call(
+            *u_index_query(
+                "idx_sample_config_created_at",
+                index_name(config_key, "created_at", fixed=True),
+            ),
+            kind="ddl",
+        )
+        mock_execute_query.assert_any_call(
+            *u_index_query(
+                "idx_sample_config_name_btree", index_name(config_key, "name")
+            ),
+            kind="ddl",
+        )
+        mock_execute_query.assert_any_call(
+            *c_index_query(config_key, "modified_at", fixed=True), kind="ddl"
+        )
+        mock_execute_query.assert_any_call(
+            *d_index_query("idx_sample_config_name"), kind="ddl"
+        )
+
+        queries = [call.args[0] for call in mock_execute_query.call_args_list]
+        assert c_index_query(config_key, "name")[0] not in queries
@@ -0,0 +1,21 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import pytest
+
+from app.utils.config_definitions.cache import evict_definition
+
+
+@pytest.fixture(autouse=True)
+def clear_definition_cache():
+    """
+    Clears the configuration definition caches so every test starts cold.
+    """
+    evict_definition()
+    yield
+    evict_definition()
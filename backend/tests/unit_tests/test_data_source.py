@@ -6,13 +6,22 @@
 
 """
 
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fastapi.responses import StreamingResponse
+
 from app.utils.settings.config import settings
 from app.utils.data.queries import (
     QUERY_CREATE_TABLE,
     QUERY_CREATE_INDEX,
+    QUERY_CREATE_CHANGE_LOG,
+    QUERY_CREATE_MERGE_PATCH,
+    QUERY_MIGRATE_CONFIG_VERSION,
 )
-from app.utils.data.data_source import DataStore
+from app.utils.data.data_source import DataStore, QueryBudgetMiddleware
 
 
 class TestDataStore:
@@ -20,77 +29,258 @@ class TestDataStore:
     Test suite for the DataStore class.
     """
 
-    @patch("app.utils.data.data_source.connect")
-    def test_does_create_connection(self, mock_connect):
+    @pytest.fixture
+    def mock_pool(self):
+        """
+        Patches the async connection pool and yields the pool and its cursor.
         """
-        Test that the DataStore class correctly establishes a database connection.
+        with patch("app.utils.data.data_source.AsyncConnectionPool") as mock_pool_cls:
+            mock_pool = mock_pool_cls.return_value
+            mock_pool.open = AsyncMock()
+            mock_pool.close = AsyncMock()
+
+            mock_cursor = MagicMock()
+            mock_cursor.execute = AsyncMock()
+            mock_cursor.fetchall = AsyncMock(return_value=[])
+            mock_cursor.close = AsyncMock()
+
+            mock_conn = MagicMock()
+            mock_conn.cursor.return_value = mock_cursor
+            mock_pool.connection.return_value.__aenter__.return_value = mock_conn
 
-        This test mocks the `connect` function from psycopg2 to simulate
-        the creation of a database connection. It verifies that the connection
-        is established with the correct parameters and that autocommit is enabled.
+            yield mock_pool_cls, mock_cursor
+
+    async def test_does_create_connection(self, mock_pool):
         """
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
+        Test that the DataStore class correctly establishes a database connection pool.
+
+        This test mocks the `AsyncConnectionPool` class from psycopg_pool to
+        simulate the creation of the pool. It verifies that the pool is created
+        with the correct connection parameters, sizing and autocommit enabled.
+        """
+        mock_pool_cls, _ = mock_pool
 
         ds = DataStore()
+        await ds.open()
 
-        mock_connect.assert_called_once_with(
-            dbname=settings.DB_NAME,
-            user=settings.DB_USER,
-            password=settings.DB_PASSWORD,
-            host=settings.DB_HOST,
-            port=settings.DB_PORT,
-        )
-        assert ds.connection == mock_conn
-        assert ds.connection.autocommit is True
-        del ds
+        kwargs = mock_pool_cls.call_args.kwargs
+        assert kwargs["kwargs"]["dbname"] == settings.DB_NAME
+        assert kwargs["kwargs"]["user"] == settings.DB_USER
+        assert kwargs["kwargs"]["password"] == settings.DB_PASSWORD
+        assert kwargs["kwargs"]["host"] == settings.DB_HOST
+        assert kwargs["kwargs"]["port"] == settings.DB_PORT
+        assert kwargs["kwargs"]["autocommit"] is True
+        assert kwargs["min_size"] == settings.DB_POOL_MIN_SIZE
+        assert kwargs["max_size"] == settings.DB_POOL_MAX_SIZE
+        assert ds.pool == mock_pool_cls.return_value
+        ds.pool.open.assert_awaited_once()
+        await ds.close()
 
-    @patch("app.utils.data.data_source.connect")
-    def test_does_create_internal_table(self, mock_connect):
+    async def test_does_create_internal_table(self, mock_pool):
         """
         Test that the DataStore class correctly creates the internal table.
 
-        This test mocks the `connect` function and verifies that the internal
+        This test mocks the connection pool and verifies that the internal
         table is created with the correct schema.
         """
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
+        _, mock_cursor = mock_pool
 
         ds = DataStore()
+        await ds.open()
 
-        mock_cursor = mock_conn.cursor.return_value
-        mock_cursor.execute.assert_any_call(QUERY_CREATE_TABLE, ())
-        del ds
+        mock_cursor.execute.assert_any_await(QUERY_CREATE_TABLE, ())
+        await ds.close()
 
-    @patch("app.utils.data.data_source.connect")
-    def test_does_create_internal_indexes(self, mock_connect):
+    async def test_does_create_internal_indexes(self, mock_pool):
         """
         Test that the DataStore class correctly creates the indexes on the internal table.
 
-        This test mocks the `connect` function and verifies that the indexes
+        This test mocks the connection pool and verifies that the indexes
         are created on the internal table.
         """
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
+        _, mock_cursor = mock_pool
 
         ds = DataStore()
+        await ds.open()
 
-        mock_cursor = mock_conn.cursor.return_value
-        mock_cursor.execute.assert_any_call(QUERY_CREATE_INDEX, ())
-        del ds
+        mock_cursor.execute.assert_any_await(QUERY_CREATE_INDEX, ())
+        await ds.close()
 
-    @patch("app.utils.data.data_source.connect")
-    def test_does_close_connection(self, mock_connect):
+    async def test_does_create_change_log(self, mock_pool):
         """
-        Test that the DataStore class correctly closes the database connection.
+        Test that the DataStore class correctly creates the change log.
 
-        This test mocks the `connect` function and verifies that the connection
-        is closed when the DataStore instance is deleted.
+        This test mocks the connection pool and verifies that the change log
+        and its pruning horizon are created.
         """
-        mock_conn = MagicMock()
-        mock_connect.return_value = mock_conn
+        _, mock_cursor = mock_pool
+
+        ds = DataStore()
+        await ds.open()
+
+        mock_cursor.execute.assert_any_await(QUERY_CREATE_CHANGE_LOG, ())
+        await ds.close()
+
+    async def test_does_create_merge_patch(self, mock_pool):
+        """
+        Test that the DataStore class correctly creates the merge patch function.
+
+        This test mocks the connection pool and verifies that the function
+        applying JSON Merge Patches is created.
+        """
+        _, mock_cursor = mock_pool
+
+        ds = DataStore()
+        await ds.open()
+
+        mock_cursor.execute.assert_any_await(QUERY_CREATE_MERGE_PATCH, ())
+        await ds.close()
+
+    async def test_does_migrate_config_tables(self, mock_pool):
+        """
+        Test that the DataStore class adds missing columns to the
+        configuration tables.
+
+        This test mocks the connection pool and verifies that the migration
+        adding the version column is run.
+        """
+        _, mock_cursor = mock_pool
+
+        ds = DataStore()
+        await ds.open()
+
+        mock_cursor.execute.assert_any_await(QUERY_MIGRATE_CONFIG_VERSION, ())
+        await ds.close()
+
+    async def test_does_close_connection(self, mock_pool):
+        """
+        Test that the DataStore class correctly closes the database connection pool.
+
+        This test mocks the connection pool and verifies that the pool
+        is closed when the DataStore is closed.
+        """
+        mock_pool_cls, _ = mock_pool
 
         ds = DataStore()
-        del ds
+        await ds.open()
+        await ds.close()
+
+        mock_pool_cls.return_value.close.assert_awaited_once()
+        assert ds.pool is None
+
+    async def test_does_reject_query_without_pool(self):
+        """
+        Test that executing a query before the pool is opened raises an error.
+        """
+        ds = DataStore()
+
+        with pytest.raises(RuntimeError):
+            await ds.execute_query("SELECT 1;", kind="r_sample")
+
+    def test_does_dispatch_notifications(self):
+        """
+        Test that notifications are handed to the callbacks of their channel only.
+        """
+        ds = DataStore()
+        received = []
+        ds.subscribe("first_channel", received.append)
+        ds.subscribe("second_channel", lambda payload: received.append("other"))
+
+        ds._dispatch("first_channel", "payload")
+        ds._dispatch("first_channel", None)
+
+        assert received == ["payload", None]
+
+    async def test_does_log_slow_queries(self, mock_pool):
+        """
+        Test that queries slower than the threshold are logged with the shape
+        of their parameters, but not their values.
+        """
+        _, mock_cursor = mock_pool
+        mock_cursor.rowcount = 1
+
+        ds = DataStore()
+        await ds.open()
+
+        with (
+            patch.object(settings, "SLOW_QUERY_THRESHOLD", 1e-9),
+            patch("app.utils.data.data_source.logger") as mock_logger,
+        ):
+            await ds.execute_query(
+                "\n    SELECT *\n    FROM sample WHERE config_key = %s AND version = %s;",
+                ("secret_key", 3),
+                kind="r_config",
+            )
+
+        _, message = mock_logger.warning.call_args.args
+        assert message.data["sql"] == (
+            "SELECT * FROM sample WHERE config_key = %s AND version = %s;"
+        )
+        assert message.data["kind"] == "r_config"
+        assert message.data["params"] == ["str[10]", "int"]
+        assert message.data["rows_affected"] == 1
+        assert "secret_key" not in str(message)
+        await ds.close()
+
+    @pytest.mark.parametrize(
+        "params, expected",
+        [
+            ((), []),
+            ({"key": "value"}, {"key": "str[5]"}),
+            ((None, {"a": 1}, [1, 2]), ["NoneType", "dict[1]", "list[2]"]),
+            (tuple(range(25)), ["int"] * 20 + ["... 5 more"]),
+        ],
+    )
+    def test_does_shape_params(self, params, expected):
+        """
+        Test that parameters are described by their types and sizes, and long
+        parameter lists are cut short.
+        """
+        assert DataStore._params_shape(params) == expected
+
+    def test_does_warn_over_query_budget(self):
+        """
+        Test that requests executing more queries than the budget are logged
+        with a warning, with the kinds of the first `budget + 1` queries, and
+        that queries run while a response is streamed are not counted.
+        """
+        ds = DataStore()
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.execute = AsyncMock()
+        mock_conn.cursor.return_value.close = AsyncMock()
+        ds.pool = MagicMock()
+        ds.pool.connection.return_value.__aenter__.return_value = mock_conn
+
+        app = FastAPI()
+        app.add_middleware(QueryBudgetMiddleware)
+
+        @app.get("/budget_test/{count}")
+        async def read(count: int):
+            for _ in range(count):
+                await ds.execute_query("SELECT 1;", kind="r_sample")
+            return {}
+
+        @app.get("/budget_test/{count}/stream")
+        async def stream(count: int):
+            async def lines():
+                for _ in range(count):
+                    await ds.execute_query("SELECT 1;", kind="w_sample")
+                    yield ": heartbeat\n\n"
+
+            return StreamingResponse(lines(), media_type="text/event-stream")
+
+        client = TestClient(app)
+        with (
+            patch.object(settings, "QUERY_BUDGET", 2),
+            patch("app.utils.data.data_source.logger") as mock_logger,
+        ):
+            client.get("/budget_test/2")
+            client.get("/budget_test/5/stream")
+            mock_logger.warning.assert_not_called()
+
+            client.get("/budget_test/5")
 
-        mock_conn.close.assert_called_once()
+        _, message = mock_logger.warning.call_args.args
+        assert message.data["route"] == "/budget_test/{count}"
+        assert message.data["queries"] == 5
+        assert message.data["kinds"] == {"r_sample": 3}
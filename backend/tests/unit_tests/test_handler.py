@@ -0,0 +1,96 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils.exceptions.errors import APIError, not_found_error
+from app.utils.exceptions.handler import ErrorHandlingMiddleware, api_error_handler
+
+HEADERS = {"X-Request-ID": "request", "X-Correlation-ID": "correlation"}
+
+
+class TestErrorHandlingMiddleware:
+    """
+    Test suite for the error handling middleware.
+    """
+
+    @pytest.fixture(scope="class")
+    def get_client(self):
+        """
+        Creates a client for an application raising errors and streaming.
+        """
+        app = FastAPI()
+        app.add_exception_handler(APIError, api_error_handler)
+        app.add_middleware(ErrorHandlingMiddleware)
+
+        @app.get("/not_found")
+        async def raise_not_found():
+            raise not_found_error("configuration", "sample_config")
+
+        @app.get("/crash")
+        async def raise_crash():
+            raise RuntimeError("boom")
+
+        @app.get("/stream")
+        async def stream():
+            async def chunks():
+                for chunk in (b"first\n", b"second\n"):
+                    yield chunk
+
+            return StreamingResponse(chunks(), headers={"X-Request-ID": "stale"})
+
+        yield TestClient(app)
+
+    @patch("app.utils.exceptions.handler.logger_utility")
+    def test_api_error(self, mock_logger_utility, get_client):
+        """
+        Test that an API error is returned with the request IDs and logged with
+        its details.
+        """
+        response = get_client.get("/not_found", headers=HEADERS)
+
+        assert response.status_code == 404
+        assert response.headers["X-Request-ID"] == "request"
+        assert response.headers["X-Correlation-ID"] == "correlation"
+
+        log = mock_logger_utility.log.call_args.kwargs
+        assert log["request_id"] == "request"
+        assert log["response"]["status"] == 404
+        assert log["response"]["traceback"] == response.json()["errors"]
+
+    @patch("app.utils.exceptions.handler.logger_utility")
+    def test_unhandled_error(self, mock_logger_utility, get_client):
+        """
+        Test that an unhandled exception becomes a JSON server error.
+        """
+        response = get_client.get("/crash")
+
+        assert response.status_code == 500
+        assert response.headers["X-Request-ID"] == "N/A"
+        assert response.json() == {
+            "status": "FAILURE",
+            "errors": [{"type": "server_error", "msg": "Internal Server Error: boom"}],
+        }
+        assert mock_logger_utility.log.call_args.kwargs["response"]["status"] == 500
+
+    @patch("app.utils.exceptions.handler.logger_utility")
+    def test_streaming(self, mock_logger_utility, get_client):
+        """
+        Test that a streamed response passes through with the request IDs.
+        """
+        response = get_client.get("/stream", headers=HEADERS)
+
+        assert response.status_code == 200
+        assert response.text == "first\nsecond\n"
+        assert response.headers.get_list("X-Request-ID") == ["request"]
+        assert mock_logger_utility.log.call_args.kwargs["response"]["status"] == 200
@@ -0,0 +1,94 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import queue
+import logging
+from unittest.mock import patch
+
+import pytest
+
+from app.utils.settings.config import settings
+from app.utils.exceptions.logger import (
+    DroppingQueueHandler,
+    logger,
+    logger_utility,
+    start_log_queue,
+    stop_log_queue,
+)
+
+
+class RecordingHandler(logging.Handler):
+    """
+    Handler keeping the messages it is given.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestLogger:
+    """
+    Test suite for the queued access logging.
+    """
+
+    def test_queue_drop(self):
+        """
+        Test that records are dropped and counted while the queue is full, and
+        reported once there is room again.
+        """
+        handler = DroppingQueueHandler(queue.Queue(2))
+        for message in ("first", "second", "third", "fourth"):
+            handler.handle(logging.makeLogRecord({"msg": message}))
+
+        assert handler.dropped == 2
+        assert handler.queue.get_nowait().getMessage() == "first"
+        assert handler.queue.get_nowait().getMessage() == "second"
+
+        handler.handle(logging.makeLogRecord({"msg": "fifth"}))
+        assert handler.queue.get_nowait().getMessage() == (
+            "Dropped 2 log records, the log queue was full."
+        )
+        assert handler.queue.get_nowait().getMessage() == "fifth"
+        assert handler.queue.empty()
+
+    def test_queue_listener(self):
+        """
+        Test that queued records are written out by the original handlers.
+        """
+        recorder = RecordingHandler()
+        handlers = logger.handlers
+        logger.handlers = [recorder]
+
+        try:
+            queue_handler = start_log_queue()
+            assert logger.handlers == [queue_handler]
+
+            logger_utility.log("request", "correlation", {}, {"status": 200}, 1.0)
+            stop_log_queue()
+            assert logger.handlers == [recorder]
+        finally:
+            stop_log_queue()
+            logger.handlers = handlers
+
+        assert recorder.messages[0].startswith('API Log: {"request_id": "request"')
+
+    @pytest.mark.parametrize("status_code, logged", [(200, False), (404, True)])
+    @patch("app.utils.exceptions.logger.logger")
+    def test_log_sampling(self, mock_logger, status_code, logged):
+        """
+        Test that successful requests are sampled, and failed ones always
+        logged.
+        """
+        with patch.object(settings, "LOG_SUCCESS_SAMPLE_RATE", 0.0):
+            logger_utility.log("request", "correlation", {}, {"status": status_code}, 1)
+
+        assert mock_logger.info.called == logged
@@ -0,0 +1,115 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY, CollectorRegistry
+
+from app.utils.config_definitions.cache import DefinitionCache
+from app.utils.data.data_source import DataStore
+from app.utils.metrics.utils import DataStoreCollector, MetricsMiddleware
+
+
+class TestMetrics:
+    """
+    Test suite for the metrics instrumentation.
+    """
+
+    async def test_query_kind(self):
+        """
+        Test that query durations are observed under the kind their call site
+        names, whichever helper executes them.
+        """
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value.execute = AsyncMock()
+        mock_conn.cursor.return_value.close = AsyncMock()
+        data_store = DataStore()
+        data_store.pool = MagicMock()
+        data_store.pool.connection.return_value.__aenter__.return_value = mock_conn
+
+        async def u_util_missing():
+            await data_store.execute_query("SELECT 1;", kind="r_config")
+
+        labels = {"kind": "r_config"}
+        before = (
+            REGISTRY.get_sample_value("tartarus_query_duration_seconds_count", labels)
+            or 0
+        )
+
+        await u_util_missing()
+
+        after = REGISTRY.get_sample_value(
+            "tartarus_query_duration_seconds_count", labels
+        )
+        assert after == before + 1
+
+    def test_request_duration(self):
+        """
+        Test that requests are observed under the path template of their route.
+        """
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics_test/{key}")
+        async def read(key: str):
+            return {"key": key}
+
+        labels = {"method": "GET", "route": "/metrics_test/{key}", "status": "200"}
+        before = REGISTRY.get_sample_value(
+            "tartarus_request_duration_seconds_count", labels
+        )
+
+        client = TestClient(app)
+        client.get("/metrics_test/first")
+        client.get("/metrics_test/second")
+
+        after = REGISTRY.get_sample_value(
+            "tartarus_request_duration_seconds_count", labels
+        )
+        assert after - (before or 0) == 2
+
+    def test_pool_collector(self):
+        """
+        Test that the pool usage is collected on scrape.
+        """
+        data_store = MagicMock()
+        data_store.pool.get_stats.return_value = {
+            "pool_size": 4,
+            "pool_available": 1,
+            "pool_max": 10,
+            "requests_waiting": 2,
+        }
+        registry = CollectorRegistry()
+        registry.register(DataStoreCollector(data_store))
+
+        assert registry.get_sample_value("tartarus_db_pool_size") == 4
+        assert registry.get_sample_value("tartarus_db_pool_waiting") == 2
+
+    def test_cache_requests(self):
+        """
+        Test that definition cache lookups are counted as hits and misses.
+        """
+
+        def sample(result):
+            return REGISTRY.get_sample_value(
+                "tartarus_cache_requests_total",
+                {"cache": "definition", "result": result},
+            )
+
+        hits, misses = sample("hit"), sample("miss")
+
+        cache = DefinitionCache(ttl=60, max_size=10)
+        cache.get("sample_config_definition")
+        cache.set("sample_config_definition", {}, cache.generation)
+        cache.get("sample_config_definition")
+
+        assert sample("hit") - hits == 1
+        assert sample("miss") - misses == 1
@@ -0,0 +1,101 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import datetime
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.models.config import ListConfigResponse
+from app.utils.responses.utils import (
+    FastJSONResponse,
+    RawJSON,
+    r_util_encode,
+    r_util_shape,
+)
+
+PAGE = {
+    "message": "Configurations listed successfully.",
+    "data": {
+        "results": [
+            {
+                "config_key": "sample_config",
+                "data": {"name": "John Doe", "nickname": None},
+                "version": 2,
+                "created_at": datetime.datetime(2024, 1, 1, 12, 0, 0, 123456),
+                "modified_at": datetime.datetime(2024, 1, 2),
+                "sort_value": "ignored",
+            }
+        ],
+        "meta": {"page": 1, "limit": 10, "total": None, "count": "none"},
+    },
+}
+
+
+class TestResponses:
+    """
+    Test suite for the response encoding utilities.
+    """
+
+    def test_shaped_response(self):
+        """
+        Test that content shaped after the response model returns the same
+        response as validating it against the model.
+        """
+        router = APIRouter()
+
+        @router.get(
+            "/validated",
+            response_model=ListConfigResponse,
+            response_model_exclude_none=True,
+        )
+        async def list_validated():
+            return PAGE
+
+        @router.get(
+            "/shaped",
+            response_model=ListConfigResponse,
+            response_model_exclude_none=True,
+        )
+        async def list_shaped():
+            return FastJSONResponse(
+                r_util_shape(ListConfigResponse, PAGE, exclude_none=True),
+                headers={"X-Page": "1"},
+            )
+
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.include_router(router)
+        client = TestClient(app)
+
+        validated = client.get("/validated")
+        shaped = client.get("/shaped")
+
+        assert shaped.status_code == validated.status_code == 200
+        assert shaped.headers["X-Page"] == "1"
+        assert shaped.content == validated.content
+        assert shaped.json()["status"] == "SUCCESS"
+        assert "total" not in shaped.json()["data"]["meta"]
+
+    @pytest.mark.parametrize(
+        "content, expected",
+        [
+            (
+                {"data": RawJSON('{"a": [1, 2]}'), "errors": None},
+                '{"data":{"a": [1, 2]}}',
+            ),
+            ([RawJSON("1"), "é", RawJSON("null")], '[1,"é",null]'),
+            ({"results": [{"data": RawJSON("{}")}]}, '{"results":[{"data":{}}]}'),
+            (RawJSON("[]"), "[]"),
+        ],
+    )
+    def test_raw_encode(self, content, expected):
+        """
+        Test that raw JSON is spliced into the envelope verbatim.
+        """
+        assert r_util_encode(content) == expected
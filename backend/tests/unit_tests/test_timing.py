@@ -0,0 +1,104 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+import itertools
+from unittest.mock import patch
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils.responses.utils import FastJSONResponse
+from app.utils.settings.config import settings
+from app.utils.timing.utils import (
+    RequestTimer,
+    ServerTimingMiddleware,
+    measure,
+    timed,
+)
+
+
+class TestTiming:
+    """
+    Test suite for the Server-Timing instrumentation.
+    """
+
+    @pytest.fixture
+    def client(self):
+        """
+        Yields a client of an app timing its requests.
+        """
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.add_middleware(ServerTimingMiddleware)
+        router = APIRouter()
+
+        @timed("validate")
+        async def validate():
+            with measure("db"):
+                pass
+
+        @router.get("/timing_test")
+        async def read():
+            await validate()
+            with measure("db"):
+                pass
+            return {"key": "value"}
+
+        app.include_router(router)
+
+        yield TestClient(app)
+
+    def test_phases(self):
+        """
+        Test that a phase entered within another pauses it, and that the
+        phases are rendered in milliseconds.
+        """
+        clock = itertools.count(0, 0.001)
+        with patch("app.utils.timing.utils.time.perf_counter", lambda: next(clock)):
+            timer = RequestTimer()
+            with timer.phase("validate"):
+                with timer.phase("db"):
+                    pass
+                with timer.phase("db"):
+                    pass
+            timer.switch("serialize")
+            timer.switch(None)
+
+            header = timer.header()
+
+        assert timer.durations == pytest.approx(
+            {"validate": 0.003, "db": 0.002, "serialize": 0.001}
+        )
+        assert header == (
+            'db;dur=2.00;desc="2 queries", validate;dur=3.00, '
+            "serialize;dur=1.00, total;dur=9.00"
+        )
+
+    def test_server_timing(self, client):
+        """
+        Test that responses carry the phases of their request when
+        `SERVER_TIMING` is on.
+        """
+        with patch.object(settings, "SERVER_TIMING", True):
+            response = client.get("/timing_test")
+
+        metrics = [
+            metric.split(";")[0]
+            for metric in response.headers["Server-Timing"].split(", ")
+        ]
+        assert metrics == ["db", "validate", "serialize", "total"]
+        assert 'desc="2 queries"' in response.headers["Server-Timing"]
+        assert response.json() == {"key": "value"}
+
+    def test_server_timing_off(self, client):
+        """
+        Test that responses carry no Server-Timing header by default.
+        """
+        response = client.get("/timing_test")
+
+        assert "Server-Timing" not in response.headers
@@ -0,0 +1,148 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from app.utils.data.data_source import DataStore
+from app.utils.exceptions.handler import ErrorHandlingMiddleware
+from app.utils.tracing import utils as tracing_utils
+from app.utils.configs.validations import validate_config_creation
+
+
+SCHEMA = {
+    "json_schema": {
+        "type": "object",
+        "properties": {"name": {"type": "string"}},
+    }
+}
+
+
+class TestTracing:
+    """
+    Test suite for the tracing instrumentation.
+    """
+
+    @pytest.fixture
+    def exporter(self):
+        """
+        Turns tracing on with an in-memory exporter and yields the exporter.
+        """
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+        with patch.object(tracing_utils, "tracer", provider.get_tracer("test")):
+            yield exporter
+
+    def test_request_span(self, exporter):
+        """
+        Test that requests are traced under their route, carrying the request
+        and correlation IDs, and continuing the trace of the caller.
+        """
+        app = FastAPI()
+        app.add_middleware(tracing_utils.TracingMiddleware)
+        app.add_middleware(ErrorHandlingMiddleware)
+
+        @app.get("/tracing_test/{key}")
+        async def read(key: str):
+            with tracing_utils.span("work"):
+                return {"key": key}
+
+        TestClient(app).get(
+            "/tracing_test/first",
+            headers={
+                "X-Request-ID": "request",
+                "X-Correlation-ID": "correlation",
+                "traceparent": "00-0af7651916cd43dd8448eb211c80319c-"
+                "b7ad6b7169203331-01",
+            },
+        )
+
+        work, request = exporter.get_finished_spans()
+        assert request.name == "GET /tracing_test/{key}"
+        assert request.parent.span_id == 0xB7AD6B7169203331
+        assert request.context.trace_id == 0x0AF7651916CD43DD8448EB211C80319C
+        assert request.attributes["tartarus.request_id"] == "request"
+        assert request.attributes["tartarus.correlation_id"] == "correlation"
+        assert request.attributes["http.response.status_code"] == 200
+        assert work.parent.span_id == request.context.span_id
+
+    @patch("app.utils.configs.validations.r_config_definition")
+    async def test_validation_spans(self, mock_r_config_definition, exporter):
+        """
+        Test that each validation step is traced as a child of the one calling
+        it.
+        """
+        mock_r_config_definition.return_value = SCHEMA
+
+        await validate_config_creation(
+            "sample_config_definition", "sample_config", {"name": "sample"}
+        )
+
+        spans = {span.name: span for span in exporter.get_finished_spans()}
+        assert set(spans) == {
+            "validate_config_creation",
+            "validate_config_data",
+            "jsonschema.validate",
+        }
+        assert (
+            spans["jsonschema.validate"].parent.span_id
+            == spans["validate_config_data"].context.span_id
+        )
+        assert (
+            spans["validate_config_data"].parent.span_id
+            == spans["validate_config_creation"].context.span_id
+        )
+
+    async def test_query_span(self, exporter):
+        """
+        Test that queries are traced with their SQL, but not their parameters.
+        """
+        mock_cursor = MagicMock()
+        mock_cursor.execute = AsyncMock()
+        mock_cursor.close = AsyncMock()
+        mock_cursor.rowcount = 1
+
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+
+        data_store = DataStore()
+        data_store.pool = MagicMock()
+        data_store.pool.connection.return_value.__aenter__.return_value = mock_conn
+
+        await data_store.execute_query(
+            "SELECT * FROM sample WHERE config_key = %s;", ("secret",), kind="r_config"
+        )
+
+        (query,) = exporter.get_finished_spans()
+        assert query.name == "query r_config"
+        assert query.attributes["db.statement"] == (
+            "SELECT * FROM sample WHERE config_key = %s;"
+        )
+        assert query.attributes["db.rows_affected"] == 1
+        assert "secret" not in str(dict(query.attributes))
+
+    def test_tracing_off(self):
+        """
+        Test that spans cost nothing but a lookup while tracing is off.
+        """
+        assert tracing_utils.tracer is None
+        with tracing_utils.span("off") as span:
+            assert span is None
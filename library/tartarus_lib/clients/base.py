@@ -6,7 +6,11 @@
 
 """
 
+import copy
+import json
 import requests
+from collections import OrderedDict
+from typing import Iterator
 from tartarus_lib.exceptions import TartarusError
 
 
@@ -14,11 +18,18 @@ class BaseAPIClient:
     """
     Base class for handling API interactions.
 
-    Provides methods for making authenticated HTTP requests.
+    Provides methods for making authenticated HTTP requests. Responses that
+    carry an ETag are kept, so reading them again only costs a `304 Not
+    Modified` while they are unchanged.
     """
 
     def __init__(
-        self, base_url: str, api_key: str, version: str = "v1", timeout: int = 10
+        self,
+        base_url: str,
+        api_key: str,
+        version: str = "v1",
+        timeout: int = 10,
+        etag_cache_size: int = 256,
     ):
         """
         Initialize the BaseAPIClient.
@@ -27,12 +38,16 @@ class BaseAPIClient:
         :param api_key: The API key for authentication.
         :param version: The API version to use (default: v1).
         :param timeout: Timeout for API requests (default: 10 seconds).
+        :param etag_cache_size: The number of responses kept by ETag, or 0 to
+            disable conditional reads (default: 256).
         """
         self.base_url = base_url.rstrip("/")
         self.version = version
         self.timeout = timeout
+        self.etag_cache_size = etag_cache_size
         self.session = requests.Session()
         self.session.headers.update({"Authorization": api_key})
+        self._etags = OrderedDict()
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> dict:
         """
@@ -40,7 +55,8 @@ class BaseAPIClient:
 
         :param method: HTTP method (GET, POST, etc.).
         :param endpoint: API endpoint relative to the base URL.
-        :param kwargs: Additional parameters for the request.
+        :param kwargs: Additional parameters for the request. A `timeout` here
+            overrides the client's.
 
         :return: JSON response from the API.
         :raises TartarusError: If the request fails.
@@ -49,10 +65,73 @@ class BaseAPIClient:
             url = f"{self.base_url}{endpoint}"
         else:
             url = f"{self.base_url}/api/{self.version}/{endpoint.lstrip('/')}{kwargs.pop('url_suffix', '')}"
+        timeout = kwargs.pop("timeout", self.timeout)
+
+        cache_key, cached = None, None
+        if method == "GET" and self.etag_cache_size > 0:
+            cache_key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+            cached = self._etags.get(cache_key)
+            if cached is not None:
+                kwargs["headers"] = {
+                    **kwargs.get("headers", {}),
+                    "If-None-Match": cached[0],
+                }
+
         try:
-            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code == 304 and cached is not None:
+                self._etags.move_to_end(cache_key)
+                return copy.deepcopy(cached[1])
+
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            if cache_key is not None:
+                self._store_etag(cache_key, response.headers.get("ETag"), data)
+            return data
+        except requests.RequestException as e:
+            error_message = f"API request failed: {e}"
+            if isinstance(e, requests.HTTPError) and e.response is not None:
+                error_message += f"\nResponse Body: {e.response.text}"
+            raise TartarusError(error_message) from e
+
+    def _store_etag(self, cache_key: tuple, etag: str, data: dict):
+        """
+        Keep a response by its ETag, evicting the least recently used.
+
+        :param cache_key: The URL and query parameters of the request.
+        :param etag: The ETag of the response, if any.
+        :param data: JSON response from the API.
+        """
+        if etag is None:
+            self._etags.pop(cache_key, None)
+            return
+
+        self._etags[cache_key] = (etag, copy.deepcopy(data))
+        self._etags.move_to_end(cache_key)
+
+        while len(self._etags) > self.etag_cache_size:
+            self._etags.popitem(last=False)
+
+    def _stream_request(self, method: str, endpoint: str, **kwargs) -> Iterator[dict]:
+        """
+        Send an HTTP request to the API and read its NDJSON response as it arrives.
+
+        :param method: HTTP method (GET, POST, etc.).
+        :param endpoint: API endpoint relative to the base URL.
+        :param kwargs: Additional parameters for the request.
+
+        :return: Iterator over the JSON objects of the response, one per line.
+        :raises TartarusError: If the request fails.
+        """
+        url = f"{self.base_url}/api/{self.version}/{endpoint.lstrip('/')}"
+        try:
+            with self.session.request(
+                method, url, timeout=self.timeout, stream=True, **kwargs
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
         except requests.RequestException as e:
             error_message = f"API request failed: {e}"
             if isinstance(e, requests.HTTPError) and e.response is not None:
@@ -0,0 +1,37 @@
+"""
+
+ Copyright 2024 @Qreater
+ Licensed under the Apache License, Version 2.0.
+ See: http://www.apache.org/licenses/LICENSE-2.0
+
+"""
+
+from tartarus_lib.clients.base import BaseAPIClient
+
+
+class ChangesAPI:
+    """
+    API client for reading the change log of every configuration.
+
+    Lets consumers sync incrementally instead of re-listing everything.
+    """
+
+    def __init__(self, base_client: BaseAPIClient):
+        """
+        Initialize the ChangesAPI.
+
+        :param base_client: An instance of BaseAPIClient.
+        """
+        self.base_client = base_client
+
+    def list(self, since: int = 0, limit: int = 100):
+        """
+        List the changes of every configuration after a sequence number.
+
+        :param since: The `last_seq` of the previous call, or 0 to read the
+            change log from the start.
+        :param limit: The maximum number of changes to return.
+        """
+
+        params = {"since": since, "limit": limit}
+        return self.base_client._make_request("GET", "changes/", params=params)
@@ -6,6 +6,8 @@
 
 """
 
+import json
+
 from tartarus_lib.clients.base import BaseAPIClient
 
 
@@ -40,6 +42,22 @@ class ConfigAPI:
         endpoint = f"config_definition/{config_definition_key}/config"
         return self.base_client._make_request("POST", endpoint, json=data)
 
+    def bulk(self, config_definition_key: str, configs: list, mode: str = "insert"):
+        """
+        Create or update many configurations under a specific definition at once.
+
+        :param config_definition_key: The key for the configuration definition.
+        :param configs: The configurations, as dictionaries with a `config_key` and `data`.
+        :param mode: "insert" to report existing configurations as errors, "upsert"
+            to overwrite them, or "skip-existing" to leave them untouched.
+        """
+
+        params = {"mode": mode}
+        endpoint = f"config_definition/{config_definition_key}/config/bulk"
+        return self.base_client._make_request(
+            "POST", endpoint, json=configs, params=params
+        )
+
     def retrieve(self, config_definition_key: str, config_key: str):
         """
         Retrieve a configuration by its key.
@@ -51,18 +69,61 @@ class ConfigAPI:
         endpoint = f"config_definition/{config_definition_key}/config/{config_key}"
         return self.base_client._make_request("GET", endpoint)
 
-    def update(self, config_definition_key: str, config_key: str, data: dict):
+    def update(
+        self,
+        config_definition_key: str,
+        config_key: str,
+        data: dict,
+        expected_version: int = None,
+    ):
         """
         Update an existing configuration.
 
         :param config_definition_key: The key for the configuration definition.
         :param config_key: The key for the configuration.
         :param data: The data for the configuration.
+        :param expected_version: Only update the configuration if it is still at
+            this version, failing otherwise.
         """
 
         data = {"data": data}
+        params = {}
+        if expected_version is not None:
+            params["expected_version"] = expected_version
+
+        endpoint = f"config_definition/{config_definition_key}/config/{config_key}"
+        return self.base_client._make_request("PUT", endpoint, json=data, params=params)
+
+    def patch(
+        self,
+        config_definition_key: str,
+        config_key: str,
+        patch: dict,
+        expected_version: int = None,
+    ):
+        """
+        Patch an existing configuration with a JSON Merge Patch (RFC 7396).
+
+        :param config_definition_key: The key for the configuration definition.
+        :param config_key: The key for the configuration.
+        :param patch: The merge patch for the data. Keys set to None are
+            removed, dictionaries are merged and anything else is replaced.
+        :param expected_version: Only patch the configuration if it is still at
+            this version, failing otherwise.
+        """
+
+        params = {}
+        if expected_version is not None:
+            params["expected_version"] = expected_version
+
         endpoint = f"config_definition/{config_definition_key}/config/{config_key}"
-        return self.base_client._make_request("PUT", endpoint, json=data)
+        return self.base_client._make_request(
+            "PATCH",
+            endpoint,
+            data=json.dumps(patch),
+            params=params,
+            headers={"Content-Type": "application/merge-patch+json"},
+        )
 
     def delete(self, config_definition_key: str, config_key: str):
         """
@@ -75,6 +136,57 @@ class ConfigAPI:
         endpoint = f"config_definition/{config_definition_key}/config/{config_key}"
         return self.base_client._make_request("DELETE", endpoint)
 
+    def export(self, config_definition_key: str):
+        """
+        Iterate over every configuration under a specific definition.
+
+        The configurations are streamed by the server and read as they arrive,
+        so memory stays flat however many there are.
+
+        :param config_definition_key: The key for the configuration definition.
+        """
+
+        endpoint = f"config_definition/{config_definition_key}/export"
+        return self.base_client._stream_request("GET", endpoint)
+
+    def watch(
+        self,
+        config_definition_key: str,
+        config_key: str = None,
+        since: int = None,
+        timeout: float = 30,
+    ):
+        """
+        Iterate over the changes of a definition, or of one configuration, as
+        they happen. Replaces polling: each request waits on the server until
+        there is a change, and resumes where the previous one left off.
+
+        :param config_definition_key: The key for the configuration definition.
+        :param config_key: The key for a single configuration to follow.
+        :param since: The `seq` of the last change already seen. Without it,
+            only changes made from now on are returned.
+        :param timeout: How long each request waits for a change, in seconds.
+        """
+
+        endpoint = f"config_definition/{config_definition_key}/watch"
+        while True:
+            params = {"timeout": timeout}
+
+            if config_key:
+                params["config_key"] = config_key
+
+            if since is not None:
+                params["since"] = since
+
+            response = self.base_client._make_request(
+                "GET",
+                endpoint,
+                params=params,
+                timeout=timeout + self.base_client.timeout,
+            )
+            since = response["data"]["last_seq"]
+            yield from response["data"]["changes"]
+
     def list(
         self,
         config_definition_key: str,
@@ -83,6 +195,8 @@ class ConfigAPI:
         sort_by: str = "modified_at",
         sort_order: str = "desc",
         search: str = None,
+        cursor: str = None,
+        count: str = None,
     ):
         """
         List all configurations under a specific definition.
@@ -93,6 +207,10 @@ class ConfigAPI:
         :param sort_by: The field to sort by.
         :param sort_order: The order to sort by.
         :param search: The search term to filter configurations by.
+        :param cursor: The `next_cursor` from the previous page's metadata. Pages
+            by keyset instead of offset, so deep pages are as fast as the first.
+        :param count: How the total is counted: "exact" (the server default),
+            "estimated" or "none". Skip it when only iterating.
         """
 
         params = {
@@ -105,5 +223,11 @@ class ConfigAPI:
         if search:
             params["search"] = search
 
+        if cursor:
+            params["cursor"] = cursor
+
+        if count:
+            params["count"] = count
+
         endpoint = f"config_definition/{config_definition_key}/config/"
         return self.base_client._make_request("GET", endpoint, params=params)
@@ -81,6 +81,7 @@ class ConfigDefinitionAPI:
         sort_by: str = "modified_at",
         sort_order: str = "desc",
         search: str = None,
+        count: str = None,
     ):
         """
         List all configuration definitions.
@@ -90,6 +91,8 @@ class ConfigDefinitionAPI:
         :param sort_by: The field to sort by.
         :param sort_order: The order to sort by.
         :param search: The search term to filter by.
+        :param count: How the total is counted: "exact" (the server default),
+            "estimated" or "none".
         """
 
         params = {
@@ -101,5 +104,8 @@ class ConfigDefinitionAPI:
 
         if search:
             params["search"] = search
+
+        if count:
+            params["count"] = count
         endpoint = f"config_definition/"
         return self.base_client._make_request("GET", endpoint, params=params)
@@ -9,13 +9,15 @@
 from tartarus_lib.clients.base import BaseAPIClient
 from tartarus_lib.clients.config_definition import ConfigDefinitionAPI
 from tartarus_lib.clients.config import ConfigAPI
+from tartarus_lib.clients.changes import ChangesAPI
 
 
 class TartarusAPIClient:
     """
     Client for interacting with the Tartarus API.
 
-    Combines configuration definition and configuration management functionalities.
+    Combines configuration definition and configuration management functionalities,
+    and the change log of configurations.
     """
 
     def __init__(self, base_url: str, api_key: str):
@@ -28,6 +30,7 @@ class TartarusAPIClient:
         self.base_client = BaseAPIClient(base_url, api_key)
         self.config_definitions = ConfigDefinitionAPI(self.base_client)
         self.configs = ConfigAPI(self.base_client)
+        self.changes = ChangesAPI(self.base_client)
 
     def ping(self):
         """Check if the API is reachable."""
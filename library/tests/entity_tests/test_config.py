@@ -7,6 +7,7 @@
 """
 
 import pytest
+from unittest.mock import patch
 
 from tests.conftest import (
     API_KEY,
@@ -83,6 +84,13 @@ class TestConfigClient:
         payload_extract = get_payload["test_c_create"]
         self._run_test(payload_extract, get_client)
 
+    def test_c_bulk(self, get_payload, get_client):
+        """
+        Test the bulk creation of configurations.
+        """
+        payload_extract = get_payload["test_c_bulk"]
+        self._run_test(payload_extract, get_client)
+
     def test_c_retrieve(self, get_payload, get_client):
         """
         Test the retrieval of a configuration.
@@ -90,6 +98,27 @@ class TestConfigClient:
         payload_extract = get_payload["test_c_retrieve"]
         self._run_test(payload_extract, get_client)
 
+    def test_c_retrieve_etag(self, get_payload, get_client):
+        """
+        Test that reading an unchanged configuration again is answered from
+        the client's copy, validated by ETag.
+        """
+        _, payload, _, _ = extract_payload_params(get_payload["test_c_retrieve"])
+        session = get_client.base_client.session
+        request, statuses = session.request, []
+
+        def record(*args, **kwargs):
+            response = request(*args, **kwargs)
+            statuses.append(response.status_code)
+            return response
+
+        first = get_client.retrieve(**payload)
+        with patch.object(session, "request", side_effect=record):
+            second = get_client.retrieve(**payload)
+
+        assert statuses == [304]
+        assert second == first
+
     def test_c_update(self, get_payload, get_client):
         """
         Test updating of a configuration.
@@ -97,6 +126,64 @@ class TestConfigClient:
         payload_extract = get_payload["test_c_update"]
         self._run_test(payload_extract, get_client)
 
+    def test_c_patch(self, get_payload, get_client):
+        """
+        Test patching of a configuration.
+        """
+        payload_extract = get_payload["test_c_patch"]
+        self._run_test(payload_extract, get_client)
+
+    def test_c_watch(self, get_payload, get_client):
+        """
+        Test watching the changes of a configuration.
+        """
+        method, payload, _, expected_response = extract_payload_params(
+            get_payload["test_c_watch"]
+        )
+
+        watch = (
+            change
+            for change in getattr(get_client, method)(**payload)
+            if change["operation"] != "drop"
+        )
+        changes = [next(watch) for _ in expected_response]
+
+        for change in changes:
+            change.pop("seq", None)
+            change.pop("changed_at", None)
+
+        assert changes == expected_response
+
+    def test_c_changes(self, get_payload, get_client):
+        """
+        Test listing the change log from a sequence number.
+        """
+        client = TartarusAPIClient(API_URL, API_KEY)
+
+        response = client.changes.list(since=0, limit=1)
+        assert response["status"] == "SUCCESS"
+        assert len(response["data"]["changes"]) == 1
+
+        last_seq = response["data"]["last_seq"]
+        response = client.changes.list(since=last_seq, limit=1)
+        assert response["data"]["changes"][0]["seq"] > last_seq
+
+    def test_c_export(self, get_payload, get_client):
+        """
+        Test exporting the configurations of a definition.
+        """
+        method, payload, _, expected_response = extract_payload_params(
+            get_payload["test_c_export"]
+        )
+
+        configs = list(getattr(get_client, method)(**payload))
+
+        for config in configs:
+            config.pop("created_at", None)
+            config.pop("modified_at", None)
+
+        assert configs == expected_response
+
     def test_c_list(self, get_payload, get_client):
         """
         Test listing of configurations.
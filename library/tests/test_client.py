@@ -40,5 +40,6 @@ def test_client():
 
     assert client.configs is not None
     assert client.config_definitions is not None
+    assert client.changes is not None
 
     assert client.ping() == {"message": "Welcome to Tartarus API"}